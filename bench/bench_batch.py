@@ -0,0 +1,152 @@
+# 1ティック分の書き込み (モーター4本 + サーボ2本のデューティ) のベンチマーク
+# 同じ6コマンドを3通りで送り、ティックあたりの時間とコマンド/秒を比べる。
+#
+#   single    1コマンドずつ送って返事を待つ (6往復)
+#   pipeline  pi.batch(): まとめて書いて返事をまとめて読む (1往復, pigpiod はコマンドごとに受信・実行・返信)
+#   exec      pi.exec_batch(): PI_CMD_BATCH 1要求 (1往復, pigpiod は受信1回で6コマンドを続けて実行)
+#
+# pigpiod の代役 (sim.fake_pigpiod) では、最初と最後のコマンドが実行された時刻の差 (spread) も出す。
+# 6本のピンがどれだけ揃って変わるか。--latency-us は代役が1要求ごとに足す処理時間。
+#
+#   PYTHONPATH=pigpio-master python -m bench.bench_batch
+#   PYTHONPATH=pigpio-master python -m bench.bench_batch --ticks 20000 --latency-us 20 --json
+#   PYTHONPATH=pigpio-master python -m bench.bench_batch --host localhost     # 実機 (spread は出ない)
+
+import argparse
+import json
+import time
+
+from bench.bench_camera import commit
+from core.control import TickStats
+from sim.fake_pigpiod import run_in_thread
+
+GPIOS = (17, 27, 22, 23, 12, 13)    # config.yaml の走行4本と砲塔 (パン・チルト)
+WARMUP = 200
+MODES = ("single", "pipeline", "exec")
+
+
+def write_tick(target, i):
+    for n, gpio in enumerate(GPIOS):
+        target.set_PWM_dutycycle(gpio, (i + n * 40) % 256)
+
+
+def run_tick(pi, mode, i):
+    if mode == "single":
+        write_tick(pi, i)
+        return
+    with (pi.batch() if mode == "pipeline" else pi.exec_batch()) as b:
+        write_tick(b, i)
+
+
+class Spread:
+    """代役の on_command で、1ティックの最初と最後のコマンドの実行時刻の差を取る"""
+
+    def __init__(self, count):
+        self.stats = TickStats(window=count)
+        self.first = None
+        self.seen = 0
+
+    def on_command(self, cmd, p1, p2, t):
+        if cmd != 5:        # PI_CMD_PWM (BATCH 自体は数えない)
+            return
+        if self.seen == 0:
+            self.first = t
+        self.seen += 1
+        if self.seen == len(GPIOS):
+            self.stats.add(t - self.first)
+            self.seen = 0
+
+
+def measure(pi, mode, ticks, daemon=None):
+    for i in range(WARMUP):
+        run_tick(pi, mode, i)
+    spread = None
+    if daemon is not None:
+        spread = Spread(ticks)
+        daemon.on_command = spread.on_command
+    stats = TickStats(window=ticks)
+    cpu = time.process_time()
+    start = time.perf_counter()
+    for i in range(ticks):
+        t0 = time.perf_counter()
+        run_tick(pi, mode, i)
+        stats.add(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    if daemon is not None:
+        daemon.on_command = None
+    p50, p99, worst = stats.percentiles()
+    row = {
+        "tick_p50_us": round(p50 * 1e6, 1),
+        "tick_p99_us": round(p99 * 1e6, 1),
+        "tick_max_us": round(worst * 1e6, 1),
+        "commands_per_s": round(ticks * len(GPIOS) / elapsed),
+        "client_cpu_us_per_tick": round(cpu / ticks * 1e6, 1),
+    }
+    if spread is not None:
+        s50, s99, _ = spread.stats.percentiles()
+        row["spread_p50_us"] = round(s50 * 1e6, 1)
+        row["spread_p99_us"] = round(s99 * 1e6, 1)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="per-tick output writes: single commands vs batch vs exec_batch")
+    parser.add_argument("--ticks", type=int, default=5000, help="ticks per mode and round")
+    parser.add_argument("--rounds", type=int, default=3, help="alternating rounds (best p50 is reported)")
+    parser.add_argument("--latency-us", type=float, default=0.0, help="fake daemon: added time per request")
+    parser.add_argument("--host", default=None, help="real daemon host (default: in-process fake daemon)")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    import pigpio
+
+    daemon = None
+    if args.host is None:
+        daemon, port = run_in_thread(latency_us=args.latency_us)
+        host = "127.0.0.1"
+    else:
+        host, port = args.host, args.port
+    pi = pigpio.pi(host, port, notify_fifo=False)
+    if not pi.connected:
+        raise SystemExit(f"can't connect to pigpio at {host}:{port}")
+    modes = MODES
+    try:
+        with pi.exec_batch() as b:
+            b.get_mode(0)
+            b.get_mode(1)
+    except pigpio.error as e:
+        print(f"exec_batch unavailable ({e}), skipped")
+        modes = MODES[:2]
+
+    best = {}
+    for _ in range(args.rounds):
+        for mode in modes:
+            row = measure(pi, mode, args.ticks, daemon)
+            if mode not in best or row["tick_p50_us"] < best[mode]["tick_p50_us"]:
+                best[mode] = row
+    for gpio in GPIOS:
+        pi.set_PWM_dutycycle(gpio, 0)
+    pi.stop()
+
+    report = {
+        "commit": commit(),
+        "daemon": "fake" if args.host is None else f"{host}:{port}",
+        "latency_us": args.latency_us,
+        "ticks": args.ticks,
+        "commands_per_tick": len(GPIOS),
+    }
+    report.update(best)
+    if "exec" in best:
+        report["exec_vs_single"] = round(best["exec"]["commands_per_s"] / best["single"]["commands_per_s"], 2)
+        report["exec_vs_pipeline"] = round(best["exec"]["commands_per_s"] / best["pipeline"]["commands_per_s"], 2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for key, value in report.items():
+        print(f"  {key:16} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# 映像配信のベンチマーク (合成キャプチャソース)
+# raspivid なしで
+#   1. フレーム切り出し (MJPEG / H.264) の速度
+#   2. N 視聴者への配信: 視聴者ごとの fps, 配信遅延, 1フレームあたりの CPU
+#   3. 視聴者1人あたりのメモリ
+# を測る。--json の出力をコミット間で比べる。
+#
+#   python -m bench.bench_camera
+#   python -m bench.bench_camera --fps 30 --viewers 1 3 5 10 --json > camera.json
+#   python -m bench.bench_camera --frames capture.mjpeg --jitter 0.3
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import time
+import tracemalloc
+
+from bench.bench_control import percentile
+from drivers.camera import Camera
+from drivers.capture import SyntheticSource, h264_frames, jpeg_frames, load_frames
+
+
+def rss_kb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def bench_parse(frames, codec, repeat):
+    """パイプから読む代わりに、用意したバイト列を 4KB ずつ切り出し処理に通す"""
+    stream = asyncio.StreamReader()
+    data = b"".join(frames) * repeat
+    for i in range(0, len(data), 4096):
+        stream.feed_data(data[i:i + 4096])
+    stream.feed_eof()
+
+    camera = Camera(source=SyntheticSource(frames, codec=codec))
+    read = camera._read if codec == "mjpeg" else camera._read_h264
+    t0 = time.perf_counter()
+    await read(stream)
+    elapsed = time.perf_counter() - t0
+    return {
+        "codec": codec,
+        "frames": camera.frame_count,
+        "mb_per_sec": round(len(data) / elapsed / 1e6, 1),
+        "us_per_frame": round(elapsed / camera.frame_count * 1e6, 1) if camera.frame_count else 0,
+    }
+
+
+async def bench_fanout(frames, fps, jitter, viewers, seconds):
+    """viewers 人が frames() を回しているときの配信"""
+    published = {}
+    camera = Camera(source=SyntheticSource(frames, fps=fps, jitter=jitter),
+                    on_frame=lambda jpg: published.__setitem__(id(jpg), time.perf_counter()))
+    delays = []
+    counts = [0] * viewers
+
+    async def viewer(n):
+        async for jpg in camera.frames():
+            delays.append((time.perf_counter() - published[id(jpg)]) * 1000.0)
+            counts[n] += 1
+            await asyncio.sleep(0)      # 実際の視聴者は書き込みで1回は譲る
+
+    await camera.start()
+    tasks = [asyncio.create_task(viewer(n)) for n in range(viewers)]
+    cpu0 = time.process_time()
+    await asyncio.sleep(seconds)
+    cpu = time.process_time() - cpu0
+    await camera.stop()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    return {
+        "viewers": viewers,
+        "source_fps": round(camera.frame_count / seconds, 1),
+        "viewer_fps_min": round(min(counts) / seconds, 1),
+        "delay_p50_ms": round(percentile(delays, 0.50), 3),
+        "delay_p99_ms": round(percentile(delays, 0.99), 3),
+        "cpu_per_frame_us": round(cpu / camera.frame_count * 1e6, 1) if camera.frame_count else 0,
+    }
+
+
+async def bench_memory(frames, viewers):
+    """フレームを待っている視聴者 viewers 人ぶんの Python ヒープと RSS の増分"""
+    camera = Camera(source=SyntheticSource(frames))
+    camera.running = True
+    tracemalloc.start()
+    rss0 = rss_kb()
+    before = tracemalloc.take_snapshot()
+
+    async def viewer():
+        async for _ in camera.frames():
+            pass
+
+    tasks = [asyncio.create_task(viewer()) for _ in range(viewers)]
+    await asyncio.sleep(0)
+    after = tracemalloc.take_snapshot()
+    heap = sum(s.size_diff for s in after.compare_to(before, "filename"))
+    rss = rss_kb() - rss0
+    tracemalloc.stop()
+
+    camera.running = False
+    camera._publish(None)
+    await asyncio.gather(*tasks)
+    return {
+        "viewers": viewers,
+        "heap_per_viewer_bytes": round(heap / viewers),
+        "rss_delta_kb": rss,
+    }
+
+
+async def run(args):
+    if args.frames:
+        codec, frames = load_frames(args.frames)
+    else:
+        codec, frames = "mjpeg", jpeg_frames(size=args.frame_bytes)
+
+    report = {"commit": commit(), "frames": args.frames or "synthetic",
+              "frame_bytes": round(sum(map(len, frames)) / len(frames)), "parse": []}
+    report["parse"].append(await bench_parse(frames, codec, args.repeat))
+    report["parse"].append(await bench_parse(h264_frames(size=args.frame_bytes), "h264", args.repeat))
+    if codec == "mjpeg":
+        report["fanout"] = [await bench_fanout(frames, args.fps, args.jitter, n, args.seconds)
+                            for n in args.viewers]
+        report["memory"] = [await bench_memory(frames, n * 100) for n in args.viewers]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="camera parsing and fan-out benchmark")
+    parser.add_argument("--frames", help="MJPEG/H.264 file to use instead of generated frames")
+    parser.add_argument("--frame-bytes", type=int, default=12000, help="size of generated frames")
+    parser.add_argument("--fps", type=float, default=10.0)
+    parser.add_argument("--jitter", type=float, default=0.0, help="frame interval jitter (fraction)")
+    parser.add_argument("--viewers", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration of each fan-out run")
+    parser.add_argument("--repeat", type=int, default=100, help="passes over the frames when parsing")
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"commit {report['commit']}, {report['frames']}, {report['frame_bytes']} B/frame")
+    for section in ("parse", "fanout", "memory"):
+        for row in report.get(section, []):
+            print(f"[{section}] " + "  ".join(f"{k}={v}" for k, v in row.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# 制御スタックのベンチマーク (入力トレース再生 + 記録用アクチュエータ)
+# 実機なしで何度でも同じ入力を流して、
+#   1. TankDriveSystem.drive / TurretController.set_turret の呼び出しコスト
+#   2. control_loop のティック遅延と 入力→出力 遅延
+# を測る。
+#
+#   python -m bench.bench_control                       # 合成トレース, 記録用シンク
+#   python -m bench.bench_control --trace run.bin --speed 4
+#   python -m bench.bench_control --sink gpiozero       # 実ドライバ + gpiozero MockFactory
+
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import tempfile
+import time
+
+from core.control import CONTROL_PERIOD, control_loop
+from core.state import StateBlock
+from drivers.controller import EV_SYN
+from drivers.input_trace import ReplayController, read_trace, synthesize
+from drivers.mock_hardware import RecordingTank, RecordingTurret, mock_pin_factory
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(len(s) * p))]
+
+
+def make_sinks(kind):
+    if kind == "recording":
+        return RecordingTank(), RecordingTurret()
+
+    # 実ドライバを MockFactory のピンで動かす
+    import yaml
+    from drivers.motor_driver import TankDriveSystem
+    from drivers.servo_driver import TurretController
+    factory = mock_pin_factory()
+    with open("config/config.yaml") as f:
+        config = yaml.safe_load(f)
+    return (TankDriveSystem(pin_factory=factory),
+            TurretController(config['turret_system'], pin_factory=factory))
+
+
+def bench_calls(trace, tank, turret):
+    """SYN_REPORT ごとに drive/set_turret を直接呼んだときのコスト"""
+    controller = ReplayController(trace)
+    drive_t = turret_t = 0.0
+    reports = 0
+    for event in controller.events:
+        controller._process_event(event)
+        if event.type != EV_SYN:
+            continue
+        st = controller.state
+        t0 = time.perf_counter()
+        tank.drive(st['throttle'], st['turn'])
+        t1 = time.perf_counter()
+        turret.set_turret(st['turret_pan'] * 90, st['turret_tilt'] * 30)
+        t2 = time.perf_counter()
+        drive_t += t1 - t0
+        turret_t += t2 - t1
+        reports += 1
+    return {
+        "reports": reports,
+        "drive_us": round(drive_t / reports * 1e6, 2) if reports else 0,
+        "set_turret_us": round(turret_t / reports * 1e6, 2) if reports else 0,
+        "drive_per_sec": round(reports / drive_t) if drive_t else 0,
+        "set_turret_per_sec": round(reports / turret_t) if turret_t else 0,
+    }
+
+
+async def bench_loop(trace, tank, turret, speed):
+    """トレースを speed 倍速で再生しながら control_loop を回す"""
+    state = StateBlock(f"panzer_bench_{os.getpid()}")
+    controller = ReplayController(trace, speed=speed)
+    reports = []
+    controller.on_event = lambda ev: reports.append(time.monotonic()) if ev.type == EV_SYN else None
+
+    period = CONTROL_PERIOD / speed
+    loop_task = asyncio.create_task(control_loop(tank, turret, controller, state, period=period))
+    started = time.process_time()
+    await controller.listen()
+    cpu = time.process_time() - started
+    loop_task.cancel()
+    snap = state.snapshot()
+    state.close()
+
+    # 入力→出力: 各レポートの後で最初に drive() が呼ばれるまで
+    drives = tank.times
+    latency = []
+    for t in reports:
+        i = bisect.bisect_left(drives, t)
+        if i < len(drives):
+            latency.append((drives[i] - t) * 1000.0)
+
+    return {
+        "speed": speed,
+        "ticks": snap.tick_count,
+        "tick_p50_ms": round(snap.tick_p50, 3),
+        "tick_p99_ms": round(snap.tick_p99, 3),
+        "tick_max_ms": round(snap.tick_max, 3),
+        "input_to_drive_p50_ms": round(percentile(latency, 0.50), 3),
+        "input_to_drive_p99_ms": round(percentile(latency, 0.99), 3),
+        "cpu_per_tick_us": round(cpu / snap.tick_count * 1e6, 1) if snap.tick_count else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="replay an input trace through the control stack")
+    parser.add_argument("--trace", help="input trace (default: 20 s synthetic trace)")
+    parser.add_argument("--speed", type=float, default=4.0, help="replay speed for the loop test")
+    parser.add_argument("--sink", choices=("recording", "gpiozero"), default="recording")
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    trace = args.trace
+    if not trace:
+        trace = os.path.join(tempfile.mkdtemp(), "synthetic.trace")
+        synthesize(trace, seconds=20.0)
+
+    tank, turret = make_sinks(args.sink)
+    report = {
+        "trace": trace,
+        "events": len(read_trace(trace)),
+        "sink": args.sink,
+        "calls": bench_calls(trace, tank, turret),
+    }
+    tank, turret = make_sinks(args.sink)
+    report["loop"] = asyncio.run(bench_loop(trace, tank, turret, args.speed))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for section in ("calls", "loop"):
+        print(f"[{section}]")
+        for key, value in report[section].items():
+            print(f"  {key:24} {value}")
+
+
+if __name__ == "__main__":
+    main()
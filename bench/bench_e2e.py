@@ -0,0 +1,262 @@
+# 入力 → アクチュエータ の端から端までのベンチマーク
+# 入力トレースを再生する PS4Controller (ReplayController) → control_loop
+#   → TankDriveSystem / TurretController (gpiozero + PiGPIOFactory) → pigpio クライアント
+#   → pigpiod の代役 (sim.fake_pigpiod, 同じプロセスの別スレッド)
+# をつないで、段ごとの遅延 (p50/p95/p99) とティックあたりの CPU を測る。
+#
+# シナリオ
+#   idle         制御だけ
+#   viewers-N    別プロセスで N 人ぶんの MJPEG 配信を回しながら (Web側の負荷)
+#   reload       制御ループの中で設定ファイルを定期的に読み直しながら
+#
+# gpiozero と pigpio (pigpio-master/pigpio.py) が import できること。
+#   PYTHONPATH=pigpio-master python -m bench.bench_e2e --out e2e.json
+#   PYTHONPATH=pigpio-master python -m bench.bench_e2e --latency-us 300 --cpu 0   # Zero 相当: 1コア
+
+import argparse
+import asyncio
+import bisect
+import json
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+
+import yaml
+
+from bench.bench_camera import commit
+from bench.bench_control import percentile
+from core.control import CONTROL_PERIOD, control_loop
+from core.state import StateBlock
+from drivers.controller import EV_SYN
+from drivers.input_trace import ReplayController, synthesize
+from sim.fake_pigpiod import PI_CMD_HP, PI_CMD_PWM, PI_CMD_SERVO, run_in_thread
+
+CONFIG = "config/config.yaml"
+DRIVE_CMDS = (PI_CMD_PWM, PI_CMD_SERVO, PI_CMD_HP)
+
+
+class Timed:
+    """drive / set_turret の呼び出し開始・終了時刻を記録する薄いラッパ"""
+
+    def __init__(self, target, method):
+        self.target = target
+        self.starts = []
+        self.ends = []
+        call = getattr(target, method)
+
+        def timed(*args, **kwargs):
+            self.starts.append(time.perf_counter())
+            call(*args, **kwargs)
+            self.ends.append(time.perf_counter())
+        setattr(self, method, timed)
+
+    def __getattr__(self, name):
+        return getattr(self.target, name)
+
+    def reset(self):
+        self.starts.clear()
+        self.ends.clear()
+
+
+def stage(values):
+    return {
+        "p50_ms": round(percentile(values, 0.50), 3),
+        "p95_ms": round(percentile(values, 0.95), 3),
+        "p99_ms": round(percentile(values, 0.99), 3),
+    }
+
+
+def first_after(times, t):
+    i = bisect.bisect_left(times, t)
+    return times[i] if i < len(times) else None
+
+
+# --- Web側の負荷 (別プロセス) ---
+def _stream_load(viewers, fps, stop):
+    """合成カメラ + viewers 人の multipart 書き込み (ソケットペア経由でカーネルコピーまで)"""
+    from drivers.camera import Camera
+    from drivers.capture import SyntheticSource, jpeg_frames
+
+    async def run():
+        camera = Camera(source=SyntheticSource(jpeg_frames(), fps=fps))
+        await camera.start()
+
+        async def viewer():
+            a, b = socket.socketpair()
+            _, writer = await asyncio.open_connection(sock=a)
+            reader, _ = await asyncio.open_connection(sock=b)
+            drain = asyncio.create_task(reader.read(1 << 30))
+            async for jpg in camera.frames():
+                writer.write(f'--frame\r\nContent-Type: image/jpeg\r\n'
+                             f'Content-Length: {len(jpg)}\r\n\r\n'.encode())
+                writer.write(jpg)
+                writer.write(b'\r\n')
+                await writer.drain()
+            drain.cancel()
+
+        tasks = [asyncio.create_task(viewer()) for _ in range(viewers)]
+        while not stop.is_set():
+            await asyncio.sleep(0.1)
+        await camera.stop()
+        for t in tasks:
+            t.cancel()
+
+    asyncio.run(run())
+
+
+async def _reload_config(tank, turret, interval, stalls):
+    """設定の再読み込み: ファイルを読んで走行・砲塔の設定を差し替える (イベントループ上でブロックする)"""
+    while True:
+        await asyncio.sleep(interval)
+        t0 = time.perf_counter()
+        with open(CONFIG) as f:
+            config = yaml.safe_load(f)
+        tank.target.config = config
+        turret.target.config = config['turret_system']
+        stalls.append((time.perf_counter() - t0) * 1000.0)
+
+
+async def run_scenario(name, trace, tank, turret, daemon_log, viewers=0, reload_interval=None):
+    tank.reset()
+    turret.reset()
+    daemon_log.clear()
+    state = StateBlock(f"panzer_e2e_{os.getpid()}")
+    controller = ReplayController(trace)
+    reports = []
+    controller.on_event = lambda ev: reports.append(time.perf_counter()) if ev.type == EV_SYN else None
+
+    load = stop = None
+    if viewers:
+        ctx = multiprocessing.get_context("fork")
+        stop = ctx.Event()
+        load = ctx.Process(target=_stream_load, args=(viewers, 10, stop), daemon=True)
+        load.start()
+
+    stalls = []
+    tasks = [asyncio.create_task(control_loop(tank, turret, controller, state))]
+    if reload_interval:
+        tasks.append(asyncio.create_task(_reload_config(tank, turret, reload_interval, stalls)))
+
+    thread_cpu, process_cpu = time.thread_time(), time.process_time()
+    await controller.listen()
+    thread_cpu = time.thread_time() - thread_cpu
+    process_cpu = time.process_time() - process_cpu
+    for t in tasks:
+        t.cancel()
+    snap = state.snapshot()
+    state.close()
+    if load:
+        stop.set()
+        load.join(timeout=5)
+
+    # 段ごとの遅延: 入力レポート → drive() 開始 → pigpiod 受信 → drive() 終了
+    # pigpio では drive() は batch に積むだけで、送るのはティックの出力をまとめ終えてから
+    # (core.control.OutputWriter) なので、受信が drive() の後になる。終わりは遅い方を取る。
+    drive_cmds = sorted(t for t, cmd, gpio in daemon_log if cmd in DRIVE_CMDS and gpio in tank.gpios)
+    wait, to_daemon, call, total = [], [], [], []
+    for t in reports:
+        i = bisect.bisect_left(tank.starts, t)
+        if i >= len(tank.ends):
+            continue
+        start, end = tank.starts[i], tank.ends[i]
+        wait.append((start - t) * 1000.0)
+        call.append((end - start) * 1000.0)
+        received = first_after(drive_cmds, start)
+        if received is not None and received - start < CONTROL_PERIOD:
+            to_daemon.append((received - start) * 1000.0)
+            end = max(end, received)
+        total.append((end - t) * 1000.0)
+    turret_calls = [(e - s) * 1000.0 for s, e in zip(turret.starts, turret.ends)]
+
+    ticks = len(tank.starts)     # 共有状態の tick_count は1秒ごとの更新なので使わない
+    result = {
+        "scenario": name,
+        "reports": len(reports),
+        "ticks": ticks,
+        "input_to_tick": stage(wait),
+        "tick_to_daemon": stage(to_daemon),
+        "drive_call": stage(call),
+        "set_turret_call": stage(turret_calls),
+        "input_to_actuator": stage(total),
+        "tick_lateness_p99_ms": round(snap.tick_p99, 3),
+        "cpu_per_tick_us": round(thread_cpu / ticks * 1e6, 1) if ticks else 0,
+        "process_cpu_per_tick_us": round(process_cpu / ticks * 1e6, 1) if ticks else 0,
+    }
+    if reload_interval:
+        result["reload"] = {"count": len(stalls), **stage(stalls)}
+    return result
+
+
+async def run(args, trace):
+    from gpiozero.pins.pigpio import PiGPIOFactory
+    from drivers.motor_driver import TankDriveSystem
+    from drivers.servo_driver import TurretController
+
+    daemon, port = run_in_thread(latency_us=args.latency_us)
+    daemon_log = []
+    daemon.on_command = lambda cmd, p1, p2, t: daemon_log.append((t, cmd, p1))
+
+    factory = PiGPIOFactory(host="127.0.0.1", port=port)
+    with open(CONFIG) as f:
+        config = yaml.safe_load(f)
+    tank = Timed(TankDriveSystem(CONFIG, pin_factory=factory), "drive")
+    tank.gpios = {m[k] for m in (config['drive_system']['motor_left'], config['drive_system']['motor_right'])
+                  for k in ("pin_forward", "pin_backward")}
+    turret = Timed(TurretController(config['turret_system'], pin_factory=factory), "set_turret")
+
+    scenarios = [("idle", {})]
+    scenarios += [(f"viewers-{n}", {"viewers": n}) for n in args.viewers]
+    scenarios += [("reload", {"reload_interval": args.reload_interval})]
+    results = []
+    try:
+        for name, opts in scenarios:
+            if args.only and name not in args.only:
+                continue
+            results.append(await run_scenario(name, trace, tank, turret, daemon_log, **opts))
+            print(f"{name}: input→actuator p99 {results[-1]['input_to_actuator']['p99_ms']} ms",
+                  flush=True)
+    finally:
+        tank.stop()
+        factory.close()
+    return {
+        "commit": commit(),
+        "trace": trace,
+        "daemon_latency_us": args.latency_us,
+        "cpu_affinity": sorted(os.sched_getaffinity(0)),
+        "command_stats": daemon.stats.table(),
+        "scenarios": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="end-to-end input to actuator latency")
+    parser.add_argument("--trace", help="input trace (default: synthetic)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="length of the synthetic trace")
+    parser.add_argument("--latency-us", type=float, default=0, help="extra per-command delay in the daemon")
+    parser.add_argument("--viewers", type=int, nargs="*", default=[1, 3, 5])
+    parser.add_argument("--reload-interval", type=float, default=1.0)
+    parser.add_argument("--only", nargs="+", help="run only these scenarios")
+    parser.add_argument("--cpu", type=int, nargs="+", help="pin everything to these CPUs")
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    if args.cpu:
+        os.sched_setaffinity(0, args.cpu)
+    trace = args.trace
+    if not trace:
+        trace = os.path.join(tempfile.mkdtemp(), "synthetic.trace")
+        synthesize(trace, seconds=args.seconds)
+
+    report = asyncio.run(run(args, trace))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
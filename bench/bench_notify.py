@@ -0,0 +1,209 @@
+# 通知 (GPIO のエッジ報告) のデコード速度のベンチマーク
+# pigpiod の代役 (sim.fake_pigpiod) から組み立て済みのレポート列を一気に流し込み、
+# クライアント側 (pigpio.py の _callback_thread / pigpio_asyncio) がコールバックを
+# 呼び終えるまでの時間から events/sec を出す。
+# EXAMPLES/Python/PIGPIO_BENCHMARK/bench_1.py と同じ量を実機の PWM なしで測る。
+#
+#   PYTHONPATH=pigpio-master python -m bench.bench_notify
+#   PYTHONPATH=pigpio-master python -m bench.bench_notify --events 500000 --gpios 8 --json
+#   PYTHONPATH=pigpio-master python -m bench.bench_notify --client asyncio
+#   PYTHONPATH=pigpio-master python -m bench.bench_notify --idle 30     # gpio_status.py のように全ピンに登録
+#   PYTHONPATH=pigpio-master python -m bench.bench_notify --bulk         # pi.bulk_callback (受信ごとに配列で)
+#   PYTHONPATH=pigpio-master python -m bench.bench_notify --bulk --numpy --wide
+#   PYTHONPATH=pigpio-master python -m bench.bench_notify --slow-us 50 --queue 5000  # 重いコールバック (lost/overflowed を見る)
+#   PYTHONPATH=pigpio-master python -m bench.bench_notify --transport fifo   # パイプ通知 (NO, /dev/pigpioN 相当)
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from bench.bench_camera import commit
+from sim.fake_pigpiod import REPORT, run_in_thread
+
+FIRST_GPIO = 2
+TIMEOUT = 60.0
+USER_GPIOS = 32
+
+
+def build_reports(count, gpios):
+    """gpios を順番に反転させるレポート列 (1件 = エッジ1つ)"""
+    data = bytearray(count * REPORT.size)
+    level = 0
+    for i in range(count):
+        level ^= 1 << gpios[i % len(gpios)]
+        REPORT.pack_into(data, i * REPORT.size, i & 0xFFFF, 0, (i * 10) & 0xFFFFFFFF, level)
+    return bytes(data)
+
+
+def _idle(gpio, level, tick):
+    pass
+
+
+def thread_cpu(thread):
+    """スレッド1本の CPU 時間 (Linux のみ, 測れなければ None)"""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+    except (AttributeError, OSError):
+        return None
+
+
+def run_thread(daemon, port, data, expected, gpios, idle, bulk=None, slow=0.0, queue=None, fifo=False):
+    import pigpio
+    pi = pigpio.pi("127.0.0.1", port, notify_fifo=fifo) if fifo else pigpio.pi("127.0.0.1", port)
+    if fifo and pi._notify.fd is None:
+        raise SystemExit("notification pipe not opened")
+    if queue:
+        pi.set_notify_queue_size(queue)
+    calls = [0]
+
+    def cb(gpio, level, tick):
+        calls[0] += 1
+        if slow:
+            until = time.perf_counter() + slow
+            while time.perf_counter() < until:
+                pass
+
+    def bulk_cb(ticks, levels):
+        calls[0] += len(levels)
+
+    if bulk is None:
+        callbacks = [pi.callback(g, pigpio.EITHER_EDGE, cb) for g in gpios]
+    else:
+        callbacks = [pi.bulk_callback(gpios, bulk_cb, **bulk)]
+    callbacks += [pi.callback(g, pigpio.EITHER_EDGE, _idle) for g in idle]
+    reader = thread_cpu(pi._notify)
+    cpu = time.process_time()
+    start = time.perf_counter()
+    daemon.loop.call_soon_threadsafe(daemon.inject_reports, data)
+    while calls[0] < expected and time.perf_counter() - start < TIMEOUT:
+        if hasattr(pi, "notify_stats"):
+            received, lost, overflowed, queued, _ = pi.notify_stats()
+            if received + lost >= expected and not queued:
+                break   # 残りは落とされた分
+        time.sleep(0.0005)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    # 受信スレッドだけの CPU (トランスポートで変わるのはここ)
+    reader = None if reader is None else thread_cpu(pi._notify) - reader
+    stats = pi.notify_stats() if hasattr(pi, "notify_stats") else None
+    for c in callbacks:
+        c.cancel()
+    pi.stop()
+    return calls[0], elapsed, cpu, stats, reader
+
+
+async def run_asyncio(daemon, port, data, expected, gpios, idle):
+    import pigpio
+    import pigpio_asyncio
+    pi = await pigpio_asyncio.connect("127.0.0.1", port)
+    calls = [0]
+    done = asyncio.get_running_loop().create_future()
+
+    def cb(gpio, level, tick):
+        calls[0] += 1
+        if calls[0] >= expected and not done.done():
+            done.set_result(None)
+
+    callbacks = [await pi.callback(g, pigpio.EITHER_EDGE, cb) for g in gpios]
+    callbacks += [await pi.callback(g, pigpio.EITHER_EDGE, _idle) for g in idle]
+    cpu = time.process_time()
+    start = time.perf_counter()
+    daemon.loop.call_soon_threadsafe(daemon.inject_reports, data)
+    try:
+        await asyncio.wait_for(done, TIMEOUT)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    for c in callbacks:
+        await c.cancel()
+    await pi.stop()
+    return calls[0], elapsed, cpu, None, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="notification decode throughput (events/sec)")
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--gpios", type=int, default=1, help="GPIOs with a callback (edges rotate over them)")
+    parser.add_argument("--idle", type=int, default=0,
+                        help="extra callbacks on GPIOs that never change")
+    parser.add_argument("--client", choices=("thread", "asyncio"), default="thread")
+    parser.add_argument("--bulk", action="store_true", help="one pi.bulk_callback instead of per-edge callbacks")
+    parser.add_argument("--numpy", action="store_true", help="bulk delivery as NumPy arrays")
+    parser.add_argument("--wide", action="store_true", help="bulk delivery with 64-bit ticks")
+    parser.add_argument("--slow-us", type=float, default=0.0, help="busy time per callback (µs)")
+    parser.add_argument("--queue", type=int, default=None,
+                        help="pi.set_notify_queue_size (reports, default --events so nothing overflows)")
+    parser.add_argument("--transport", choices=("socket", "fifo"), default="socket",
+                        help="thread client notifications over a second socket or a pipe")
+    parser.add_argument("--repeat", type=int, default=3, help="runs (best is reported)")
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+    bulk = None
+    if args.bulk:
+        if args.client != "thread":
+            parser.error("--bulk is only available with --client thread")
+        bulk = {"use_numpy": args.numpy, "wide_ticks": args.wide}
+
+    gpios = list(range(FIRST_GPIO, FIRST_GPIO + args.gpios))
+    others = [g for g in range(USER_GPIOS) if g not in gpios]
+    idle = [others[i % len(others)] for i in range(args.idle)]
+    data = build_reports(args.events, gpios)
+    fifo = args.transport == "fifo"
+    if fifo:
+        if args.client != "thread":
+            parser.error("--transport fifo is only available with --client thread")
+        prefix = os.path.join(tempfile.mkdtemp(prefix="fake-pigpiod-"), "pigpio")
+        os.environ["PIGPIO_FIFO"] = prefix
+        daemon, port = run_in_thread(fifo_prefix=prefix)
+    else:
+        daemon, port = run_in_thread()
+
+    runs = []
+    for _ in range(args.repeat):
+        if args.client == "thread":
+            received, elapsed, cpu, stats, reader = run_thread(
+                daemon, port, data, args.events, gpios, idle, bulk,
+                args.slow_us / 1e6, args.queue or args.events, fifo)
+        else:
+            received, elapsed, cpu, stats, reader = asyncio.run(run_asyncio(daemon, port, data, args.events, gpios, idle))
+        run = {
+            "received": received,
+            "elapsed_s": round(elapsed, 4),
+            "eps": round(received / elapsed),
+            "cpu_us_per_event": round(cpu / received * 1e6, 3) if received else None,
+            "reader_cpu_us_per_event": round(reader / received * 1e6, 3) if received and reader is not None else None,
+        }
+        if stats is not None:
+            run.update(zip(("reports", "lost", "overflowed", "queued", "max_queued"), stats))
+        runs.append(run)
+
+    best = max(runs, key=lambda r: r["eps"])
+    report = {
+        "commit": commit(),
+        "client": args.client,
+        "transport": args.transport,
+        "bulk": None if bulk is None else ("numpy" if args.numpy else "array") + ("+wide" if args.wide else ""),
+        "events": args.events,
+        "gpios": args.gpios,
+        "idle_callbacks": args.idle,
+        "slow_us": args.slow_us,
+        "eps": best["eps"],
+        "us_per_event": round(1e6 / best["eps"], 3) if best["eps"] else None,
+        "runs": runs,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for key, value in report.items():
+        if key != "runs":
+            print(f"  {key:16} {value}")
+    for r in runs:
+        print(f"  run: {r['received']} events in {r['elapsed_s']} s, cpu {r['cpu_us_per_event']} µs/event")
+
+
+if __name__ == "__main__":
+    main()
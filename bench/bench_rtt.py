@@ -0,0 +1,96 @@
+# コマンド1往復の時間のベンチマーク (TCP ループバック と Unix ソケット)
+# pigpiod の代役 (sim.fake_pigpiod) を TCP と Unix ソケットの両方で待ち受けさせ、
+# 同じコマンド (既定は TICK: 処理がほぼ空なので往復の時間がそのまま出る) を
+# 交互に1件ずつ投げて p50/p99 を比べる。実機の pigpiod では -u path で Unix ソケットを開く。
+#
+#   PYTHONPATH=pigpio-master python -m bench.bench_rtt
+#   PYTHONPATH=pigpio-master python -m bench.bench_rtt --count 20000 --json
+#   PYTHONPATH=pigpio-master python -m bench.bench_rtt --unix-path /var/run/pigpio.sock --host localhost  # 実機
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from bench.bench_camera import commit
+from core.control import TickStats
+from sim.fake_pigpiod import run_in_thread
+
+WARMUP = 200
+
+
+def measure(pi, count):
+    stats = TickStats(window=count)
+    cpu = time.process_time()
+    for _ in range(WARMUP):
+        pi.get_current_tick()
+    for _ in range(count):
+        start = time.perf_counter()
+        pi.get_current_tick()
+        stats.add(time.perf_counter() - start)
+    return stats, time.process_time() - cpu
+
+
+def fields(stats, cpu, count):
+    p50, p99, worst = stats.percentiles()
+    return {
+        "rtt_p50_us": round(p50 * 1e6, 1),
+        "rtt_p99_us": round(p99 * 1e6, 1),
+        "rtt_max_us": round(worst * 1e6, 1),
+        "cpu_us_per_command": round(cpu / (count + WARMUP) * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="command round trip: TCP loopback vs Unix domain socket")
+    parser.add_argument("--count", type=int, default=5000, help="commands per transport and round")
+    parser.add_argument("--rounds", type=int, default=3, help="alternating rounds (best p50 is reported)")
+    parser.add_argument("--host", default=None, help="real daemon host (default: in-process fake daemon)")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--unix-path", default=None, help="real daemon's Unix socket (pigpiod -u)")
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    import pigpio
+
+    if args.host is None:
+        unix_path = os.path.join(tempfile.mkdtemp(prefix="fake-pigpiod-"), "pigpio.sock")
+        _, port = run_in_thread(unix_path=unix_path)
+        host = "127.0.0.1"
+    else:
+        host, port, unix_path = args.host, args.port, args.unix_path
+        if not unix_path:
+            parser.error("--unix-path is required with --host")
+
+    # 通知の接続は使わないのでソケットのまま (FIFO を作らない)
+    clients = {
+        "tcp": pigpio.pi(host, port, notify_fifo=False),
+        "unix": pigpio.pi(unix_path=unix_path, notify_fifo=False),
+    }
+    best = {}
+    for _ in range(args.rounds):
+        for name, pi in clients.items():
+            row = fields(*measure(pi, args.count), args.count)
+            if name not in best or row["rtt_p50_us"] < best[name]["rtt_p50_us"]:
+                best[name] = row
+    for pi in clients.values():
+        pi.stop()
+
+    report = {
+        "commit": commit(),
+        "daemon": "fake" if args.host is None else f"{host}:{port}",
+        "count": args.count,
+        "tcp": best["tcp"],
+        "unix": best["unix"],
+        "p50_saving_us": round(best["tcp"]["rtt_p50_us"] - best["unix"]["rtt_p50_us"], 1),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for key, value in report.items():
+        print(f"  {key:16} {value}")
+
+
+if __name__ == "__main__":
+    main()
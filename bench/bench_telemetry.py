@@ -0,0 +1,96 @@
+# テレメトリ形式のベンチマーク: JSON vs バイナリ (core/telemetry.py)
+# 50Hz でプッシュした場合の 回線上のバイト数 と シリアライズCPU を比較する。
+#
+#   python -m bench.bench_telemetry
+#   python -m bench.bench_telemetry --rate 50 --clients 3 --json
+
+import argparse
+import json
+import time
+
+from core.state import Snapshot, FIELDS
+from core.telemetry import TelemetryEncoder, decode
+
+WS_HEADER = 2   # サーバー→クライアントのWebSocketフレームヘッダ (126バイト未満)
+
+
+def _snapshots(n):
+    """それらしく変化する状態を n 個"""
+    base = dict.fromkeys(FIELDS, 0)
+    out = []
+    for i in range(n):
+        base.update(
+            updated=i * 0.02, speed=(i % 100) / 100.0, pan=(i % 180) - 90.0,
+            tilt=(i % 60) - 20.0, machinegun=(i // 50) % 2, link_up=1,
+            fire_seq=i // 25, mg_seq=i // 100, input_events=i * 3,
+            input_age=4.0, tick_p99=1.7
+        )
+        out.append(Snapshot(**base))
+    return out
+
+
+def _json_message(snap):
+    # 以前の /ws (send_json) と同じ内容 + リンク情報
+    return json.dumps({
+        "speed": snap.speed, "pan": snap.pan, "tilt": snap.tilt,
+        "machinegun": bool(snap.machinegun), "link_up": bool(snap.link_up),
+        "fire_seq": snap.fire_seq, "mg_seq": snap.mg_seq,
+        "input_age": snap.input_age, "link_drops": snap.link_drops,
+        "tick_p99": snap.tick_p99
+    }).encode()
+
+
+def _cpu(fn, items):
+    start = time.process_time()
+    for item in items:
+        fn(item)
+    return (time.process_time() - start) / len(items)
+
+
+def run(rate, clients, count):
+    snaps = _snapshots(count)
+    encoder = TelemetryEncoder()
+
+    json_msgs = [_json_message(s) for s in snaps]
+    bin_msgs = [bytes(encoder.encode(s)) for s in snaps]
+
+    results = {}
+    for name, enc, dec, msgs in (
+        ("json", _json_message, json.loads, json_msgs),
+        ("binary", encoder.encode, decode, bin_msgs),
+    ):
+        size = sum(len(m) for m in msgs) / len(msgs) + WS_HEADER
+        enc_s = _cpu(enc, snaps)
+        dec_s = _cpu(dec, msgs)
+        results[name] = {
+            "bytes_per_msg": round(size, 1),
+            "bytes_per_sec": round(size * rate * clients),
+            "encode_us": round(enc_s * 1e6, 2),
+            "decode_us": round(dec_s * 1e6, 2),
+            "encode_cpu_pct": round(enc_s * rate * clients * 100, 4),
+        }
+    return {"rate_hz": rate, "clients": clients, "messages": count, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON vs binary telemetry benchmark")
+    parser.add_argument("--rate", type=float, default=50.0, help="push rate per client (Hz)")
+    parser.add_argument("--clients", type=int, default=1)
+    parser.add_argument("--count", type=int, default=50000, help="messages to time")
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    report = run(args.rate, args.clients, args.count)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.clients} client(s) @ {args.rate:g} Hz")
+    print(f"{'format':8} {'B/msg':>7} {'B/s':>9} {'enc us':>8} {'dec us':>8} {'enc CPU%':>9}")
+    for name, r in report["results"].items():
+        print(f"{name:8} {r['bytes_per_msg']:7} {r['bytes_per_sec']:9} "
+              f"{r['encode_us']:8} {r['decode_us']:8} {r['encode_cpu_pct']:9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# 視聴者数の負荷試験 (Webサーバーに対する HTTP 負荷生成)
+# N 本の /stream と M 本の /status ポーリングを同時に張り、視聴者数ごとに
+#   配信 fps (平均・最小), フレーム遅延 (X-Timestamp からの経過),
+#   状態の鮮度 (/status の age_ms + 往復時間の半分), サーバーの CPU・RSS
+# を測って容量曲線を出す。フレーム遅延は同じホスト (または時計を合わせたホスト) でのみ正確。
+#
+#   python -m bench.bench_viewers --spawn                       # main.py を合成カメラ・合成入力で起動して測る
+#   python -m bench.bench_viewers --pid $(pgrep -of 'python.*main.py')   # 同じホストで動いているサーバー
+#   python -m bench.bench_viewers --spawn --viewers 1 2 4 8 16 --throttle-kbps 256 --json
+#   python -m bench.bench_viewers --url http://127.0.0.1:8090 --stream-path /stream/0 --pid $(pgrep -of hub.py)
+#       # 観戦ハブ (hub.py) 経由。ノード側の /metrics で接続数が増えないことも見る
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.bench_camera import commit
+from bench.bench_control import percentile
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+PAGE_KB = os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+# --- サーバープロセスの計測 (/proc) ---
+def proc_cpu(pid):
+    """utime + stime (秒)"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLK_TCK
+
+
+def proc_rss_kb(pid):
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * PAGE_KB
+
+
+def child_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+# --- クライアント ---
+class StreamClient:
+    """/stream (multipart MJPEG) を読み、フレームごとの到着時刻と遅延を記録"""
+
+    def __init__(self, session, url, throttle=None):
+        self.session = session
+        self.url = url
+        self.throttle = throttle        # バイト/秒 (None = 制限なし)
+        self.frames = 0
+        self.ages = []
+        self.bytes = 0
+        self.error = None
+
+    async def run(self):
+        try:
+            async with self.session.get(self.url) as resp:
+                content = resp.content
+                while True:
+                    length, stamp = await self._part_headers(content)
+                    if length is None:
+                        break
+                    await self._read_body(content, length)
+                    if stamp:
+                        self.ages.append((time.time() - stamp) * 1000.0)
+                    self.frames += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = repr(e)
+
+    async def _part_headers(self, content):
+        length = stamp = None
+        while True:
+            line = await content.readline()
+            if not line:
+                return None, None
+            line = line.strip()
+            if not line:
+                if length is not None:
+                    return length, stamp
+                continue        # 境界の前の空行
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "x-timestamp":
+                stamp = float(value)
+
+    async def _read_body(self, content, length):
+        if not self.throttle:
+            await content.readexactly(length)
+            self.bytes += length
+            return
+        # 帯域制限: 少しずつ読んで、読んだ量に見合う時間だけ待つ (TCP のウィンドウが詰まる)
+        chunk = max(1024, int(self.throttle / 20))
+        remaining = length
+        while remaining:
+            n = min(chunk, remaining)
+            await content.readexactly(n)
+            remaining -= n
+            self.bytes += n
+            await asyncio.sleep(n / self.throttle)
+
+
+class StatusClient:
+    """/status をポーリングし、状態の鮮度 (サーバー側の経過 + 片道) を記録"""
+
+    def __init__(self, session, url, interval):
+        self.session = session
+        self.url = url
+        self.interval = interval
+        self.staleness = []
+        self.rtts = []
+        self.error = None
+
+    async def run(self):
+        try:
+            while True:
+                t0 = time.perf_counter()
+                async with self.session.get(self.url) as resp:
+                    data = await resp.json()
+                rtt = (time.perf_counter() - t0) * 1000.0
+                self.rtts.append(rtt)
+                if data.get("age_ms") is not None:
+                    self.staleness.append(data["age_ms"] + rtt / 2)
+                await asyncio.sleep(max(0.0, self.interval - rtt / 1000.0))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = repr(e)
+
+
+async def measure(url, viewers, status_clients, seconds, throttle, status_interval, pid,
+                  stream_path="/stream"):
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=10)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        streams = [StreamClient(session, url + stream_path, throttle) for _ in range(viewers)]
+        statuses = [StatusClient(session, url + "/status", status_interval)
+                    for _ in range(status_clients)]
+        tasks = [asyncio.create_task(c.run()) for c in streams + statuses]
+
+        # 接続が揃うまで待ってから計測を始める
+        await asyncio.sleep(1.0)
+        for c in streams:
+            c.frames, c.ages, c.bytes = 0, [], 0
+        for c in statuses:
+            c.staleness, c.rtts = [], []
+        servers = [pid] + child_pids(pid) if pid else []
+        cpu0 = [proc_cpu(p) for p in servers]
+        await asyncio.sleep(seconds)
+        cpu = [proc_cpu(p) - c for p, c in zip(servers, cpu0)]
+        rss = [proc_rss_kb(p) for p in servers]
+
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    fps = [c.frames / seconds for c in streams]
+    ages = [a for c in streams for a in c.ages]
+    stale = [s for c in statuses for s in c.staleness]
+    row = {
+        "viewers": viewers,
+        "fps_mean": round(sum(fps) / len(fps), 2) if fps else 0,
+        "fps_min": round(min(fps), 2) if fps else 0,
+        "kbps_per_viewer": round(sum(c.bytes for c in streams) / len(streams) / seconds * 8 / 1000, 1) if streams else 0,
+        "frame_age_p50_ms": round(percentile(ages, 0.50), 1),
+        "frame_age_p99_ms": round(percentile(ages, 0.99), 1),
+        "status_staleness_p50_ms": round(percentile(stale, 0.50), 1),
+        "status_staleness_p99_ms": round(percentile(stale, 0.99), 1),
+        "errors": sum(1 for c in streams + statuses if c.error),
+    }
+    if servers:
+        row["web_cpu_pct"] = round(cpu[0] / seconds * 100, 1)
+        row["web_rss_mb"] = round(rss[0] / 1024, 1)
+        row["control_cpu_pct"] = round(sum(cpu[1:]) / seconds * 100, 1)
+    return row
+
+
+def capacity(rows, target_fps, max_age_ms):
+    """fps を落とさず、フレーム遅延も上限内に収まる最大の視聴者数"""
+    ok = [r["viewers"] for r in rows
+          if r["fps_min"] >= target_fps * 0.9 and r["frame_age_p99_ms"] <= max_age_ms and not r["errors"]]
+    return max(ok) if ok else 0
+
+
+async def wait_for_server(url, proc, timeout=30.0):
+    import aiohttp
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if proc and proc.poll() is not None:
+                raise SystemExit(f"server exited ({proc.returncode})")
+            try:
+                async with session.get(url + "/status") as resp:
+                    if resp.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.5)
+    raise SystemExit(f"{url} did not come up")
+
+
+def spawn_server():
+    """main.py を合成カメラ・合成入力トレース・pigpiod の代役で起動 (実機不要)"""
+    from drivers.input_trace import synthesize
+    from sim.fake_pigpiod import run_in_thread
+    trace = os.path.join(tempfile.mkdtemp(), "load.trace")
+    synthesize(trace, seconds=60.0)
+    _, port = run_in_thread()
+    env = dict(os.environ, GPIOZERO_PIN_FACTORY="pigpio", PIGPIO_ADDR="127.0.0.1", PIGPIO_PORT=str(port))
+    return subprocess.Popen([sys.executable, "main.py", "--synthetic-camera", "--replay-input", trace],
+                            stdout=subprocess.DEVNULL, env=env)
+
+
+async def run(args):
+    proc = spawn_server() if args.spawn else None
+    pid = proc.pid if proc else None
+    if args.pid:
+        pid = args.pid
+    try:
+        await wait_for_server(args.url, proc)
+        rows = []
+        for n in args.viewers:
+            row = await measure(args.url, n, args.status, args.seconds,
+                                args.throttle_kbps * 125 if args.throttle_kbps else None,
+                                args.status_interval, pid, args.stream_path)
+            rows.append(row)
+            if not args.json:
+                print("  ".join(f"{k}={v}" for k, v in row.items()), flush=True)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    return {
+        "commit": commit(),
+        "url": args.url,
+        "throttle_kbps": args.throttle_kbps,
+        "status_clients": args.status,
+        "curve": rows,
+        "capacity": capacity(rows, args.target_fps, args.max_age_ms),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="multi-viewer load test for the web server")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--stream-path", default="/stream", help="MJPEG path (/stream/<n> on the fleet hub)")
+    parser.add_argument("--spawn", action="store_true", help="start main.py with a synthetic camera")
+    parser.add_argument("--pid", type=int, help="server pid on this host (for CPU/RSS) when not spawned here")
+    parser.add_argument("--viewers", type=int, nargs="+", default=[1, 2, 4, 8, 12, 16])
+    parser.add_argument("--status", type=int, default=2, help="concurrent /status pollers")
+    parser.add_argument("--status-interval", type=float, default=0.2, help="seconds between polls")
+    parser.add_argument("--throttle-kbps", type=float, help="per-viewer bandwidth limit")
+    parser.add_argument("--seconds", type=float, default=10.0, help="measurement time per step")
+    parser.add_argument("--target-fps", type=float, default=10.0, help="camera fps for the capacity cut-off")
+    parser.add_argument("--max-age-ms", type=float, default=250.0, help="frame age limit for the capacity cut-off")
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"capacity: {report['capacity']} viewers "
+              f"(fps >= {args.target_fps * 0.9:g}, frame age p99 <= {args.max_age_ms:g} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# wait_for_edge の起床遅延のベンチマーク
+# pigpiod の代役 (sim.fake_pigpiod) の入力を反転させ、レポートを書いた時刻から
+# 待っている側が戻るまでの時間を測る。ハンドシェイク (要求を出して応答のエッジを待つ) の
+# 1往復にこれが乗る。
+#
+#   call     pi.wait_for_edge() を毎回呼ぶ (呼ぶたびにコールバックの登録と解除)
+#   waiter   pi.edge_waiter() を1つ作って wait() を繰り返す
+#   asyncio  pigpio_asyncio の edge_waiter を await する
+#
+#   PYTHONPATH=pigpio-master python -m bench.bench_wakeup
+#   PYTHONPATH=pigpio-master python -m bench.bench_wakeup --mode call --samples 50 --json
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+
+from bench.bench_camera import commit
+from core.control import TickStats
+from sim.fake_pigpiod import run_in_thread
+
+GPIO = 4
+ARM_DELAY = 0.02        # call: wait_for_edge が NB を送り終えるまで待ってから反転する (秒)
+JITTER = (0.001, 0.005) # waiter/asyncio: 反転までの間隔 (秒)
+WAIT_TIMEOUT = 1.0
+
+
+class Toggler:
+    """代役のループのスレッドで入力を反転させ、その時刻を残す"""
+
+    def __init__(self, daemon):
+        self.daemon = daemon
+        self.level = 0
+        self.stamp = None
+
+    def _toggle(self):
+        self.level ^= 1
+        self.stamp = time.perf_counter()
+        self.daemon.set_input(GPIO, self.level)
+
+    def toggle(self):
+        self.daemon.loop.call_soon_threadsafe(self._toggle)
+
+    def toggle_later(self, delay):
+        timer = threading.Timer(delay, self.toggle)
+        timer.start()
+        return timer
+
+
+def run_call(daemon, port, samples):
+    import pigpio
+    pi = pigpio.pi("127.0.0.1", port)
+    toggler = Toggler(daemon)
+    stats, missed = TickStats(), 0
+    for _ in range(samples):
+        timer = toggler.toggle_later(ARM_DELAY)
+        if pi.wait_for_edge(GPIO, pigpio.EITHER_EDGE, WAIT_TIMEOUT):
+            stats.add(time.perf_counter() - toggler.stamp)
+        else:
+            missed += 1
+        timer.join()
+    pi.stop()
+    return stats, missed
+
+
+def run_waiter(daemon, port, samples):
+    import pigpio
+    pi = pigpio.pi("127.0.0.1", port)
+    toggler = Toggler(daemon)
+    waiter = pi.edge_waiter(GPIO, pigpio.EITHER_EDGE)
+    stats, missed = TickStats(), 0
+    for _ in range(samples):
+        timer = toggler.toggle_later(random.uniform(*JITTER))
+        if waiter.wait(WAIT_TIMEOUT) is not None:
+            stats.add(time.perf_counter() - toggler.stamp)
+        else:
+            missed += 1
+        timer.join()
+    waiter.cancel()
+    pi.stop()
+    return stats, missed
+
+
+async def run_asyncio(daemon, port, samples):
+    import pigpio
+    import pigpio_asyncio
+    pi = await pigpio_asyncio.connect("127.0.0.1", port)
+    toggler = Toggler(daemon)
+    waiter = await pi.edge_waiter(GPIO, pigpio.EITHER_EDGE)
+    stats, missed = TickStats(), 0
+    for _ in range(samples):
+        timer = toggler.toggle_later(random.uniform(*JITTER))
+        if await waiter.wait(WAIT_TIMEOUT) is not None:
+            stats.add(time.perf_counter() - toggler.stamp)
+        else:
+            missed += 1
+        timer.join()
+    await waiter.cancel()
+    await pi.stop()
+    return stats, missed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="wait_for_edge wakeup latency")
+    parser.add_argument("--mode", choices=("call", "waiter", "asyncio"), default="waiter")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    daemon, port = run_in_thread()
+    if args.mode == "call":
+        stats, missed = run_call(daemon, port, args.samples)
+    elif args.mode == "waiter":
+        stats, missed = run_waiter(daemon, port, args.samples)
+    else:
+        stats, missed = asyncio.run(run_asyncio(daemon, port, args.samples))
+
+    p50, p99, worst = stats.percentiles()
+    report = {
+        "commit": commit(),
+        "mode": args.mode,
+        "samples": args.samples,
+        "missed": missed,
+        "wakeup_p50_us": round(p50 * 1e6, 1),
+        "wakeup_p99_us": round(p99 * 1e6, 1),
+        "wakeup_max_us": round(worst * 1e6, 1),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for key, value in report.items():
+        print(f"  {key:16} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+# 制御プロセス
+# コントローラ入力 → 走行・砲塔への経路をWebサーバーから切り離し、
+# 専用プロセス (可能なら SCHED_FIFO) で動かす。
+# Web側とは core.state.StateBlock (共有メモリ + seqlock) だけでやり取りする。
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from array import array
+
+CONTROL_PERIOD = 0.05   # 20Hz制御
+RT_PRIORITY = 50        # SCHED_FIFO 優先度 (1〜99)
+STATS_WINDOW = 200      # 遅延統計のサンプル数 (約10秒分)
+READY_TIMEOUT = 10.0    # Web起動待ちの上限 (秒)
+STOP_TIMEOUT = 3.0      # 制御プロセスの後始末 (停止指令・見張りスクリプトの削除) を待つ上限 (秒)
+
+
+class TickStats:
+    """制御ティック遅延 (予定時刻 → 出力完了) をリングバッファで集計"""
+
+    def __init__(self, window=STATS_WINDOW):
+        self.samples = array('d', [0.0] * window)
+        self.window = window
+        self.count = 0
+
+    def add(self, latency):
+        self.samples[self.count % self.window] = latency
+        self.count += 1
+
+    def percentiles(self):
+        n = min(self.count, self.window)
+        if n == 0:
+            return 0.0, 0.0, 0.0
+        s = sorted(self.samples[:n])
+        return s[n // 2], s[min(n - 1, int(n * 0.99))], s[-1]
+
+    def fields(self):
+        """共有状態に載せる値 (ms)"""
+        p50, p99, worst = self.percentiles()
+        return {
+            "tick_count": self.count,
+            "tick_p50": p50 * 1000.0,
+            "tick_p99": p99 * 1000.0,
+            "tick_max": worst * 1000.0,
+        }
+
+
+def set_realtime_priority(priority=RT_PRIORITY):
+    """SCHED_FIFOに昇格 (権限がなければ通常優先度のまま続行)"""
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+        print(f"Control: SCHED_FIFO priority {priority}")
+        return True
+    except (AttributeError, PermissionError, OSError) as e:
+        print(f"Control: realtime priority unavailable ({e})")
+        return False
+
+
+class OutputWriter:
+    """1ティック分の GPIO 出力 (走行・砲塔・pigpiod の見張りへのハートビート) を書く
+
+    どれも同じ pigpio 接続なら pi.batch() に積んで1回のソケット往復で送る。
+    pigpiod が PI_CMD_BATCH を知っていれば pi.exec_batch() にして、走行4本と砲塔2本を
+    1つの要求として pigpiod に続けて実行させる (ハートビートは拡張データ付きなのでその後ろに並ぶ)。
+    通常は hw スレッドで書くが、aio (pigpio_asyncio.pi, 同じ pigpiod への asyncio 接続) を
+    渡すとイベントループ上で直接書く (スレッドを通らず、返事を待つ間もループは止まらない)。
+    未実行の分は submit のたびに最新の値で置き換える。砲塔角度は書くまで持っておくので、
+    置き換えられても動きは取りこぼさない。
+    """
+
+    def __init__(self, tank, turret, watchdog=None, aio=None):
+        self.tank = tank
+        self.turret = turret
+        self.watchdog = watchdog            # core.failsafe.PigpioWatchdog
+        pi = getattr(tank, 'pi', None)
+        self.pi = pi if pi is not None and getattr(turret, 'pi', None) is pi else None
+        self.aio = aio if self.pi is not None else None
+        self.exec_batch = False
+        if self.pi is not None:
+            from drivers.pigpio_out import server_batch
+            self.exec_batch = server_batch(self.pi)     # 結果はドライバの初期化時に調べたもの
+        self._lock = threading.Lock()
+        self._drive = (0, 0)
+        self._turret = None
+        self._heartbeat = False
+        self._dirty = False
+        self._writing = None                # aio: 書き込み中のタスク
+
+    def submit(self, throttle, turn, turret=None, heartbeat=False):
+        with self._lock:
+            self._drive = (throttle, turn)
+            if turret is not None:
+                self._turret = turret
+            self._heartbeat = self._heartbeat or heartbeat
+            self._dirty = True
+        if self.aio is not None:
+            # 返事待ちの書き込みがあれば、それが終わってから最新の値で書く
+            if self._writing is None or self._writing.done():
+                self._writing = asyncio.ensure_future(self._flush_async())
+            return
+        from core.runtime import hw
+        hw().submit_latest("outputs", self.flush)
+
+    def _take(self):
+        with self._lock:
+            drive, turret, heartbeat = self._drive, self._turret, self._heartbeat
+            self._turret, self._heartbeat, self._dirty = None, False, False
+        return drive, turret, heartbeat and self.watchdog is not None
+
+    def _write(self, b, drive, turret, heartbeat):
+        self.tank.drive(*drive, batch=b)
+        if turret is not None:
+            self.turret.set_turret(*turret, batch=b)
+        if heartbeat:
+            self.watchdog.heartbeat(b if self.watchdog.pi is self.pi else None)
+
+    def flush(self):
+        drive, turret, heartbeat = self._take()
+        if self.pi is None:
+            self.tank.drive(*drive)
+            if turret is not None:
+                self.turret.set_turret(*turret)
+            if heartbeat:
+                self.watchdog.heartbeat()
+            return
+
+        with (self.pi.exec_batch() if self.exec_batch else self.pi.batch()) as b:
+            self._write(b, drive, turret, heartbeat)
+
+    async def _flush_async(self):
+        while self._dirty:
+            drive, turret, heartbeat = self._take()
+            if heartbeat and self.watchdog.pi is not self.pi:
+                # 見張りが別の接続ならそちらはスレッドで
+                from core.runtime import hw
+                hw().submit_latest("heartbeat", self.watchdog.heartbeat)
+                heartbeat = False
+            try:
+                async with (self.aio.exec_batch() if self.exec_batch else self.aio.batch()) as b:
+                    self._write(b, drive, turret, heartbeat)
+            except Exception as e:
+                print(f"Ctrl Error: outputs: {e}")
+
+
+# --- 制御ループ (砲塔・走行) ---
+async def control_loop(tank, turret, controller, state, timeline=None, period=CONTROL_PERIOD,
+                       failsafe=None, monitor=None, outputs=None):
+    from core.runtime import hw
+    print("Control Logic Started")
+    if outputs is None:
+        outputs = OutputWriter(tank, turret, getattr(failsafe, 'watchdog', None))
+    pan_angle = 0
+    tilt_angle = 0
+    fire_seq = 0
+    mg_seq = 0
+    mg_on = False
+    stats = TickStats()
+    tick_fields = stats.fields()
+    last_publish = 0.0
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time()
+
+    while True:
+        try:
+            if not controller.state:
+                await asyncio.sleep(0.1)
+                deadline = loop.time()
+                continue
+
+            # 0. リンク断 (core/failsafe.py) なら入力を無視して中立にする
+            lost = failsafe is not None and failsafe.check()
+
+            # 1. 走行制御
+            thr = 0 if lost else controller.state.get('throttle', 0)
+            trn = 0 if lost else controller.state.get('turn', 0)
+
+            # 2. 砲塔制御 (相対移動 & 制限)
+            # 右スティック入力を取得
+            t_pan = controller.state.get('turret_pan', 0)   # 左右
+            t_tilt = controller.state.get('turret_tilt', 0) # 上下
+
+            aim = None
+            if not lost and (abs(t_pan) > 0.1 or abs(t_tilt) > 0.1):
+                # 入力がある場合だけ角度を更新 (感度調整: *3, *2)
+                pan_angle += t_pan * 3.0
+                tilt_angle += t_tilt * 2.0
+
+                # 角度制限 (サーボの限界に合わせて調整してください)
+                pan_angle = max(-90, min(90, pan_angle))
+                tilt_angle = max(-20, min(40, tilt_angle))
+                aim = (pan_angle, tilt_angle)
+
+            # GPIO への書き込みは pigpio のソケット往復なので hw スレッドへ (core/runtime.py)
+            # 走行・砲塔・ハートビートをまとめて1往復 (OutputWriter)
+            outputs.submit(thr, trn, aim, heartbeat=failsafe is not None)
+            if timeline and controller.connected:
+                timeline.once("time-to-drive")
+
+            # 3. 武装制御
+            # L2ボタンで機銃
+            l2 = -1.0 if lost else controller.state.get('l2', -1.0)
+            if (l2 > 0.1) and not mg_on:
+                mg_seq += 1
+            mg_on = l2 > 0.1
+
+            # R2または特定ボタンで主砲
+            if controller.state.get('fire') and not lost:
+                fire_seq += 1
+                asyncio.create_task(turret.fire_gun())
+                controller.state['fire'] = False
+
+            # 4. 遅延計測 (予定時刻からの遅れ + 処理時間)
+            now = loop.time()
+            stats.add(now - deadline)
+            if now - last_publish >= 1.0:
+                tick_fields = stats.fields()
+                hw_fields = hw().fields()
+                tick_fields.update(hw_wait_p99=hw_fields["wait_p99_ms"], hw_coalesced=hw_fields["coalesced"])
+                if monitor is not None:
+                    tick_fields.update(loop_stalls=monitor.stalls, loop_stall_max=monitor.worst)
+                last_publish = now
+
+            # 5. 共有状態へ1ティック分をまとめて公開
+            last_event = getattr(controller, 'last_event', 0.0)
+            state.update(
+                speed=max(abs(thr), abs(trn)),
+                pan=pan_angle,
+                tilt=tilt_angle,
+                machinegun=mg_on,
+                fire_seq=fire_seq,
+                mg_seq=mg_seq,
+                link_up=bool(getattr(controller, 'connected', True)),
+                input_events=getattr(controller, 'event_count', 0),
+                link_drops=getattr(controller, 'disconnects', 0),
+                input_age=(time.monotonic() - last_event) * 1000.0 if last_event else 0.0,
+                **tick_fields,
+                **(failsafe.fields() if failsafe is not None else {})
+            )
+
+            # 固定周期で次の予定時刻まで待つ (sleep(0.05)の累積ずれを防ぐ)
+            deadline += period
+            if deadline < now:
+                deadline = now
+            await asyncio.sleep(deadline - now)
+
+        except Exception as e:
+            print(f"Ctrl Error: {e}")
+            await asyncio.sleep(1)
+            deadline = loop.time()
+
+
+# --- ハードウェア生成 (重い import はここで初めて行う) ---
+def _make_pin_factory(config=None):
+    """モーターも pigpio (GPIOZERO_PIN_FACTORY=pigpio) なら、走行と砲塔で接続を1本にする
+
+    同じ接続なら1ティックの出力が1回の batch (1往復) で済む (OutputWriter)。
+    runtime.pigpio_unix_path があれば TCP ではなく pigpiod -u の Unix ソケットでつなぐ。
+    runtime.pigpio_notify_fifo なら、pigpiod が同じ機械にあるときエッジ通知を /dev/pigpioN のパイプで受ける。
+    """
+    if os.environ.get('GPIOZERO_PIN_FACTORY', '').lower() != 'pigpio':
+        return None
+    runtime = (config or {}).get('runtime', {})
+    # PiGPIOFactory は host/port しか渡さないので pigpio.pi には環境変数で伝える
+    unix_path = runtime.get('pigpio_unix_path')
+    if unix_path:
+        os.environ.setdefault('PIGPIO_UNIX_PATH', unix_path)
+    if runtime.get('pigpio_notify_fifo'):
+        os.environ.setdefault('PIGPIO_NOTIFY_FIFO', '1')
+    from gpiozero.pins.pigpio import PiGPIOFactory
+    return PiGPIOFactory()
+
+
+def _make_tank(factory=None):
+    from drivers.motor_driver import TankDriveSystem
+    return TankDriveSystem(pin_factory=factory)
+
+
+def _make_turret(config, factory=None):
+    from drivers.servo_driver import TurretController
+    return TurretController(config.get('turret_system', {}), pin_factory=factory)
+
+
+def _make_controller(record_path=None, replay_path=None, web_input=False):
+    # ブラウザのゲームパッド (Webプロセスが共有メモリに書く, drivers/web_gamepad.py)
+    if web_input:
+        from drivers.web_gamepad import WebGamepadController
+        return WebGamepadController()
+    # 入力トレースの再生 (実機のコントローラの代わり)
+    if replay_path:
+        from drivers.input_trace import ReplayController
+        return ReplayController(replay_path, loop=True)
+    from drivers.controller import PS4Controller
+    return PS4Controller(record_path=record_path)
+
+
+async def _init_hardware(config, timeline, input_opts):
+    """走行・砲塔・コントローラを並列に初期化 (import・pigpio接続待ちを重ねる)"""
+    from core.runtime import run_io
+    async def build(label, factory, *args):
+        start = time.monotonic()
+        obj = await run_io(factory, *args)
+        timeline.mark(f"init {label}", since=start)
+        return obj
+
+    controller = asyncio.ensure_future(build("PS4Controller", _make_controller, *input_opts))
+    factory = await build("pigpio connection", _make_pin_factory, config)
+    tank, turret = await asyncio.gather(
+        build("TankDriveSystem", _make_tank, factory),
+        build("TurretController", _make_turret, config, factory),
+    )
+    return tank, turret, await controller
+
+
+def _make_failsafe(config, controller, turret):
+    """リンク断の見張り (pigpiod に接続していればスクリプトの見張りも付ける)"""
+    from core.failsafe import LinkMonitor, PigpioWatchdog, LINK_DEADLINE, PIGPIO_DEADLINE_MS
+    conf = config.get('failsafe', {})
+    monitor = LinkMonitor(controller, conf.get('link_deadline_ms', LINK_DEADLINE * 1000) / 1000.0)
+
+    deadline_ms = conf.get('pigpio_deadline_ms', PIGPIO_DEADLINE_MS)
+    pi = getattr(getattr(turret, 'factory', None), 'connection', None)
+    if deadline_ms and pi is not None:
+        drive = config.get('drive_system', {})
+        gpios = [drive[m][k] for m in ('motor_left', 'motor_right') if m in drive
+                 for k in ('pin_forward', 'pin_backward')]
+        try:
+            monitor.watchdog = PigpioWatchdog(pi, gpios, deadline_ms)
+            if monitor.watchdog.removed:
+                print(f"Failsafe: removed {monitor.watchdog.removed} stale pigpio watchdog script(s)")
+        except Exception as e:
+            print(f"Failsafe: pigpio watchdog unavailable ({e})")
+    return monitor
+
+
+async def _open_asyncio_client(config, tank):
+    """runtime.pigpio_client が asyncio なら、毎ティックの出力用に同じ pigpiod へ asyncio で接続する"""
+    pi = getattr(tank, 'pi', None)
+    if config.get('runtime', {}).get('pigpio_client', 'thread') != 'asyncio' or pi is None:
+        return None
+    try:
+        import pigpio_asyncio
+        aio = await pigpio_asyncio.connect(pi._host, pi._port, getattr(pi, '_unix_path', None))
+    except (ImportError, OSError) as e:
+        print(f"Control: asyncio pigpio client unavailable ({e}), writing from the hw thread")
+        return None
+    print("Control: outputs via the asyncio pigpio client")
+    return aio
+
+
+async def _control_main(state, config, timeline, input_opts, stall_ms):
+    from core import runtime
+    # SIGTERM (親の terminate) と SIGINT (Ctrl-C) はメインタスクの取り消しにして finally の後始末を通す
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, task.cancel)
+    monitor = runtime.LoopMonitor(stall_ms, name="control loop").install()
+
+    # ハードウェア初期化 (制御プロセス側で所有する)
+    with timeline.step("hardware ready"):
+        tank, turret, controller = await _init_hardware(config, timeline, input_opts)
+    failsafe = _make_failsafe(config, controller, turret)
+    aio = await _open_asyncio_client(config, tank)
+    outputs = OutputWriter(tank, turret, failsafe.watchdog, aio)
+
+    try:
+        await asyncio.gather(
+            controller.listen(),
+            control_loop(tank, turret, controller, state, timeline, failsafe=failsafe, monitor=monitor,
+                         outputs=outputs),
+            failsafe.watch(outputs, parent=os.getppid())
+        )
+    finally:
+        # 投入済みの書き込み (停止指令を含む) を出し切ってから閉じる
+        runtime.shutdown(wait=True)
+        if aio is not None:
+            await aio.stop()
+        failsafe.close()
+        tank.stop()
+        controller.close()
+        # pi.stop() まで通す (通知パイプのハンドルは pigpiod が自分では回収しない)
+        factory = getattr(turret, 'factory', None)
+        if factory is not None:
+            factory.close()
+
+
+def run_control(state, config_path="config/config.yaml", ready=None, timeline=None,
+                record_path=None, replay_path=None, web_input=False, stall_ms=None):
+    """制御プロセスのエントリポイント"""
+    from core.startup import Timeline
+    timeline = timeline or Timeline(name="control")
+
+    # Web・カメラが先に立ち上がるのを待つ (単一コアで取り合わないように)
+    if ready is not None:
+        ready.wait(READY_TIMEOUT)
+        timeline.mark("web ready, starting hardware bring-up")
+
+    set_realtime_priority()
+
+    config = {}
+    if os.path.exists(config_path):
+        with timeline.step("import yaml + load config"):
+            import yaml
+            with open(config_path) as f: config = yaml.safe_load(f)
+
+    if stall_ms is None:
+        from core.runtime import STALL_MS
+        stall_ms = config.get('runtime', {}).get('stall_ms', STALL_MS)
+    try:
+        asyncio.run(_control_main(state, config, timeline, (record_path, replay_path, web_input), stall_ms))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+def start_control_process(state, config_path="config/config.yaml", ready=None, timeline=None,
+                          record_path=None, replay_path=None, web_input=False, stall_ms=None):
+    """制御プロセスを起動 (共有メモリを引き継ぐため fork で生成)"""
+    ctx = multiprocessing.get_context("fork")
+    proc = ctx.Process(
+        target=run_control,
+        args=(state, config_path, ready, timeline, record_path, replay_path, web_input, stall_ms),
+        name="panzer-control", daemon=True
+    )
+    proc.start()
+    return proc
+
+
+def stop_control_process(proc, interrupted=False, timeout=STOP_TIMEOUT):
+    """制御プロセスを後始末させてから止める (終わらなければ kill)
+
+    interrupted: Ctrl-C で止めるとき。子にも SIGINT が届いて後始末を始めているので、まず待つ
+    """
+    if interrupted:
+        proc.join(timeout)
+    if proc.is_alive():
+        proc.terminate()    # SIGTERM: _control_main の finally を通る
+        proc.join(timeout)
+    if proc.is_alive():
+        print("Control: cleanup timed out, killing the control process")
+        proc.kill()
+        proc.join()
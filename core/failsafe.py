@@ -0,0 +1,162 @@
+# リンク断の検知とモーターのフェイルセーフ
+# DS4 は接続中ずっと入力レポート (SYN_REPORT) を送り続けるので、
+# 最後のレポートから deadline を過ぎたらリンク断とみなして走行を止める。
+#
+#   1. LinkMonitor: 制御プロセス内で deadline/4 ごとに見張り、切れたら次のティックを待たずに
+#      drive(0, 0)。トリップ中の control_loop は走行・砲塔・武装の入力を無視する。
+#      トリップした時点でコントローラの入力を中立に戻し (切れる前のスロットル・発砲を持ち越さない)、
+#      レポートが戻っても走行スティックが中立になるまでは復帰しない。
+#   2. PigpioWatchdog: pigpiod 上で動くスクリプト。制御ティックごとに更新するハートビート (p0) が
+#      止まったらモーターのピンを 0 にする。Python ごと固まっても効く最後の砦。
+#      モーターが pigpiod 経由で駆動されているとき (GPIOZERO_PIN_FACTORY=pigpio) だけ意味がある。
+
+import asyncio
+import os
+import signal
+import time
+
+LINK_DEADLINE = 0.08        # 最後の入力レポートからリンク断とみなすまで (秒, 見張り間隔込みで 100ms 以内)
+PIGPIO_DEADLINE_MS = 250    # pigpiod 側の見張りの締め切り (ms)
+
+# p0 (ハートビート) が deadline の間変わらなければモーターのピンを落とし、
+# 再び変わるまで待ってから見張りに戻る
+WATCHDOG_SCRIPT = """
+tag 0
+ld v0 p0
+mils {deadline}
+lda p0
+cmp v0
+jnz 0
+{stops}
+tag 1
+mils 10
+lda p0
+cmp v0
+jz 1
+jmp 0
+"""
+
+PI_SCRIPT_INITING = 0
+PI_SCRIPT_HALTED = 1
+PI_MAX_SCRIPTS = 32
+SCRIPT_INIT_TIMEOUT = 1.0   # 保存したスクリプトが実行できるようになるまで待つ上限 (秒)
+# 見張りスクリプトの印 (p9)。前回のプロセスが後始末できずに残したものを起動時に探して消す
+WATCHDOG_TAG = 0x505A5744   # "PZWD"
+
+
+class PigpioWatchdog:
+    """pigpiod 上のハートビート監視スクリプト (pi は pigpio.pi)"""
+
+    def __init__(self, pi, gpios, deadline_ms=PIGPIO_DEADLINE_MS):
+        self.pi = pi
+        self.removed = self.remove_stale(pi)
+        script = WATCHDOG_SCRIPT.format(deadline=int(deadline_ms),
+                                        stops="\n".join(f"w {g} 0" for g in gpios))
+        self.sid = pi.store_script(script.encode())
+        # 保存直後は初期化中のことがある。待ちは打ち切り、使えなければ消して見張りなしで続ける
+        deadline = time.monotonic() + SCRIPT_INIT_TIMEOUT
+        status = pi.script_status(self.sid)[0]
+        while status == PI_SCRIPT_INITING and time.monotonic() < deadline:
+            time.sleep(0.01)
+            status = pi.script_status(self.sid)[0]
+        if status != PI_SCRIPT_HALTED:
+            pi.delete_script(self.sid)
+            raise RuntimeError(f"watchdog script not ready (status {status})")
+        self.beat = 0
+        pi.run_script(self.sid, [self.beat] + [0] * 8 + [WATCHDOG_TAG])
+
+    @staticmethod
+    def remove_stale(pi):
+        """前回のプロセスの見張りスクリプト (p9 が WATCHDOG_TAG) を止めて消す。消した数を返す
+
+        kill されたプロセスのスクリプトは pigpiod に残り、32 個の枠を使ったまま同じピンを見張り続ける。
+        """
+        removed = 0
+        for sid in range(PI_MAX_SCRIPTS):
+            status, params = pi.script_status(sid)
+            if status >= 0 and len(params) == 10 and params[9] == WATCHDOG_TAG:
+                pi.stop_script(sid)
+                pi.delete_script(sid)
+                removed += 1
+        return removed
+
+    def heartbeat(self, batch=None):
+        """batch (pi.batch()) を渡すとそこに積む (制御ティックの出力と同じ往復で送る)"""
+        self.beat = (self.beat + 1) & 0x7FFFFFFF
+        (self.pi if batch is None else batch).update_script(self.sid, [self.beat])
+
+    def close(self):
+        try:
+            self.pi.stop_script(self.sid)
+            self.pi.delete_script(self.sid)
+        except Exception:
+            pass
+
+
+class LinkMonitor:
+    def __init__(self, controller, deadline=LINK_DEADLINE, watchdog=None):
+        self.controller = controller
+        self.deadline = deadline
+        self.watchdog = watchdog
+        self.tripped = False
+        self.trips = 0
+        self.detect_last = 0.0      # 検知したときの「最後のレポートからの経過」(ms)
+        self.detect_max = 0.0
+
+    def check(self, now=None):
+        """リンク断なら True (切れた瞬間に1回だけトリップとして数える)"""
+        last = getattr(self.controller, 'last_report', 0.0)
+        if not last:
+            return False    # まだ一度も受信していない (入力は初期値の中立のまま)
+        age = (time.monotonic() if now is None else now) - last
+        if age <= self.deadline:
+            if self.tripped and not self._released():
+                return True     # 走行スティックが中立に戻るまで復帰しない
+            self.tripped = False
+            return False
+        if not self.tripped:
+            self.tripped = True
+            self.trips += 1
+            self.detect_last = age * 1000.0
+            self.detect_max = max(self.detect_max, self.detect_last)
+            neutral = getattr(self.controller, 'neutral', None)
+            if neutral is not None:
+                neutral()
+        return True
+
+    def _released(self):
+        state = getattr(self.controller, 'state', {})
+        return not state.get('throttle') and not state.get('turn')
+
+    async def watch(self, outputs, parent=None):
+        """制御ティックより細かい間隔で見張り、切れたらすぐ止める (outputs は core.control.OutputWriter)
+
+        pigpiod 側の見張りへのハートビートは、制御ティックごとに outputs が走行指令と一緒に送る。
+        parent (Webプロセスの pid) を渡すと親も見張る。親が後始末なしに落ちたら (getppid が変わる)
+        止めてから自分に SIGTERM を送り、terminate されたときと同じ後始末で終わる。
+        """
+        while True:
+            await asyncio.sleep(self.deadline / 4)
+            if parent is not None and os.getppid() != parent:
+                outputs.submit(0, 0)
+                print("Failsafe: web process is gone, motors stopped")
+                os.kill(os.getpid(), signal.SIGTERM)
+                return
+            was_tripped = self.tripped
+            if self.check() and not was_tripped:
+                # 制御ループの未実行の走行指令を置き換える
+                outputs.submit(0, 0)
+                print(f"Failsafe: no input for {self.detect_last:.0f} ms, motors stopped")
+
+    def fields(self):
+        """共有状態に載せる値"""
+        return {
+            "failsafe_active": self.tripped,
+            "failsafe_trips": self.trips,
+            "failsafe_detect": self.detect_last,
+            "failsafe_detect_max": self.detect_max,
+        }
+
+    def close(self):
+        if self.watchdog:
+            self.watchdog.close()
@@ -0,0 +1,255 @@
+# 熱・電圧低下を見て Web 側の負荷を段階的に落とすガバナー (Webプロセスで動く)
+# Zero は熱や電池の電圧低下でファームウェアがクロックを落とすので、その前後で
+# 映像の fps・解像度, 状態プッシュの間隔, ログの詳しさ を下げて CPU を空ける。
+# 制御ループ (別プロセス, SCHED_FIFO) の周期には触らず、そのティック遅延 p99 も
+# 入力に入れて「制御の予算を食い始めたら Web 側を削る」。
+#
+# 入力 (センサー)
+#   SysSensor    実機: /sys の温度, ファームウェアのスロットルフラグ (get_throttled), /proc/stat
+#   FileSensor   試験用: JSON ファイルを毎回読む (書き換えて状況を再現する)
+#
+# 段階は上げるときは即座に、下げる (回復する) ときは COOLDOWN 秒落ち着いてから1段ずつ。
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque, namedtuple
+
+log = logging.getLogger("panzer.governor")
+
+SAMPLE_INTERVAL = 2.0   # 測定間隔 (秒)
+COOLDOWN = 15.0         # 1段戻すまでに条件が下がったままでいる時間 (秒)
+HISTORY = 20            # /metrics に残す判断の数
+
+THERMAL_PATH = "/sys/class/thermal/thermal_zone0/temp"
+THROTTLED_PATH = "/sys/devices/platform/soc/soc:firmware/get_throttled"
+
+# get_throttled のビット (下位が現在の状態, bit16〜 は起動後に一度でも起きたか)
+UNDERVOLT = 1 << 0
+FREQ_CAPPED = 1 << 1
+THROTTLED = 1 << 2
+SOFT_TEMP_LIMIT = 1 << 3
+FLAG_NAMES = {UNDERVOLT: "undervolt", FREQ_CAPPED: "freq-capped",
+              THROTTLED: "throttled", SOFT_TEMP_LIMIT: "soft-temp-limit"}
+
+TEMP_STEPS = (70.0, 77.0, 82.0)     # これ以上で段階 1, 2, 3 (℃, ファームウェアは 80℃ から落とす)
+CPU_STEPS = (0.85, 0.95)            # これ以上で段階 1, 2 (CPU 使用率)
+TICK_BUDGET_MS = 10.0               # 制御ティック遅延 p99 がこれを超えたら段階 1 (周期 50ms の 1/5)
+
+# 段階ごとの設定 (fps・解像度は起動時の値に対する倍率)
+Level = namedtuple("Level", ("fps_scale", "size_scale", "push_interval", "log_level"))
+LEVELS = (
+    Level(1.0, 1.0, 0.05, logging.INFO),
+    Level(0.7, 1.0, 0.1, logging.INFO),
+    Level(0.5, 0.75, 0.2, logging.WARNING),
+    Level(0.2, 0.5, 0.5, logging.WARNING),
+)
+
+Reading = namedtuple("Reading", ("temp_c", "throttled", "cpu", "tick_p99"))
+
+
+def _read_text(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+class SysSensor:
+    """実機のセンサー (読めないものは None)"""
+
+    def __init__(self, thermal=THERMAL_PATH, throttled=THROTTLED_PATH):
+        self.thermal = thermal
+        self.throttled = throttled
+        self._cpu = None
+
+    async def read(self):
+        temp = _read_text(self.thermal)
+        return Reading(
+            temp_c=int(temp) / 1000.0 if temp else None,
+            throttled=await self._throttled(),
+            cpu=self._cpu_load(),
+            tick_p99=None,
+        )
+
+    async def _throttled(self):
+        text = _read_text(self.throttled)
+        if text is not None:
+            return int(text, 16)
+        # 古いカーネルは sysfs にないので vcgencmd (throttled=0x50005)
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "vcgencmd", "get_throttled", stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL)
+            out, _ = await proc.communicate()
+            return int(out.decode().split("=")[1], 16)
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def _cpu_load(self):
+        """前回の測定からの CPU 使用率 (0.0〜1.0)"""
+        text = _read_text("/proc/stat")
+        if not text:
+            return None
+        ticks = [int(v) for v in text.split("\n", 1)[0].split()[1:]]
+        idle, total = ticks[3] + ticks[4], sum(ticks)
+        prev, self._cpu = self._cpu, (idle, total)
+        if prev is None or total == prev[1]:
+            return None
+        return 1.0 - (idle - prev[0]) / (total - prev[1])
+
+
+class FileSensor:
+    """試験用の代役: {"temp_c": 81.5, "throttled": 4, "cpu": 0.5} のような JSON を毎回読む"""
+
+    def __init__(self, path):
+        self.path = path
+
+    async def read(self):
+        text = _read_text(self.path)
+        data = json.loads(text) if text else {}
+        throttled = data.get("throttled")
+        if isinstance(throttled, str):
+            throttled = int(throttled, 16)
+        return Reading(data.get("temp_c"), throttled, data.get("cpu"), None)
+
+
+def target_level(reading):
+    """測定値から必要な段階と、その理由を返す"""
+    level, reasons = 0, []
+
+    def need(n, why):
+        nonlocal level
+        level = max(level, n)
+        reasons.append(why)
+
+    if reading.temp_c is not None:
+        for n, limit in reversed(list(enumerate(TEMP_STEPS, 1))):
+            if reading.temp_c >= limit:
+                need(n, f"temp {reading.temp_c:.1f}C")
+                break
+    flags = reading.throttled or 0
+    if flags & (UNDERVOLT | THROTTLED | FREQ_CAPPED):
+        need(2, " ".join(name for bit, name in FLAG_NAMES.items() if flags & bit))
+    elif flags & SOFT_TEMP_LIMIT:
+        need(1, "soft-temp-limit")
+    if reading.cpu is not None:
+        for n, limit in reversed(list(enumerate(CPU_STEPS, 1))):
+            if reading.cpu >= limit:
+                need(n, f"cpu {reading.cpu * 100:.0f}%")
+                break
+    if reading.tick_p99 is not None and reading.tick_p99 > TICK_BUDGET_MS:
+        need(1, f"control p99 {reading.tick_p99:.1f}ms")
+    return level, ", ".join(reasons) or "nominal"
+
+
+class Governor:
+    def __init__(self, sensor, camera=None, state=None, interval=SAMPLE_INTERVAL, cooldown=COOLDOWN):
+        self.sensor = sensor
+        self.camera = camera
+        self.state = state          # core.state.StateBlock (制御ティック遅延を読む)
+        self.interval = interval
+        self.cooldown = cooldown
+        self.level = 0
+        self.reason = "nominal"
+        self.reading = None
+        self.changed = time.monotonic()
+        self.transitions = 0
+        self.history = deque(maxlen=HISTORY)
+        self._calm_since = None     # 目標が今の段階より下になった時刻
+        # 段階 0 の映像設定 (起動時の値)
+        self.base = (camera.width, camera.height, camera.fps) if camera else None
+
+    @property
+    def settings(self):
+        return LEVELS[self.level]
+
+    @property
+    def push_interval(self):
+        return self.settings.push_interval
+
+    def step(self, reading, now=None):
+        """測定1回ぶんの判断 (段階が変わったら適用して True)"""
+        now = time.monotonic() if now is None else now
+        self.reading = reading
+        target, reason = target_level(reading)
+        if target > self.level:
+            self._calm_since = None
+            return self._set(target, reason, now)
+        if target < self.level:
+            if self._calm_since is None:
+                self._calm_since = now
+            elif now - self._calm_since >= self.cooldown:
+                self._calm_since = now
+                return self._set(self.level - 1, f"recovered ({reason})", now)
+        else:
+            self._calm_since = None
+        return False
+
+    def _set(self, level, reason, now):
+        old, self.level = self.level, level
+        self.reason = reason
+        self.changed = now
+        self.transitions += 1
+        self.history.append({"t": round(time.time(), 1), "from": old, "to": level, "reason": reason})
+        self.apply()
+        log.warning("level %d -> %d (%s): %s", old, level, reason, self._describe())
+        return True
+
+    def _video(self):
+        if not self.base:
+            return None
+        width, height, fps = self.base
+        s = self.settings
+        # raspivid に渡す解像度は8の倍数にそろえる
+        return (max(16, int(width * s.size_scale) // 8 * 8),
+                max(16, int(height * s.size_scale) // 8 * 8),
+                max(1, round(fps * s.fps_scale)))
+
+    def _describe(self):
+        video = self._video()
+        text = f"push {self.push_interval * 1000:.0f}ms, log {logging.getLevelName(self.settings.log_level)}"
+        return (f"stream {video[0]}x{video[1]}@{video[2]}, " + text) if video else text
+
+    def apply(self):
+        video = self._video()
+        if video and self.camera:
+            self.camera.reconfigure(*video)
+        logging.getLogger().setLevel(self.settings.log_level)
+
+    async def run(self):
+        while True:
+            try:
+                reading = await self.sensor.read()
+                if self.state is not None:
+                    reading = reading._replace(tick_p99=self.state.snapshot().tick_p99)
+                self.step(reading)
+            except Exception as e:
+                log.error("sensor error: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def fields(self):
+        """/metrics に載せる値"""
+        r = self.reading
+        video = self._video()
+        return {
+            "level": self.level,
+            "reason": self.reason,
+            "since_s": round(time.monotonic() - self.changed, 1),
+            "transitions": self.transitions,
+            "reading": None if r is None else {
+                "temp_c": r.temp_c,
+                "throttled": None if r.throttled is None else hex(r.throttled),
+                "flags": [name for bit, name in FLAG_NAMES.items() if (r.throttled or 0) & bit],
+                "cpu_pct": None if r.cpu is None else round(r.cpu * 100, 1),
+                "control_p99_ms": None if r.tick_p99 is None else round(r.tick_p99, 3),
+            },
+            "applied": {
+                "stream": None if video is None else {"width": video[0], "height": video[1], "fps": video[2]},
+                "push_interval_ms": round(self.push_interval * 1000),
+                "log_level": logging.getLevelName(self.settings.log_level),
+            },
+            "history": list(self.history),
+        }
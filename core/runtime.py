@@ -0,0 +1,231 @@
+# 実行時レイヤ: ブロッキング処理の逃がし先と、イベントループの停滞検出
+# どちらのプロセス (Web・制御) もイベントループは1本なので、同期の I/O を直接呼ぶと
+# その間は映像の書き込みも制御ティックも止まる。
+#
+#   io()   ファイル・YAML・evdev の列挙/オープン・ドライバの初期化 (IO_WORKERS 本のスレッド)
+#   hw()   GPIO (pigpio のソケット往復) への書き込み。スレッド1本で順序を保つ
+#          submit_latest(key, ...) は同じキーの未実行分を最新の値で置き換えるので、
+#          pigpiod が詰まっても待ち行列はキーの数より伸びない (古いサーボ角は捨ててよい)
+#   LoopMonitor  コールバック1回がループを threshold_ms 以上占有したらログに出す
+#
+# スレッドはプロセスごとに作る (fork 後の子では作り直す)。
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from core.control import TickStats
+
+log = logging.getLogger("panzer.runtime")
+
+IO_WORKERS = 3          # 起動時に走行・砲塔・コントローラの初期化を重ねられる本数
+QUEUE_SIZE = 16         # run() で同時に抱える仕事の上限 (超えたら呼び出し側が待つ)
+STALL_MS = 20.0         # これ以上ループを占有したコールバックを記録する (制御周期 50ms の 2/5)
+STALL_LOG_INTERVAL = 1.0    # 停滞ログの最短間隔 (秒, 間に起きた分は数だけ数える)
+
+
+class Executor:
+    def __init__(self, name, workers=1, queue_size=QUEUE_SIZE):
+        self.name = name
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix=f"panzer-{name}")
+        self.queue_size = queue_size
+        self._slots = None          # asyncio.Semaphore (ループ上で初めて作る)
+        self._lock = threading.Lock()
+        self._latest = {}           # submit_latest の未実行分: key -> (fn, args, 投入時刻)
+
+        self.submitted = 0
+        self.completed = 0
+        self.coalesced = 0          # 未実行のまま新しい値に置き換えられた数
+        self.errors = 0
+        self.depth = 0
+        self.depth_max = 0
+        self.wait = TickStats()     # 投入 → 実行開始 (秒)
+        self.busy = TickStats()     # 実行時間 (秒)
+
+    async def run(self, fn, *args):
+        """スレッドで実行して結果を待つ (待ち行列が一杯なら空くまで待つ)"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.queue_size)
+        async with self._slots:
+            self._enqueue()
+            return await asyncio.get_running_loop().run_in_executor(
+                self.pool, self._call, fn, args, time.perf_counter())
+
+    def submit_latest(self, key, fn, *args):
+        """結果を待たずに投げる。同じ key の未実行分があれば置き換える"""
+        with self._lock:
+            pending = key in self._latest
+            self._latest[key] = (fn, args, time.perf_counter())
+            if pending:
+                self.coalesced += 1
+        if pending:
+            return
+        self._enqueue()
+        self.pool.submit(self._run_latest, key)
+
+    def _enqueue(self):
+        with self._lock:
+            self.submitted += 1
+            self.depth += 1
+            self.depth_max = max(self.depth_max, self.depth)
+
+    def _run_latest(self, key):
+        with self._lock:
+            fn, args, queued = self._latest.pop(key)
+        try:
+            self._call(fn, args, queued)
+        except Exception as e:
+            # 待っている人がいないのでここで記録する
+            log.error("%s: %s failed: %s", self.name, getattr(fn, "__qualname__", fn), e)
+
+    def _call(self, fn, args, queued):
+        start = time.perf_counter()
+        self.wait.add(start - queued)
+        try:
+            return fn(*args)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.busy.add(time.perf_counter() - start)
+            with self._lock:
+                self.depth -= 1
+                self.completed += 1
+
+    def fields(self):
+        wait50, wait99, wait_max = self.wait.percentiles()
+        _, busy99, _ = self.busy.percentiles()
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "depth": self.depth,
+            "depth_max": self.depth_max,
+            "wait_p50_ms": round(wait50 * 1000.0, 3),
+            "wait_p99_ms": round(wait99 * 1000.0, 3),
+            "wait_max_ms": round(wait_max * 1000.0, 3),
+            "run_p99_ms": round(busy99 * 1000.0, 3),
+        }
+
+    def shutdown(self, wait=True):
+        self.pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_EXECUTORS = {}
+_PID = None
+
+
+def _get(name, workers):
+    global _PID
+    if _PID != os.getpid():
+        # fork で引き継いだプールのスレッドは子にはいない
+        _EXECUTORS.clear()
+        _PID = os.getpid()
+    executor = _EXECUTORS.get(name)
+    if executor is None:
+        executor = _EXECUTORS[name] = Executor(name, workers)
+    return executor
+
+
+def io():
+    return _get("io", IO_WORKERS)
+
+
+def hw():
+    return _get("hw", 1)
+
+
+async def run_io(fn, *args):
+    return await io().run(fn, *args)
+
+
+def executor_fields():
+    return {name: executor.fields() for name, executor in _EXECUTORS.items() if _PID == os.getpid()}
+
+
+def shutdown(wait=True):
+    """プロセス終了時に。wait=True なら投入済みの書き込み (停止指令など) を出し切る"""
+    for executor in list(_EXECUTORS.values()):
+        executor.shutdown(wait)
+    _EXECUTORS.clear()
+
+
+# --- ループの停滞検出 ---
+# asyncio のコールバック (タスクの1ステップを含む) はすべて Handle._run を通るので、そこで時間を測る。
+# ループの debug モード (slow_callback_duration) は呼び出しごとにスタックを取るので Zero では重い。
+_MONITORS = {}
+_handle_run = asyncio.events.Handle._run
+
+
+def _timed_run(self):
+    monitor = _MONITORS.get(self._loop)
+    if monitor is None:
+        return _handle_run(self)
+    start = time.perf_counter()
+    _handle_run(self)
+    elapsed = (time.perf_counter() - start) * 1000.0
+    if elapsed >= monitor.threshold_ms:
+        monitor.record(self, elapsed)
+
+
+def describe(handle):
+    """コールバックの表示名 (タスクならタスク名とコルーチン名)"""
+    callback = handle._callback
+    task = getattr(callback, "__self__", None)
+    if isinstance(task, asyncio.Task):
+        coro = task.get_coro()
+        return f"task {task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+
+class LoopMonitor:
+    def __init__(self, threshold_ms=STALL_MS, name="loop"):
+        self.threshold_ms = threshold_ms
+        self.name = name
+        self.stalls = 0
+        self.worst = 0.0
+        self.worst_callback = None
+        self.recent = deque(maxlen=10)
+        self._last_log = 0.0
+        self._suppressed = 0
+        self._loop = None
+
+    def install(self, loop=None):
+        self._loop = loop or asyncio.get_running_loop()
+        _MONITORS[self._loop] = self
+        asyncio.events.Handle._run = _timed_run
+        return self
+
+    def uninstall(self):
+        _MONITORS.pop(self._loop, None)
+        if not _MONITORS:
+            asyncio.events.Handle._run = _handle_run
+
+    def record(self, handle, ms):
+        name = describe(handle)
+        self.stalls += 1
+        if ms > self.worst:
+            self.worst, self.worst_callback = ms, name
+        self.recent.append({"t": round(time.time(), 3), "ms": round(ms, 1), "callback": name})
+        now = time.monotonic()
+        if now - self._last_log < STALL_LOG_INTERVAL:
+            self._suppressed += 1
+            return
+        more = f" (+{self._suppressed} more)" if self._suppressed else ""
+        log.warning("%s stalled %.1f ms in %s%s", self.name, ms, name, more)
+        self._last_log = now
+        self._suppressed = 0
+
+    def fields(self):
+        return {
+            "threshold_ms": self.threshold_ms,
+            "stalls": self.stalls,
+            "worst_ms": round(self.worst, 1),
+            "worst_callback": self.worst_callback,
+            "recent": list(self.recent),
+        }
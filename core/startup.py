@@ -0,0 +1,52 @@
+# 起動タイムライン (--profile-startup)
+# import・初期化の各段階を、プロセス起動からの経過時間で表示する。
+# time.monotonic はプロセス間で共通なので、制御プロセスも同じ t0 で並べられる。
+
+import os
+import time
+from contextlib import contextmanager
+
+
+def process_start():
+    """このプロセスの起動時刻 (time.monotonic 基準)。取れなければ現在時刻"""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")   # 起動後の秒数
+        elapsed = time.clock_gettime(time.CLOCK_BOOTTIME) - started
+        return time.monotonic() - elapsed
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.monotonic()
+
+
+class Timeline:
+    def __init__(self, t0=None, enabled=False, name="web"):
+        self.t0 = process_start() if t0 is None else t0
+        self.enabled = enabled
+        self.name = name
+        self._seen = set()
+
+    def mark(self, label, since=None):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        line = f"[startup:{self.name}] +{now - self.t0:7.3f}s  {label}"
+        if since is not None:
+            line += f" ({(now - since) * 1000:.0f} ms)"
+        print(line, flush=True)
+
+    def once(self, label):
+        """最初の1回だけ記録 (time-to-first-frame / time-to-drive 用)"""
+        if label not in self._seen:
+            self._seen.add(label)
+            self.mark(label)
+
+    @contextmanager
+    def step(self, label):
+        start = time.monotonic()
+        yield
+        self.mark(label, since=start)
+
+    def child(self, name):
+        """別プロセス用 (同じ t0 を共有)"""
+        return Timeline(self.t0, self.enabled, name)
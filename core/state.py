@@ -0,0 +1,250 @@
+# 制御プロセス ⇔ Webプロセス(他の読み手)間の共有状態
+# 固定レイアウトの共有メモリ (multiprocessing.shared_memory) に
+# struct でそのまま詰める。シリアライズ (JSON/pickle) は一切しない。
+#
+# 書き手は制御プロセスひとつだけ。読み手 (Web・レコーダ・テレメトリ等)
+# は名前で attach して、seqlock で破れのないスナップショットを取る。
+#
+#   書き手: seq を奇数にする → ペイロード書き込み → seq を偶数に戻す
+#   読み手: seq(偶数)を読む → ペイロードをコピー → seq が同じなら採用
+#
+# 書き手が書き込みの途中で落ちると seq は奇数のまま残る。読み手は SNAPSHOT_TIMEOUT で
+# 諦めて最後に取れたスナップショットを返す (updated が進まないので古さは読み手側で分かる)。
+
+import struct
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+DEFAULT_NAME = "panzer_state"
+SNAPSHOT_TIMEOUT = 0.05     # seq が奇数のままなら書き手が途中で落ちたとみなすまで (秒, 書き込みは数µs)
+TRY_SNAPSHOT_TRIES = 4      # try_snapshot が待たずに読み直す回数
+MAGIC = b"PZST"
+VERSION = 3
+
+# (フィールド名, structフォーマット)
+LAYOUT = (
+    ("updated", "d"),       # 最終更新時刻 (time.monotonic, 全プロセス共通)
+    ("speed", "f"),         # 走行速度 (0.0〜1.0)
+    ("pan", "f"),           # 砲塔角度 (度)
+    ("tilt", "f"),          # 砲身角度 (度)
+    ("machinegun", "B"),    # 機銃 (0/1)
+    ("link_up", "B"),       # コントローラ接続中 (0/1)
+    ("fire_seq", "I"),      # 主砲の発砲イベント番号
+    ("mg_seq", "I"),        # 機銃の射撃開始イベント番号
+    ("input_events", "I"),  # 受信した入力イベント数
+    ("link_drops", "I"),    # コントローラ切断回数
+    ("input_age", "f"),     # 最後の入力からの経過 (ms)
+    ("tick_count", "I"),    # 制御ティック数
+    ("tick_p50", "f"),      # 制御ティック遅延 p50 (ms)
+    ("tick_p99", "f"),      # 制御ティック遅延 p99 (ms)
+    ("tick_max", "f"),      # 制御ティック遅延 最大 (ms)
+    ("failsafe_active", "B"),       # リンク断で停止中 (0/1)
+    ("failsafe_trips", "I"),        # リンク断の検知回数
+    ("failsafe_detect", "f"),       # 直近の検知遅延 (最後の入力レポートから, ms)
+    ("failsafe_detect_max", "f"),   # 検知遅延の最大 (ms)
+    ("loop_stalls", "I"),           # 制御プロセスのループを止めたコールバックの数 (core/runtime.py)
+    ("loop_stall_max", "f"),        # その最大 (ms)
+    ("hw_wait_p99", "f"),           # GPIO 書き込みの待ち p99 (投入 → 実行開始, ms)
+    ("hw_coalesced", "I"),          # 実行前に新しい値で置き換えられた GPIO 書き込みの数
+)
+
+# Web入力 (ブラウザのゲームパッド, drivers/web_gamepad.py)。こちらは書き手がWebプロセス、読み手が制御プロセス
+INPUT_NAME = "panzer_input"
+INPUT_MAGIC = b"PZIN"
+INPUT_VERSION = 1
+
+INPUT_LAYOUT = (
+    ("updated", "d"),       # 最後のフレームを受け付けた時刻 (time.monotonic)
+    ("frames", "I"),        # 受け付けたフレーム数
+    ("frame_seq", "I"),     # 最後に受け付けたフレームの番号 (ブラウザ側の連番)
+    ("session", "H"),       # 送り手のセッション (タブごとの乱数)
+    ("buttons", "H"),       # ボタン (Gamepad API の標準配置, bit i = buttons[i])
+    ("lx", "f"),            # 左スティック横 (-1.0〜1.0, 右が +)
+    ("ly", "f"),            # 左スティック縦 (-1.0〜1.0, 下が +)
+    ("rx", "f"),            # 右スティック横
+    ("ry", "f"),            # 右スティック縦
+    ("l2", "f"),            # L2 (0.0〜1.0)
+    ("r2", "f"),            # R2 (0.0〜1.0)
+)
+
+_HEADER = struct.Struct("<4sHH")    # magic, version, payload size
+_SEQ = struct.Struct("<I")
+_SEQ_OFF = _HEADER.size
+_PAYLOAD_OFF = _SEQ_OFF + _SEQ.size
+
+
+class _Layout:
+    """フィールド表から作る struct・名前引き・スナップショット型"""
+
+    def __init__(self, name, layout):
+        self.fields = tuple(field for field, _ in layout)
+        self.snapshot = namedtuple(name, self.fields)
+        self.index = {field: i for i, field in enumerate(self.fields)}
+        self.payload = struct.Struct("<" + "".join(fmt for _, fmt in layout))
+        self.size = _PAYLOAD_OFF + self.payload.size
+
+
+_STATE = _Layout("Snapshot", LAYOUT)
+FIELDS = _STATE.fields
+Snapshot = _STATE.snapshot
+SIZE = _STATE.size
+
+_INPUT = _Layout("InputSnapshot", INPUT_LAYOUT)
+InputSnapshot = _INPUT.snapshot
+
+
+def _attach(name):
+    """追跡なしで既存の共有メモリを開く (読み手の終了時に消されないように)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)   # Python 3.13+
+    except TypeError:
+        pass
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class StateBlock:
+    # 派生クラスで差し替える (共有メモリの名前・識別子・レイアウト)
+    DEFAULT_NAME = DEFAULT_NAME
+    MAGIC = MAGIC
+    VERSION = VERSION
+    LAYOUT = _STATE
+
+    def __init__(self, name=None, create=True):
+        name = name or self.DEFAULT_NAME
+        layout = self.LAYOUT
+        size = layout.size
+        if create:
+            try:
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                # 前回クラッシュ時の残骸は作り直す
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close(); stale.unlink()
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self._shm.buf[:size] = bytes(size)
+            _HEADER.pack_into(self._shm.buf, 0, self.MAGIC, self.VERSION, layout.payload.size)
+        else:
+            self._shm = _attach(name)
+            magic, version, payload = _HEADER.unpack_from(self._shm.buf, 0)
+            if magic != self.MAGIC or version != self.VERSION or payload != layout.payload.size:
+                self._shm.close()
+                raise ValueError(f"incompatible state block '{name}' (v{version})")
+
+        self.name = name
+        self._owner = create
+        self._buf = self._shm.buf
+        # 書き手側だけが持つ現在値 (書き込み時に毎回全体を詰め直す)
+        self._values = [0] * len(layout.fields)
+        self._index = layout.index
+        self._payload = layout.payload
+        self._snapshot = layout.snapshot._make
+        self._seq = 0
+        # 読み手側: 最後に取れたスナップショット (初めは作りたてのブロックと同じ全部 0)
+        self._last = self._snapshot(layout.payload.unpack(bytes(layout.payload.size)))
+        self.stale_reads = 0    # 取れずに _last を返した回数
+
+    @classmethod
+    def attach(cls, name=None):
+        """既存の状態ブロックに読み手として接続"""
+        return cls(name, create=False)
+
+    # --- 書き手 (制御プロセス) ---
+    def update(self, **fields):
+        """指定フィールドを更新してまとめて公開"""
+        values = self._values
+        index = self._index
+        for key, value in fields.items():
+            values[index[key]] = value
+        values[0] = time.monotonic()
+
+        buf = self._buf
+        seq = (self._seq + 1) & 0xFFFFFFFF
+        _SEQ.pack_into(buf, _SEQ_OFF, seq)                  # 奇数: 書き込み中
+        self._payload.pack_into(buf, _PAYLOAD_OFF, *values)
+        self._seq = (seq + 1) & 0xFFFFFFFF
+        _SEQ.pack_into(buf, _SEQ_OFF, self._seq)            # 偶数: 確定
+
+    # --- 読み手 ---
+    def _read(self):
+        """1回だけ読む (書き込み中か、読んでいる間に書かれたら None)"""
+        buf = self._buf
+        seq1 = _SEQ.unpack_from(buf, _SEQ_OFF)[0]
+        if seq1 & 1:
+            return None
+        values = self._payload.unpack_from(buf, _PAYLOAD_OFF)
+        if _SEQ.unpack_from(buf, _SEQ_OFF)[0] != seq1:
+            return None
+        self._last = self._snapshot(values)
+        return self._last
+
+    def snapshot(self, timeout=SNAPSHOT_TIMEOUT):
+        """破れのないスナップショットを取得 (書き込み中なら再試行)
+
+        timeout 秒たっても取れなければ最後に取れたものを返す (書き手が書き込み中に落ちた)。
+        """
+        deadline = None
+        while True:
+            snap = self._read()
+            if snap is not None:
+                return snap
+            now = time.monotonic()
+            if deadline is None:
+                deadline = now + timeout
+            elif now >= deadline:
+                self.stale_reads += 1
+                return self._last
+            time.sleep(0)
+
+    def try_snapshot(self, tries=TRY_SNAPSHOT_TRIES):
+        """待たずに取る。tries 回で取れなければ最後に取れたものを返す
+
+        書き手より優先度の高い読み手 (SCHED_FIFO の制御プロセスが Web の書いた InputBlock を読む) 用。
+        Zero (1コア) では読み手が回っている間は書き手が動けず、snapshot() の再試行は書き込みを待てない。
+        """
+        for _ in range(tries):
+            snap = self._read()
+            if snap is not None:
+                return snap
+        self.stale_reads += 1
+        return self._last
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class InputBlock(StateBlock):
+    """Web入力の共有ブロック (Webプロセスが書き、制御プロセスが読む)"""
+    DEFAULT_NAME = INPUT_NAME
+    MAGIC = INPUT_MAGIC
+    VERSION = INPUT_VERSION
+    LAYOUT = _INPUT
+
+
+if __name__ == "__main__":
+    # 読み手の例: 動作中の main.py の状態を 10Hz で表示
+    #   python -m core.state
+    block = StateBlock.attach()
+    try:
+        while True:
+            snap = block.snapshot()
+            print(f"speed={snap.speed:.2f} pan={snap.pan:+.1f} tilt={snap.tilt:+.1f} "
+                  f"fire#{snap.fire_seq} mg#{snap.mg_seq} link={'UP' if snap.link_up else 'DOWN'} "
+                  f"p99={snap.tick_p99:.2f}ms")
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        block.close()
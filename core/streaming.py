@@ -0,0 +1,33 @@
+# MJPEG (multipart/x-mixed-replace) 配信
+# main.py (自分のカメラ) と hub.py (ノードから中継したカメラ) で共用する。
+# camera は drivers/camera.py の Camera (frames() で最新フレームだけを受け取る)。
+
+import asyncio
+
+from aiohttp import web
+
+BOUNDARY = "frame"
+
+
+async def stream_mjpeg(request, camera):
+    response = web.StreamResponse(
+        status=200,
+        headers={
+            'Content-Type': f'multipart/x-mixed-replace;boundary={BOUNDARY}',
+            'Cache-Control': 'no-cache',
+            'Connection': 'close',
+        }
+    )
+    await response.prepare(request)
+
+    try:
+        async for jpg in camera.frames():
+            await response.write(
+                f'--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n'
+                f'Content-Length: {len(jpg)}\r\n'
+                f'X-Timestamp: {camera.frame_time:.6f}\r\n\r\n'.encode()
+            )
+            await response.write(jpg)
+            await response.write(b'\r\n')
+    except (ConnectionError, asyncio.CancelledError): pass
+    return response
@@ -0,0 +1,124 @@
+# UIリンク用 バイナリテレメトリ
+# 版番号付きの固定レイアウト (リトルエンディアン, 40バイト)。
+# ブラウザ側の対になるデコーダは web/telemetry.js。
+# レイアウトを変えるときは VERSION を上げ、両方を同時に更新すること。
+#
+#  off  型    内容
+#   0   u8    version
+#   1   u8    type (MSG_STATE)
+#   2   u16   flags (bit0: 機銃, bit1: コントローラ接続)
+#   4   u32   メッセージ番号 (クライアントごと)
+#   8   f32   speed
+#  12   f32   pan (度)
+#  16   f32   tilt (度)
+#  20   u32   fire_seq
+#  24   u32   mg_seq
+#  28   f32   最後の入力からの経過 (ms)
+#  32   u16   コントローラ切断回数
+#  34   u16   予約
+#  36   f32   制御ティック遅延 p99 (ms)
+#
+# 逆向き (ブラウザ → サーバー) のゲームパッド入力 (web/gamepad.js, 32バイト, 60Hz)
+#
+#  off  型    内容
+#   0   u8    version
+#   1   u8    type (MSG_INPUT)
+#   2   u16   セッション (タブごとの乱数)
+#   4   u32   フレーム番号 (セッション内で単調増加)
+#   8   f64   送信時刻 (ブラウザの performance.now(), ms)
+#  16   i16   左スティック横 ×32767
+#  18   i16   左スティック縦
+#  20   i16   右スティック横
+#  22   i16   右スティック縦
+#  24   u8    L2 ×255
+#  25   u8    R2 ×255
+#  26   u16   ボタン (標準配置, bit i = buttons[i])
+#  28   u16   ブラウザで測った直近の往復時間 (0.1ms 単位)
+#  30   u16   予約
+#
+# 受け取るたびにサーバーが返す応答 (16バイト)。ブラウザは送信時刻との差で往復時間を測る
+#
+#   0   u8    version
+#   1   u8    type (MSG_INPUT_ACK)
+#   2   u16   flags (bit0: 古いフレームとして捨てた)
+#   4   u32   フレーム番号
+#   8   f64   送信時刻 (フレームの値をそのまま返す)
+#
+# 観戦ハブ (hub.py) は各ノードの STATE メッセージの前に2バイト付けて観客へ転送する
+#
+#   0   u8    ノード番号 (/fleet の並び順)
+#   1   u8    flags (bit0: ハブ⇔ノードの接続中)
+#   2   ...   ノードの STATE メッセージ (40バイト, そのまま)
+
+import struct
+from collections import namedtuple
+
+VERSION = 1
+MSG_STATE = 1
+MSG_INPUT = 2
+MSG_INPUT_ACK = 3
+
+FLAG_MACHINEGUN = 1 << 0
+FLAG_LINK_UP = 1 << 1
+ACK_STALE = 1 << 0
+FLEET_ONLINE = 1 << 0
+
+STATE_MSG = struct.Struct("<BBHIfffIIfHHf")
+SIZE = STATE_MSG.size
+INPUT_MSG = struct.Struct("<BBHIdhhhhBBHHH")
+INPUT_ACK = struct.Struct("<BBHId")
+FLEET_PREFIX = struct.Struct("<BB")
+
+Telemetry = namedtuple("Telemetry", (
+    "version", "type", "flags", "msg_seq", "speed", "pan", "tilt",
+    "fire_seq", "mg_seq", "input_age", "link_drops", "reserved", "tick_p99",
+))
+
+InputFrame = namedtuple("InputFrame", (
+    "version", "type", "session", "seq", "sent_ms", "lx", "ly", "rx", "ry",
+    "l2", "r2", "buttons", "rtt", "reserved",
+))
+
+
+class TelemetryEncoder:
+    """クライアントごとに1つ。送信バッファを使い回す"""
+
+    def __init__(self):
+        self.buf = bytearray(SIZE)
+        self.view = memoryview(self.buf)
+        self.msg_seq = 0
+
+    def encode(self, snap):
+        """共有状態のスナップショットを詰める (返り値は内部バッファのビュー)"""
+        flags = 0
+        if snap.machinegun:
+            flags |= FLAG_MACHINEGUN
+        if snap.link_up:
+            flags |= FLAG_LINK_UP
+        self.msg_seq = (self.msg_seq + 1) & 0xFFFFFFFF
+        STATE_MSG.pack_into(
+            self.buf, 0, VERSION, MSG_STATE, flags, self.msg_seq,
+            snap.speed, snap.pan, snap.tilt, snap.fire_seq, snap.mg_seq,
+            snap.input_age, min(snap.link_drops, 0xFFFF), 0, snap.tick_p99
+        )
+        return self.view
+
+
+def decode(data):
+    """バイナリメッセージを Telemetry に戻す (版違いは ValueError)"""
+    if len(data) < SIZE or data[0] != VERSION:
+        raise ValueError(f"unsupported telemetry message (v{data[0] if data else '?'})")
+    return Telemetry._make(STATE_MSG.unpack_from(data, 0))
+
+
+def decode_input(data):
+    """ゲームパッド入力フレームを InputFrame に戻す (入力でなければ None, 版違いは ValueError)"""
+    if len(data) < INPUT_MSG.size or data[1] != MSG_INPUT:
+        return None
+    if data[0] != VERSION:
+        raise ValueError(f"unsupported input message (v{data[0]})")
+    return InputFrame._make(INPUT_MSG.unpack_from(data, 0))
+
+
+def encode_input_ack(frame, stale=False):
+    return INPUT_ACK.pack(VERSION, MSG_INPUT_ACK, ACK_STALE if stale else 0, frame.seq, frame.sent_ms)
@@ -0,0 +1,140 @@
+# カメラ (raspivid MJPEG)
+# キャプチャソース (既定は raspivid) を起動時に1本だけ立ち上げ、切り出したフレームを全視聴者に配る。
+# 視聴者ごとのキューは持たず「最新フレーム」だけを渡すので、
+# 遅いクライアントはフレームを飛ばすだけで他に影響しない。
+# ソースの差し替え (合成フレームなど) は drivers/capture.py を参照。
+
+import asyncio
+import logging
+import time
+
+from drivers.capture import SOI, EOI, RaspividSource, split_h264
+
+log = logging.getLogger("panzer.camera")
+
+
+class Camera:
+    def __init__(self, width=320, height=240, fps=10, bitrate=500000, on_frame=None, source=None):
+        # 画質設定: 320x240, 10fps, 500kbps (Pi Zero W向け)
+        self.source = source or RaspividSource(width, height, fps, bitrate)
+        self.width, self.height, self.fps = width, height, fps
+        self.on_frame = on_frame    # 新フレームごとに呼ぶ (計測用)
+        self.frame = None
+        self.frame_time = 0.0       # 最新フレームを受け取った時刻 (time.time, 視聴者側でフレーム遅延を測る)
+        self.frame_count = 0
+        self.viewers = 0            # frames() を回している視聴者数
+        self.running = False
+        self._task = None
+        self._restart = False       # 設定変更でソースを閉じた (待たずに開き直す)
+        self._new_frame = asyncio.Event()
+
+    async def start(self):
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self.running = False
+        if self._task:
+            self._task.cancel()
+        self._publish(None)
+
+    def reconfigure(self, width, height, fps):
+        """解像度・fps を変える (core/governor.py)。ソースが対応していなければ何もしない"""
+        configure = getattr(self.source, "configure", None)
+        if configure is None or (width, height, fps) == (self.width, self.height, self.fps):
+            return False
+        self.width, self.height, self.fps = width, height, fps
+        # raspivid は引数で決まるので開き直す (合成ソースはその場で変わる)
+        if configure(width, height, fps) and self.running:
+            self._restart = True
+            asyncio.create_task(self.source.close())
+        return True
+
+    async def frames(self):
+        """視聴者用: 新しいフレームが来るたびに最新のJPEGを返す"""
+        self.viewers += 1
+        try:
+            while self.running:
+                event = self._new_frame
+                await event.wait()
+                if self.frame is None:
+                    break
+                yield self.frame
+        finally:
+            self.viewers -= 1
+
+    def _publish(self, jpg):
+        self.frame = jpg
+        if jpg is not None:
+            self.frame_time = time.time()
+            self.frame_count += 1
+            if self.on_frame:
+                self.on_frame(jpg)
+        # 待っている視聴者を起こして、次のフレーム用のイベントに差し替える
+        event, self._new_frame = self._new_frame, asyncio.Event()
+        event.set()
+
+    async def _run(self):
+        warned = False
+        read = self._read if self.source.codec == "mjpeg" else self._read_h264
+        while self.running:
+            try:
+                stream = await self.source.open()
+            except FileNotFoundError:
+                if not warned:
+                    log.warning("%s not found (stream disabled)", self.source.name)
+                    warned = True
+                await asyncio.sleep(5)
+                continue
+            except OSError as e:
+                # 中継元 (HttpSource) につながらない: 黙って再接続を続ける
+                if not warned:
+                    log.warning("%s unavailable (%s), retrying", self.source.name, e)
+                    warned = True
+                await asyncio.sleep(2)
+                continue
+            warned = False
+
+            try:
+                await read(stream)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error("capture error: %s", e)
+            finally:
+                await self.source.close()
+
+            # ソース (raspivid) が落ちたら少し待って再起動
+            if self._restart:
+                self._restart = False
+                log.info("%s restarted at %dx%d@%d", self.source.name, self.width, self.height, self.fps)
+            elif self.running:
+                await asyncio.sleep(2)
+
+    async def _read(self, stdout):
+        buffer = b''
+        while True:
+            chunk = await stdout.read(4096)
+            if not chunk: break
+            buffer += chunk
+
+            while True:
+                start = buffer.find(SOI)
+                end = buffer.find(EOI)
+                if start != -1 and end != -1 and start < end:
+                    self._publish(buffer[start:end+2])
+                    buffer = buffer[end+2:]
+                else:
+                    if len(buffer) > 100000: buffer = b''
+                    break
+
+    async def _read_h264(self, stdout):
+        # 次のフレームの先頭が届いた時点で1つ前のフレームが完成する
+        buffer = b''
+        while True:
+            chunk = await stdout.read(4096)
+            if not chunk: break
+            frames, buffer = split_h264(buffer + chunk, final=False)
+            for frame in frames:
+                self._publish(frame)
+            if len(buffer) > 1000000: buffer = b''
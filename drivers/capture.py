@@ -0,0 +1,260 @@
+# カメラのキャプチャソース
+# Camera はソースから「raspivid の標準出力と同じバイト列」を読み、フレームを切り出す。
+# ソースを差し替えれば、raspivid のない普通の Linux でも同じ解析・配信経路を動かせる。
+#
+# ソースのインターフェース
+#   codec            "mjpeg" または "h264"
+#   name             表示用
+#   await open()     read(n) を持つストリームを返す
+#                    (起動できなければ FileNotFoundError, つながらなければ ConnectionError)
+#   await close()    後始末 (何度呼んでもよい)
+#   configure(w, h, fps)   (任意) 解像度・fps の変更。開き直しが必要なら True
+
+import asyncio
+import random
+import struct
+
+SOI = b'\xff\xd8'
+EOI = b'\xff\xd9'
+START_CODE = b'\x00\x00\x01'
+
+# H.264 NAL ユニットの種類
+NAL_SLICE = 1
+NAL_IDR = 5
+NAL_SPS = 7
+NAL_PPS = 8
+NAL_AUD = 9
+NAL_FILLER = 12
+
+
+class RaspividSource:
+    """実機のカメラ (raspivid を1本起動し、その標準出力を読む)"""
+
+    name = "raspivid"
+
+    def __init__(self, width=320, height=240, fps=10, bitrate=500000, codec="mjpeg"):
+        self.codec = codec
+        self.bitrate = bitrate
+        self.configure(width, height, fps)
+        self._proc = None
+
+    def configure(self, width, height, fps):
+        """次に起動する raspivid の引数を作り直す (動いているものは開き直しが必要)"""
+        self.cmd = ['raspivid', '-t', '0', '-w', str(width), '-h', str(height),
+                    '-fps', str(fps), '-cd', 'MJPEG' if self.codec == "mjpeg" else 'H264',
+                    '-b', str(self.bitrate), '-o', '-', '-n']
+        if self.codec == "h264":
+            self.cmd += ['-ih', '-pf', 'baseline']     # SPS/PPS を IDR ごとに入れる
+        return True
+
+    async def open(self):
+        self._proc = await asyncio.create_subprocess_exec(
+            *self.cmd, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        return self._proc.stdout
+
+    async def close(self):
+        if self._proc and self._proc.returncode is None:
+            try: self._proc.terminate(); await self._proc.wait()
+            except Exception: pass
+
+
+class HttpSource:
+    """別のサーバー (main.py) の /stream を1本だけ読む (hub.py の中継用)
+
+    multipart の区切りとヘッダはテキストなので、SOI/EOI を探す MJPEG の切り出しがそのまま読み飛ばす。
+    """
+
+    name = "http"
+    codec = "mjpeg"
+
+    def __init__(self, url, timeout=10.0):
+        self.url = url
+        self.timeout = timeout
+        self._session = None
+        self._resp = None
+
+    async def open(self):
+        import aiohttp
+        await self.close()
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout))
+        try:
+            self._resp = await self._session.get(self.url)
+            self._resp.raise_for_status()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            await self.close()
+            raise ConnectionError(f"{self.url}: {e}") from e
+        return self._resp.content
+
+    async def close(self):
+        if self._resp:
+            self._resp.release()
+            self._resp = None
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+
+class SyntheticSource:
+    """エンコード済みフレームを一定の fps で流す (ベンチマーク・オフライン試験用)
+
+    frames:    bytes の列 (load_frames / jpeg_frames / h264_frames の結果など)
+    fps:       送出レート
+    byte_rate: 指定するとフレームを詰め物で膨らませて、ほぼこのバイト/秒にする
+    jitter:    送出間隔の揺らぎ (周期に対する割合, 0.3 = ±30%)
+    loop:      最後まで流したら先頭に戻る (False なら EOF = raspivid が落ちたのと同じ扱い)
+    """
+
+    name = "synthetic"
+
+    def __init__(self, frames, fps=10, byte_rate=None, jitter=0.0, codec="mjpeg",
+                 loop=True, chunk=4096, seed=None):
+        self.codec = codec
+        self.fps = fps
+        self.jitter = jitter
+        self.loop = loop
+        self.chunk = chunk      # パイプと同じく途中で切れた塊で渡す
+        self.rng = random.Random(seed)
+        frames = list(frames)
+        if byte_rate:
+            frames = [pad_frame(f, int(byte_rate / fps), codec) for f in frames]
+        self.frames = frames
+        self.sent = 0
+        self._task = None
+
+    async def open(self):
+        stream = asyncio.StreamReader()
+        self._task = asyncio.create_task(self._feed(stream))
+        return stream
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def configure(self, width, height, fps):
+        """fps だけその場で変える (フレームは用意したものを流すので解像度は変わらない)"""
+        self.fps = fps
+        return False
+
+    async def _feed(self, stream):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            for frame in self.frames:
+                period = 1.0 / self.fps
+                for i in range(0, len(frame), self.chunk):
+                    stream.feed_data(frame[i:i + self.chunk])
+                self.sent += 1
+                # 締め切りは揺らぎなしで進め、揺らぎは各フレームの送出時刻にだけ乗せる
+                deadline += period
+                delay = deadline + self.rng.uniform(-self.jitter, self.jitter) * period - loop.time()
+                await asyncio.sleep(max(delay, 0))
+            if not self.loop:
+                break
+        stream.feed_eof()
+
+
+# --- フレームの用意 ---
+def split_jpeg(data):
+    """MJPEG (JPEG の連結) をフレームに分ける"""
+    frames = []
+    pos = 0
+    while True:
+        start = data.find(SOI, pos)
+        end = data.find(EOI, start + 2) if start != -1 else -1
+        if end == -1:
+            return frames
+        frames.append(data[start:end + 2])
+        pos = end + 2
+
+
+def split_h264(data, final=True):
+    """Annex-B の H.264 をアクセスユニット (1フレーム分の NAL 群) に分ける
+
+    final=False のときは (完成したフレーム, 続きを待つ残り) を返す (ストリーム解析用)
+    """
+    frames = []
+    start = None
+    has_slice = False
+    for pos, kind in _nal_starts(data):
+        if start is None:
+            start = pos
+        # SPS/AUD か、既にスライスを持っているところへの次のスライスで区切る
+        elif has_slice and kind in (NAL_SPS, NAL_AUD, NAL_SLICE, NAL_IDR):
+            frames.append(data[start:pos])
+            start, has_slice = pos, False
+        has_slice |= kind in (NAL_SLICE, NAL_IDR)
+    rest = data[start:] if start is not None else data[-3:]
+    if final:
+        if start is not None and has_slice:
+            frames.append(rest)
+        return frames
+    return frames, rest
+
+
+def _nal_starts(data):
+    """(NAL の開始位置, 種類) を順に返す。4バイトのスタートコードは先頭の 00 も含める"""
+    pos = data.find(START_CODE)
+    while pos != -1 and pos + 3 < len(data):
+        yield (pos - 1 if pos > 0 and data[pos - 1] == 0 else pos), data[pos + 3] & 0x1F
+        pos = data.find(START_CODE, pos + 3)
+
+
+def load_frames(path):
+    """.jpg / .mjpeg (JPEG の連結) / .h264 (Annex-B) を読み込んで (codec, frames) を返す"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data.startswith(SOI):
+        return "mjpeg", split_jpeg(data)
+    return "h264", split_h264(data)
+
+
+def jpeg_frames(count=30, size=12000):
+    """JPEG の構造 (SOI, APP0, COM, EOI) だけを持つフレームを作る
+
+    画像としては表示できないが、切り出し・配信の経路はこれで十分。
+    見える映像が欲しいときは実機で録った .mjpeg を load_frames で読むこと。
+    """
+    app0 = b'\xff\xe0' + struct.pack(">H", 16) + b'JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00'
+    frames = []
+    for n in range(count):
+        frame = SOI + app0 + _jpeg_comment(f"panzer synthetic frame {n}".encode()) + EOI
+        frames.append(pad_frame(frame, size, "mjpeg"))
+    return frames
+
+
+def h264_frames(count=30, size=6000, gop=10):
+    """SPS/PPS + IDR と P スライスが並ぶだけの H.264 風ストリーム (デコード不可)"""
+    sps = b'\x00\x00\x00\x01\x67\x42\xc0\x1e\xda\x05\x07\xec\x04\x40'
+    pps = b'\x00\x00\x00\x01\x68\xce\x3c\x80'
+    frames = []
+    for n in range(count):
+        if n % gop == 0:
+            body = sps + pps + b'\x00\x00\x00\x01\x65\x88' + bytes([0x80 | n & 0x7F])
+        else:
+            body = b'\x00\x00\x00\x01\x41\x9a' + bytes([0x80 | n & 0x7F])
+        frames.append(pad_frame(body, size if n % gop == 0 else size // 3, "h264"))
+    return frames
+
+
+def pad_frame(frame, size, codec):
+    """フレームを size バイトまで膨らませる (JPEG は COM セグメント, H.264 はフィラー NAL)"""
+    need = size - len(frame)
+    if codec == "mjpeg":
+        # EOI の直前に COM セグメントを足す (1セグメント最大 65533 バイト)
+        pads = []
+        while need > 4:
+            n = min(need - 4, 65533)
+            pads.append(_jpeg_comment(b'\x00' * n))
+            need -= n + 4
+        return frame[:-2] + b"".join(pads) + EOI if pads else frame
+    if need > 6:
+        return frame + b'\x00\x00\x00\x01' + bytes([NAL_FILLER]) + b'\xff' * (need - 6) + b'\x80'
+    return frame
+
+
+def _jpeg_comment(data):
+    return b'\xff\xfe' + struct.pack(">H", len(data) + 2) + data
@@ -1,12 +1,48 @@
 import asyncio
-import evdev
-from evdev import ecodes
+import time
+
+# evdev のイベント種別 (linux/input-event-codes.h)
+# evdev 本体は実機に接続するときだけ import する (トレース再生はevdevなしで動く)
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_ABS = 0x03
+
+def _open_gamepad():
+    """DS4 を探して開く (見つからなければ None)。ブロッキング"""
+    import evdev
+    found = None
+    for path in evdev.list_devices():
+        dev = evdev.InputDevice(path)
+        caps = dev.capabilities()
+        if found is None and "Wireless Controller" in dev.name and 1 in caps and 3 in caps \
+                and 304 in caps.get(1, []):
+            found = dev
+            try:
+                dev.grab() # 排他制御
+            except Exception:
+                pass
+        else:
+            dev.close()
+    return found
+
 
 class PS4Controller:
-    def __init__(self, device_path=None):
+    def __init__(self, device_path=None, record_path=None):
         self.device_path = device_path
         self.device = None
         self.connected = False
+
+        # 入力トレースの記録 (drivers/input_trace.py)
+        self.recorder = None
+        if record_path:
+            from drivers.input_trace import TraceWriter
+            self.recorder = TraceWriter(record_path)
+
+        # リンク状態 (共有状態ブロックに載せる)
+        self.event_count = 0
+        self.last_event = 0.0   # time.monotonic
+        self.last_report = 0.0  # 最後の SYN_REPORT (リンク断の検知に使う, core/failsafe.py)
+        self.disconnects = 0
         
         # 現在の入力状態を保持
         self.state = {
@@ -18,23 +54,24 @@ class PS4Controller:
             'fire': False       # 〇ボタン
         }
 
+    def neutral(self):
+        """入力を中立に戻す (リンク断のとき, core/failsafe.py)
+
+        evdev は変化した軸しか送らないので、復帰後は動かした軸から効く。
+        """
+        self.state.update(throttle=0.0, turn=0.0, turret_pan=0.0, turret_tilt=0.0, l2=0.0, fire=False)
+
     async def connect(self):
+        # デバイスの列挙・オープンは同期の I/O なので io スレッドで (core/runtime.py)
+        from core.runtime import run_io
         while not self.connected:
             print("Searching for Wireless Controller...")
-            devices = [evdev.InputDevice(path) for path in evdev.list_devices()]
-            for dev in devices:
-                caps = dev.capabilities()
-                if "Wireless Controller" in dev.name:
-                    if 1 in caps and 3 in caps: 
-                        if 304 in caps.get(1, []):
-                             self.device = dev
-                             self.connected = True
-                             try:
-                                 self.device.grab() # 排他制御
-                             except Exception:
-                                 pass
-                             print(f"Connected to Gamepad at {dev.path}")
-                             return
+            dev = await run_io(_open_gamepad)
+            if dev:
+                self.device = dev
+                self.connected = True
+                print(f"Connected to Gamepad at {dev.path}")
+                return
             await asyncio.sleep(2)
 
     async def listen(self):
@@ -44,15 +81,33 @@ class PS4Controller:
 
             try:
                 async for event in self.device.async_read_loop():
+                    if self.recorder:
+                        self.recorder.write(event)
                     self._process_event(event)
             except (OSError, asyncio.CancelledError):
                 print("Controller disconnected or loop cancelled.")
+                if self.connected:
+                    self.disconnects += 1
                 self.connected = False
                 self.device = None
                 await asyncio.sleep(1)
 
+    def close(self):
+        if self.recorder:
+            self.recorder.close()
+        if self.device:
+            try:
+                self.device.ungrab()
+            except Exception:
+                pass
+
     def _process_event(self, event):
-        if event.type == ecodes.EV_ABS:
+        self.event_count += 1
+        self.last_event = time.monotonic()
+        if event.type == EV_SYN and event.code == 0:
+            self.last_report = self.last_event
+
+        if event.type == EV_ABS:
             # スティック用正規化 (中心0, -1.0〜1.0)
             def normalize_stick(val):
                 centered = val - 127.5
@@ -86,6 +141,6 @@ class PS4Controller:
                 pass 
 
         # ボタン操作 (KEY)
-        elif event.type == ecodes.EV_KEY:
+        elif event.type == EV_KEY:
             if event.code == 305: # 〇ボタン
                 self.state['fire'] = (event.value == 1)
@@ -0,0 +1,174 @@
+# コントローラ入力トレース (記録と再生)
+# evdev の生イベントをタイムスタンプ付きでバイナリファイルに記録し、
+# 同じイベントを元の速度 (または倍速) で制御スタックに流し直す。
+#
+# ファイル形式 (リトルエンディアン)
+#   ヘッダ  16バイト: magic 'PZTR', version u16, 予約 u16, 記録開始時刻 f64 (epoch秒)
+#   レコード 12バイト: 前イベントからの経過 u32 (µs), type u16, code u16, value i32
+#
+#   python -m drivers.input_trace synth trace.bin --seconds 60
+#   python -m drivers.input_trace info trace.bin
+
+import asyncio
+import struct
+import time
+from collections import namedtuple
+
+from drivers.controller import PS4Controller, EV_SYN, EV_KEY, EV_ABS
+
+MAGIC = b"PZTR"
+VERSION = 1
+HEADER = struct.Struct("<4sHHd")
+RECORD = struct.Struct("<IHHi")
+MAX_DELTA = 0xFFFFFFFF
+FLUSH_INTERVAL = 1.0    # 記録中のフラッシュ間隔 (秒)
+
+# evdev.InputEvent と同じ属性名 (PS4Controller._process_event にそのまま渡せる)
+TraceEvent = namedtuple("TraceEvent", ("t", "type", "code", "value"))
+
+
+class TraceWriter:
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, "wb")
+        self.f.write(HEADER.pack(MAGIC, VERSION, 0, time.time()))
+        self.count = 0
+        self._last_us = None
+        self._last_flush = time.monotonic()
+
+    def write(self, event):
+        """evdev.InputEvent (sec/usec/type/code/value) を1件記録"""
+        us = event.sec * 1000000 + event.usec
+        delta = 0 if self._last_us is None else min(max(us - self._last_us, 0), MAX_DELTA)
+        self._last_us = us
+        self.f.write(RECORD.pack(delta, event.type, event.code, event.value))
+        self.count += 1
+
+        now = time.monotonic()
+        if now - self._last_flush >= FLUSH_INTERVAL:
+            self.f.flush()
+            self._last_flush = now
+
+    def close(self):
+        if not self.f.closed:
+            self.f.close()
+
+
+def read_trace(path):
+    """トレースを読み込んで TraceEvent のリストを返す (t は先頭からの秒数)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, _, _ = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not an input trace (v{version})")
+
+    events = []
+    t_us = 0
+    usable = HEADER.size + (len(data) - HEADER.size) // RECORD.size * RECORD.size
+    for delta, etype, code, value in RECORD.iter_unpack(data[HEADER.size:usable]):
+        t_us += delta
+        events.append(TraceEvent(t_us / 1e6, etype, code, value))
+    return events
+
+
+class ReplayController(PS4Controller):
+    """記録済みトレースを入力源にするコントローラ (evdev・実機不要)
+
+    speed: 1.0 = 記録どおり, 4.0 = 4倍速, 0 = 待ちなし (最大速度)
+    """
+
+    def __init__(self, path, speed=1.0, loop=False):
+        super().__init__()
+        self.events = read_trace(path)
+        if loop and not self.events:
+            raise ValueError(f"{path}: empty trace, nothing to loop")
+        self.speed = speed
+        self.loop = loop
+        self.finished = asyncio.Event()
+        self.on_event = None    # 計測用フック: on_event(event) を処理直後に呼ぶ
+
+    async def connect(self):
+        self.connected = True
+
+    async def listen(self):
+        await self.connect()
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            for i, event in enumerate(self.events):
+                if self.speed > 0:
+                    delay = start + event.t / self.speed - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif i % 256 == 0:
+                    await asyncio.sleep(0)      # 最大速度でも他のタスクを回す
+                self._process_event(event)
+                if self.on_event:
+                    self.on_event(event)
+            if not self.loop:
+                break
+            await asyncio.sleep(0)      # 一周ごとに必ず譲る (待ちなしの再生でループを占有しない)
+
+        self.connected = False
+        self.finished.set()
+
+
+# --- 合成トレース (実機なしでベンチマークするため) ---
+def synthesize(path, seconds=60.0, report_hz=250):
+    """DS4 らしいイベント列を生成: 約4ms毎のスティック/トリガー更新 + SYN_REPORT, 時々発砲"""
+    import math
+
+    class _Ev:
+        __slots__ = ("sec", "usec", "type", "code", "value")
+
+    writer = TraceWriter(path)
+    period_us = int(1e6 / report_hz)
+    for n in range(int(seconds * report_hz)):
+        t_us = n * period_us
+        t = t_us / 1e6
+        values = (
+            (EV_ABS, 1, int(127.5 - 127 * math.sin(t * 0.5))),      # 前後 (ゆっくり往復)
+            (EV_ABS, 0, int(127.5 + 60 * math.sin(t * 1.3))),       # 旋回
+            (EV_ABS, 3, int(127.5 + 127 * math.sin(t * 0.7))),      # 砲塔 左右
+            (EV_ABS, 4, int(127.5 + 40 * math.sin(t * 0.9))),       # 砲身 上下
+            (EV_ABS, 2, 255 if (n // report_hz) % 5 == 0 else 0),   # L2 (5秒毎に1秒)
+        )
+        if n % report_hz == report_hz // 2:
+            values += ((EV_KEY, 305, 1),)
+        elif n % report_hz == report_hz // 2 + 25:
+            values += ((EV_KEY, 305, 0),)
+        for etype, code, value in values + ((EV_SYN, 0, 0),):
+            ev = _Ev()
+            ev.sec, ev.usec = divmod(t_us, 1000000)
+            ev.type, ev.code, ev.value = etype, code, value
+            writer.write(ev)
+    writer.close()
+    return writer.count
+
+
+def _info(path):
+    events = read_trace(path)
+    if not events:
+        print(f"{path}: empty")
+        return
+    duration = events[-1].t
+    syn = sum(1 for e in events if e.type == EV_SYN and e.code == 0)
+    print(f"{path}: {len(events)} events, {duration:.2f} s, "
+          f"{syn} reports ({syn / duration if duration else 0:.0f}/s)")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="controller input traces")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_synth = sub.add_parser("synth", help="generate a synthetic DS4 trace")
+    p_synth.add_argument("path")
+    p_synth.add_argument("--seconds", type=float, default=60.0)
+    p_info = sub.add_parser("info", help="summarize a trace")
+    p_info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.cmd == "synth":
+        print(f"wrote {synthesize(args.path, args.seconds)} events to {args.path}")
+    else:
+        _info(args.path)
@@ -0,0 +1,50 @@
+# ベンチマーク用のアクチュエータ (モーター・サーボの代わり)
+# TankDriveSystem / TurretController と同じメソッドを持ち、
+# 呼ばれた時刻と値を記録するだけで何も動かさない。
+
+import asyncio
+import time
+from array import array
+
+
+class RecordingTank:
+    def __init__(self):
+        self.calls = 0
+        self.times = array('d')     # drive() が呼ばれた時刻 (time.monotonic)
+        self.current_left = 0.0
+        self.current_right = 0.0
+
+    def drive(self, throttle, turn):
+        self.calls += 1
+        self.times.append(time.monotonic())
+        self.current_left = max(min(throttle + turn, 1.0), -1.0)
+        self.current_right = max(min(throttle - turn, 1.0), -1.0)
+
+    def stop(self):
+        self.current_left = 0.0
+        self.current_right = 0.0
+
+
+class RecordingTurret:
+    def __init__(self):
+        self.calls = 0
+        self.shots = 0
+        self.times = array('d')     # set_turret() が呼ばれた時刻
+        self.pan = 0.0
+        self.tilt = 0.0
+
+    def set_turret(self, pan, tilt):
+        self.calls += 1
+        self.times.append(time.monotonic())
+        self.pan = pan
+        self.tilt = tilt
+
+    async def fire_gun(self):
+        self.shots += 1
+        await asyncio.sleep(0)
+
+
+def mock_pin_factory():
+    """実ドライバ (TankDriveSystem/TurretController) を実機なしで動かす gpiozero の MockFactory"""
+    from gpiozero.pins.mock import MockFactory, MockPWMPin
+    return MockFactory(pin_class=MockPWMPin)
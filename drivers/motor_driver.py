@@ -12,10 +12,11 @@
 
 import yaml
 from gpiozero import Motor
-from gpiozero.pins.pigpio import PiGPIOFactory # オプション: 高精度PWM用
+
+from drivers.pigpio_out import PWMPin, connection, server_batch, tick_batch
 
 class TankDriveSystem:
-    def __init__(self, config_path="config/config.yaml"):
+    def __init__(self, config_path="config/config.yaml", pin_factory=None):
         # 設定のロード
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
@@ -26,16 +27,28 @@ class TankDriveSystem:
         # Motorクラスは forward/backward ピンを指定するだけで、
         # 正転・逆転・ブレーキ・PWM制御を全部やってくれます。
         
+        # pin_factory を省略すると gpiozero の既定 (ベンチマーク時は MockFactory)
         self.left_motor = Motor(
             forward=drive_conf['motor_left']['pin_forward'],
-            backward=drive_conf['motor_left']['pin_backward']
+            backward=drive_conf['motor_left']['pin_backward'],
+            pin_factory=pin_factory
         )
         
         self.right_motor = Motor(
             forward=drive_conf['motor_right']['pin_forward'],
-            backward=drive_conf['motor_right']['pin_backward']
+            backward=drive_conf['motor_right']['pin_backward'],
+            pin_factory=pin_factory
         )
         
+        # pigpio なら毎ティックの書き込みは直接 (1回の batch で4本, drivers/pigpio_out.py)
+        self.pi = connection(self.left_motor.pin_factory)
+        if self.pi is not None:
+            self._pins = [
+                (PWMPin(self.pi, conf['pin_forward']), PWMPin(self.pi, conf['pin_backward']))
+                for conf in (drive_conf['motor_left'], drive_conf['motor_right'])
+            ]
+            server_batch(self.pi)   # PI_CMD_BATCH の有無はここ (io スレッド) で調べておく
+
         # 状態保持
         self.current_left = 0.0
         self.current_right = 0.0
@@ -49,11 +62,12 @@ class TankDriveSystem:
             
         return max(min(val, 1.0), -1.0)
 
-    def drive(self, throttle, turn):
+    def drive(self, throttle, turn, batch=None):
         """
         アーケードドライブ制御
         throttle: 前進/後退 (-1.0 ~ 1.0)
         turn: 旋回 (-1.0 ~ 1.0)
+        batch: pigpio の batch (渡されたらそこに積むだけで送らない)
         """
         max_s = self.config['drive_system'].get('max_speed', 1.0)
         throttle *= max_s
@@ -72,11 +86,28 @@ class TankDriveSystem:
         final_left = self._apply_motor_config(left_val, self.config['drive_system']['motor_left'])
         final_right = self._apply_motor_config(right_val, self.config['drive_system']['motor_right'])
         
+        self.current_left = final_left
+        self.current_right = final_right
+
+        if self.pi is not None:
+            if batch is not None:
+                self._write(batch, final_left, final_right)
+            else:
+                with tick_batch(self.pi) as b:
+                    self._write(b, final_left, final_right)
+            return
+
         # gpiozeroへの出力 (-1.0 ~ 1.0 を受け付ける)
         # valueプロパティに入れるだけでPWMと回転方向を自動制御
         self.left_motor.value = final_left
         self.right_motor.value = final_right
 
+    def _write(self, target, left, right):
+        # Motor.value と同じ: 回す向きのピンにデューティ、反対側は 0
+        for (forward, backward), value in zip(self._pins, (left, right)):
+            forward.write(target, max(value, 0.0))
+            backward.write(target, max(-value, 0.0))
+
     def stop(self):
         self.left_motor.value = 0
         self.right_motor.value = 0
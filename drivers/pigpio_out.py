@@ -0,0 +1,71 @@
+# 毎ティックの出力を gpiozero を通さず pigpio のコマンドで直接書く (batch で1往復にまとめるため)
+# gpiozero の PiGPIOPin は値を書くたびに get_PWM_range / get_PWM_dutycycle を読み直すので、
+# PWM ピン1本の書き込みが最大3往復になり、読んでから書くのでパイプラインにもできない。
+# 初期化と後始末は gpiozero のまま、レンジだけ起動時に1回読んでデューティをこちらで計算する。
+#
+#   with pi.batch() as b:            # pigpio-master/pigpio.py
+#       left.write(b, 0.5)           # set_PWM_dutycycle がキューに積まれるだけ
+#       pan.write_angle(b, 30)
+#                                    # with を抜けるときに1回の sendall と応答の読み出し
+#
+# pigpiod が PI_CMD_BATCH を知っていれば tick_batch(pi) は pi.exec_batch() を返す。
+# 積んだコマンドは1つの要求になり、pigpiod が続けて実行するので、モーター4本とサーボ2本が
+# ほぼ同時に変わる (pi.batch() ではコマンドごとに受信・実行・返信を繰り返す)。
+
+import weakref
+
+_SERVER_BATCH = weakref.WeakKeyDictionary()     # pigpio.pi -> PI_CMD_BATCH が使えるか
+
+
+def connection(factory):
+    """pin_factory が pigpio ならその pigpio.pi (MockFactory などは None)"""
+    return getattr(factory, 'connection', None)
+
+
+def server_batch(pi):
+    """pigpiod が PI_CMD_BATCH (pi.exec_batch) を受け付けるか (接続ごとに初回だけ問い合わせる)"""
+    known = _SERVER_BATCH.get(pi)
+    if known is None:
+        known = False
+        if hasattr(pi, 'exec_batch'):
+            import pigpio
+            try:
+                with pi.exec_batch() as b:
+                    b.get_mode(0)
+                    b.get_mode(1)
+                known = all(r >= 0 for r in b.results)
+            except pigpio.error:
+                pass    # 古い pigpiod は PI_UNKNOWN_COMMAND
+        _SERVER_BATCH[pi] = known
+    return known
+
+
+def tick_batch(pi):
+    """1ティック分の書き込みをまとめる先 (exec_batch が使えなければ pi.batch())"""
+    return pi.exec_batch() if server_batch(pi) else pi.batch()
+
+
+class PWMPin:
+    """gpiozero が PWM に設定したピン (PWMOutputDevice / Motor の片側)"""
+
+    def __init__(self, pi, gpio):
+        self.gpio = gpio
+        self.range = pi.get_PWM_range(gpio)
+
+    def write(self, target, value):
+        """value (0.0〜1.0) のデューティを target (pigpio.pi か batch) に書く"""
+        target.set_PWM_dutycycle(self.gpio, int(round(value * self.range)))
+
+
+class ServoPin(PWMPin):
+    """AngularServo と同じ換算 (角度 → パルス幅 → デューティ) で書く"""
+
+    def __init__(self, pi, gpio, servo):
+        super().__init__(pi, gpio)
+        self.min_angle = servo.min_angle
+        self.angle_range = servo.max_angle - servo.min_angle
+        self.min_duty = servo.min_pulse_width / servo.frame_width
+        self.duty_range = (servo.max_pulse_width - servo.min_pulse_width) / servo.frame_width
+
+    def write_angle(self, target, angle):
+        self.write(target, self.min_duty + self.duty_range * (angle - self.min_angle) / self.angle_range)
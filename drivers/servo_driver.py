@@ -7,11 +7,14 @@ from gpiozero import AngularServo, PWMLED
 from gpiozero.pins.pigpio import PiGPIOFactory
 import asyncio
 
+from drivers.pigpio_out import ServoPin, connection, server_batch, tick_batch
+
 
 class TurretController:
-    def __init__(self, config):
+    def __init__(self, config, pin_factory=None):
         self.config = config
-        self.factory = PiGPIOFactory()
+        # 通常は pigpio (ハードウェアタイミングのサーボパルス)。ベンチマーク時は差し替え可
+        self.factory = pin_factory or PiGPIOFactory()
 
         # ---- Pan servo ----
         c_pan = self.config['pan']
@@ -52,6 +55,13 @@ class TurretController:
             pin_factory=self.factory,
         )
 
+        # pigpio なら set_turret は直接書く (drivers/pigpio_out.py)
+        self.pi = connection(self.factory)
+        if self.pi is not None:
+            self._pan_pin = ServoPin(self.pi, c_pan['pin'], self.pan_servo)
+            self._tilt_pin = ServoPin(self.pi, c_tilt['pin'], self.tilt_servo)
+            server_batch(self.pi)
+
         if 'led_pin' in c_fire:
             self.muzzle_flash = PWMLED(c_fire['led_pin'], pin_factory=self.factory)
             self.flash_duration = c_fire.get('flash_duration', 0.05)
@@ -59,30 +69,50 @@ class TurretController:
             self.muzzle_flash = None
             self.flash_duration = 0.05
 
-    def set_turret(self, pan, tilt):
+    def set_turret(self, pan, tilt, batch=None):
+        # batch: pigpio の batch (渡されたらそこに積むだけで送らない)
         # 角度はここでもクリップしておく（端の唸り対策）
         c_pan = self.config['pan']
         c_tilt = self.config['tilt']
         pan = max(min(pan, c_pan.get('max_angle', 90)), c_pan.get('min_angle', -90))
         tilt = max(min(tilt, c_tilt.get('max_angle', 45)), c_tilt.get('min_angle', -45))
 
+        if self.pi is not None:
+            if batch is not None:
+                self._write(batch, pan, tilt)
+            else:
+                with tick_batch(self.pi) as b:
+                    self._write(b, pan, tilt)
+            return
+
         try:
             self.pan_servo.angle = pan
             self.tilt_servo.angle = tilt
         except ValueError:
             pass
 
+    def _write(self, target, pan, tilt):
+        self._pan_pin.write_angle(target, pan)
+        self._tilt_pin.write_angle(target, tilt)
+
+    def _recoil(self, angle, flash):
+        if self.muzzle_flash and flash is not None:
+            self.muzzle_flash.value = flash
+        self.fire_servo.angle = angle
+
+    def _flash(self, value):
+        self.muzzle_flash.value = value
+
     async def fire_gun(self):
+        # サーボ・LED への書き込みは pigpio の往復なので hw スレッドで (set_turret と同じ順序で出る)
+        from core.runtime import hw
         c_fire = self.config['fire']
 
-        if self.muzzle_flash:
-            self.muzzle_flash.value = 1.0
-
-        self.fire_servo.angle = c_fire['recoil_angle']
+        await hw().run(self._recoil, c_fire['recoil_angle'], 1.0)
 
         if self.muzzle_flash:
             await asyncio.sleep(self.flash_duration)
-            self.muzzle_flash.value = 0.0
+            await hw().run(self._flash, 0.0)
 
         await asyncio.sleep(0.1)
-        self.fire_servo.angle = c_fire['normal_angle']
+        await hw().run(self._recoil, c_fire['normal_angle'], None)
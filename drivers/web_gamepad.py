@@ -0,0 +1,188 @@
+# ブラウザのゲームパッド (Gamepad API) を入力源にする
+# Bluetooth の DS4 は Zero では Wi-Fi (映像) と無線を取り合うので、その代わりの経路。
+#
+#   ブラウザ (web/gamepad.js) ─ 60Hz のバイナリ入力フレーム (core/telemetry.py) ─▶ /ws
+#     ─▶ GamepadReceiver (Webプロセス): 古いフレームを捨てて InputBlock (共有メモリ) に書く
+#     ─▶ WebGamepadController (制御プロセス): InputBlock を読み、PS4Controller と同じ state を埋める
+#
+# 古いフレームの扱い
+#   - フレーム番号がセッション内で進んでいないもの (再送・順序の入れ替わり) は捨てる
+#   - Wi-Fi の詰まりのあとにまとめて届いたもの (最良の片道遅延より STALE_MS 以上遅いもの) も捨てる。
+#     次の新しいフレームが同じ内容の最新値を運んでくるので、古いスティック位置で走らせない
+#   - 別のタブ (別セッション) は、今のセッションが TAKEOVER 秒黙るまで操縦を奪えない
+
+import asyncio
+import time
+
+from core.control import TickStats
+from core.telemetry import decode_input, encode_input_ack
+from drivers.controller import PS4Controller
+
+STALE_MS = 100.0        # 最良の片道遅延からこれ以上遅れて着いたフレームは捨てる (ms)
+TAKEOVER = 0.5          # 別セッションが操縦を引き継げるまでの無音時間 (秒)
+OFFSET_WINDOW = 10.0    # 最良の片道遅延 (時計差込み) を取り直す間隔 (秒)
+STATS_WINDOW = 600      # 遅延統計のサンプル数 (60Hz で約10秒分)
+
+POLL_INTERVAL = 0.008   # 制御プロセス側で共有ブロックを見る間隔 (60Hz の約2倍)
+LINK_TIMEOUT = 0.5      # フレームが途絶えてから切断とみなすまで (秒)
+DEADZONE = 10 / 127.5   # PS4Controller と同じ不感帯
+BUTTON_FIRE = 1         # 標準配置の右ボタン (DS4 の〇)
+
+
+class GamepadReceiver:
+    """Webプロセス側: 入力フレームを検査して InputBlock に書き、応答を返す"""
+
+    def __init__(self, block, stale_ms=STALE_MS):
+        self.block = block
+        self.stale_ms = stale_ms
+        self.session = None
+        self.last_seq = 0
+        self.last_accept = 0.0
+        # 時計差 + 最良の片道遅延 (ms)。窓ごとに取り直して経路の変化に追従する
+        self.best = self.best_next = float("inf")
+        self.window_start = 0.0
+
+        self.accepted = 0
+        self.stale = 0          # 遅れて着いたので捨てた
+        self.out_of_order = 0   # 番号が進んでいないので捨てた
+        self.rejected = 0       # 別セッションが操縦中だったので捨てた
+        self.invalid = 0        # 版違いで読めなかった (main.py の ws_handler が数える)
+        self.takeovers = 0
+        self.rtt = TickStats(STATS_WINDOW)          # ブラウザで測った往復 (ms)
+        self.delay = TickStats(STATS_WINDOW)        # 最良の片道からの遅れ (ms)
+        self.interval = TickStats(STATS_WINDOW)     # 受け付けたフレームの間隔 (ms)
+
+    def receive(self, data, now=None):
+        """入力フレームなら処理して応答 (bytes) を返す。入力フレームでなければ None"""
+        frame = decode_input(data)
+        if frame is None:
+            return None
+        now = time.monotonic() if now is None else now
+
+        if frame.session != self.session:
+            if self.session is not None and now - self.last_accept < TAKEOVER:
+                self.rejected += 1
+                return encode_input_ack(frame, stale=True)
+            self.session = frame.session
+            self.last_seq = (frame.seq - 1) & 0xFFFFFFFF
+            self.best = self.best_next = float("inf")
+            self.window_start = now
+            self.takeovers += 1
+
+        # 番号は 32bit で一周するので差で比べる
+        if not 0 < (frame.seq - self.last_seq) & 0xFFFFFFFF < 0x80000000:
+            self.out_of_order += 1
+            return encode_input_ack(frame, stale=True)
+        self.last_seq = frame.seq
+
+        offset = now * 1000.0 - frame.sent_ms
+        if now - self.window_start >= OFFSET_WINDOW:
+            self.best, self.best_next = self.best_next, float("inf")
+            self.window_start = now
+        self.best_next = min(self.best_next, offset)
+        self.best = min(self.best, offset)
+        late = offset - self.best
+        self.delay.add(late)
+        if frame.rtt:
+            self.rtt.add(frame.rtt / 10.0)
+        if late > self.stale_ms:
+            self.stale += 1
+            return encode_input_ack(frame, stale=True)
+
+        if self.accepted:
+            self.interval.add((now - self.last_accept) * 1000.0)
+        self.accepted += 1
+        self.last_accept = now
+        self.block.update(
+            frames=self.accepted, frame_seq=frame.seq, session=frame.session, buttons=frame.buttons,
+            lx=frame.lx / 32767.0, ly=frame.ly / 32767.0, rx=frame.rx / 32767.0, ry=frame.ry / 32767.0,
+            l2=frame.l2 / 255.0, r2=frame.r2 / 255.0
+        )
+        return encode_input_ack(frame)
+
+    def fields(self):
+        """/metrics に載せる値"""
+        rtt50, rtt99, _ = self.rtt.percentiles()
+        late50, late99, late_max = self.delay.percentiles()
+        _, gap99, gap_max = self.interval.percentiles()
+        return {
+            "session": self.session,
+            "frames": self.accepted,
+            "stale": self.stale,
+            "out_of_order": self.out_of_order,
+            "rejected": self.rejected,
+            "invalid": self.invalid,
+            "takeovers": self.takeovers,
+            "age_ms": round((time.monotonic() - self.last_accept) * 1000.0, 1) if self.accepted else None,
+            "rtt_p50_ms": round(rtt50, 2),
+            "rtt_p99_ms": round(rtt99, 2),
+            "late_p50_ms": round(late50, 2),
+            "late_p99_ms": round(late99, 2),
+            "late_max_ms": round(late_max, 2),
+            "interval_p99_ms": round(gap99, 2),
+            "interval_max_ms": round(gap_max, 2),
+        }
+
+
+def _deadzone(value):
+    return 0.0 if abs(value) < DEADZONE else value
+
+
+class WebGamepadController(PS4Controller):
+    """制御プロセス側: InputBlock を読んで PS4Controller と同じ state を埋める (evdev 不要)"""
+
+    def __init__(self, name=None, poll=POLL_INTERVAL):
+        super().__init__()
+        self.block_name = name
+        self.block = None
+        self.poll = poll
+        self._frames = 0
+        self._buttons = 0
+
+    async def listen(self):
+        from core.state import InputBlock
+        self.block = InputBlock.attach(self.block_name)
+        print("Waiting for a browser gamepad...")
+        while True:
+            self._poll(time.monotonic())
+            await asyncio.sleep(self.poll)
+
+    def _poll(self, now):
+        # 書き手は優先度の低い Web プロセスなので待たない (書き込み中なら前回の値, 次の poll で取り直す)
+        snap = self.block.try_snapshot()
+        if snap.frames != self._frames:
+            self._frames = snap.frames
+            self._apply(snap)
+            self.event_count = snap.frames
+            # 受け付けた時刻 (Webプロセス側) をそのまま使う: 入力の経過・リンク断の検知に Web 側の遅れも含める
+            self.last_event = self.last_report = snap.updated
+
+        connected = bool(self.last_report) and now - self.last_report < LINK_TIMEOUT
+        if connected != self.connected:
+            if connected:
+                print(f"Browser gamepad connected (session {snap.session:04x})")
+            else:
+                self.disconnects += 1
+                print("Browser gamepad lost")
+            self.connected = connected
+
+    def _apply(self, snap):
+        state = self.state
+        state['throttle'] = -_deadzone(snap.ly)
+        state['turn'] = _deadzone(snap.lx)
+        state['turret_pan'] = _deadzone(snap.rx)
+        state['turret_tilt'] = -_deadzone(snap.ry)
+        state['l2'] = snap.l2
+
+        # 主砲は押した瞬間に1回 (DS4 の EV_KEY value==1 と同じ)
+        fire = 1 << BUTTON_FIRE
+        if snap.buttons & fire and not self._buttons & fire:
+            state['fire'] = True
+        elif self._buttons & fire and not snap.buttons & fire:
+            state['fire'] = False
+        self._buttons = snap.buttons
+
+    def close(self):
+        if self.block:
+            self.block.close()
+            self.block = None
@@ -0,0 +1,236 @@
+# 観戦ハブ: 複数の戦車ノード (main.py) をまとめて1つの観戦UIで配信する
+# 各ノードへは 映像 (/stream) と 状態 (/ws) を1本ずつだけ張り、観客はハブにつなぐ。
+# 観客が何人増えても、ノード (Zero) から見た視聴者はハブ1人のまま。
+#
+#   映像: ノードの /stream → HttpSource → Camera (最新フレームだけを配る) → /stream/<n>
+#   状態: ノードの /ws (バイナリテレメトリ) → 最新メッセージを保持 → /ws にノード番号を付けて転送
+#
+#   python hub.py --node alpha=http://192.168.0.11:8080 --node bravo=http://192.168.0.12:8080
+#   python hub.py --standin 3            # ローカルの代役ノード (sim/fake_node.py) で試す
+
+import argparse
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+
+from core.streaming import stream_mjpeg
+from core.telemetry import FLEET_ONLINE, FLEET_PREFIX, MSG_STATE, SIZE, decode
+from drivers.camera import Camera
+from drivers.capture import HttpSource
+
+PUSH_INTERVAL = 0.05    # 観客への転送 (ノードと同じ20Hz)
+RECONNECT = 2.0         # ノードの /ws が切れたときの再接続間隔 (秒)
+
+# ノード一覧 (並び順がノード番号)
+NODES = []
+# 観客の /ws 接続数
+SPECTATORS = 0
+
+
+class Node:
+    """ハブから見た戦車ノード1台 (映像・状態の上流接続を1本ずつ持つ)"""
+
+    def __init__(self, index, name, url):
+        self.index = index
+        self.name = name
+        self.url = url.rstrip("/")
+        self.camera = Camera(source=HttpSource(self.url + "/stream"))
+        self.message = None         # 直近の STATE メッセージ (ノードが送ったバイト列そのまま)
+        self.message_time = 0.0     # 受け取った時刻 (time.monotonic)
+        self.online = False
+        self.version = 0            # 状態が変わるたびに増える (観客への差分送信用)
+        self.reconnects = 0
+        self._task = None
+
+    async def start(self, session):
+        await self.camera.start()
+        self._task = asyncio.create_task(self._follow_state(session))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        await self.camera.stop()
+
+    async def _follow_state(self, session):
+        while True:
+            try:
+                async with session.ws_connect(self.url + "/ws", heartbeat=10) as ws:
+                    self._set_online(True)
+                    async for msg in ws:
+                        data = msg.data
+                        if msg.type == aiohttp.WSMsgType.BINARY and len(data) >= SIZE and data[1] == MSG_STATE:
+                            self.message = data[:SIZE]
+                            self.message_time = time.monotonic()
+                            self.version += 1
+            except (aiohttp.ClientError, OSError, asyncio.TimeoutError):
+                pass
+            if self.online:
+                self.reconnects += 1
+                print(f"Hub: lost {self.name} ({self.url}), reconnecting")
+            self._set_online(False)
+            await asyncio.sleep(RECONNECT)
+
+    def _set_online(self, online):
+        if online != self.online:
+            self.online = online
+            self.version += 1
+
+    def info(self):
+        """/fleet に載せる値"""
+        state = None
+        if self.message:
+            t = decode(self.message)
+            state = {
+                "speed": round(t.speed, 3), "pan": round(t.pan, 1), "tilt": round(t.tilt, 1),
+                "fire_seq": t.fire_seq, "mg_seq": t.mg_seq, "input_age_ms": round(t.input_age, 1),
+                "tick_p99_ms": round(t.tick_p99, 3),
+            }
+        return {
+            "index": self.index,
+            "name": self.name,
+            "url": self.url,
+            "online": self.online,
+            "reconnects": self.reconnects,
+            "state": state,
+            "state_age_ms": round((time.monotonic() - self.message_time) * 1000.0, 1) if self.message else None,
+            "video": {
+                "frames": self.camera.frame_count,
+                "age_ms": round((time.time() - self.camera.frame_time) * 1000.0, 1) if self.camera.frame_count else None,
+                "viewers": self.camera.viewers,
+            },
+        }
+
+
+# --- 観客向け ---
+async def stream_handler(request):
+    try:
+        node = NODES[int(request.match_info["index"])]
+    except (ValueError, IndexError):
+        raise web.HTTPNotFound()
+    return await stream_mjpeg(request, node.camera)
+
+
+async def fleet_handler(request):
+    return web.json_response({
+        "spectators": SPECTATORS,
+        "nodes": [node.info() for node in NODES],
+    })
+
+
+async def status_handler(request):
+    # main.py の /status と同じく age_ms を返す (bench/bench_viewers.py でハブも測れるように)
+    ages = [time.monotonic() - n.message_time for n in NODES if n.message]
+    return web.json_response({
+        "nodes": len(NODES),
+        "online": sum(n.online for n in NODES),
+        "age_ms": round(max(ages) * 1000.0, 1) if ages else None,
+    })
+
+
+async def _push_fleet(ws):
+    # ノードごとに最後に送った版を覚えておき、変わったノードだけ送る
+    sent = [None] * len(NODES)
+    buf = bytearray(FLEET_PREFIX.size + SIZE)
+    while not ws.closed:
+        for node in NODES:
+            if node.message is None or sent[node.index] == node.version:
+                continue
+            sent[node.index] = node.version
+            FLEET_PREFIX.pack_into(buf, 0, node.index, FLEET_ONLINE if node.online else 0)
+            buf[FLEET_PREFIX.size:] = node.message
+            await ws.send_bytes(buf)
+        await asyncio.sleep(PUSH_INTERVAL)
+
+
+async def ws_handler(request):
+    global SPECTATORS
+    ws = web.WebSocketResponse(heartbeat=10)
+    await ws.prepare(request)
+    SPECTATORS += 1
+    push = asyncio.create_task(_push_fleet(ws))
+    try:
+        # 観客からの入力は受け付けない (close を処理するために読む)
+        async for msg in ws:
+            pass
+    finally:
+        push.cancel()
+        SPECTATORS -= 1
+    return ws
+
+
+async def handle_index(request):
+    return web.FileResponse('./web/hub.html')
+
+
+# --- メインエントリ ---
+def parse_node(text):
+    """NAME=URL (名前を省くと URL のホスト名)"""
+    name, sep, url = text.partition("=")
+    if not sep:
+        name, url = text.split("//")[-1].split(":")[0], text
+    if "://" not in url:
+        url = "http://" + url
+    return name, url
+
+
+async def main(args):
+    standins = []
+    nodes = [parse_node(n) for n in args.node]
+    if args.standin:
+        from sim.fake_node import FakeNode
+        for i in range(args.standin):
+            fake = FakeNode(f"standin-{i}", seed=i)
+            port = await fake.start()
+            standins.append(fake)
+            nodes.append((fake.name, f"http://127.0.0.1:{port}"))
+    if not nodes:
+        raise SystemExit("no nodes (use --node NAME=URL or --standin N)")
+
+    session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None, sock_connect=5))
+    for i, (name, url) in enumerate(nodes):
+        node = Node(i, name, url)
+        NODES.append(node)
+        await node.start(session)
+
+    app = web.Application()
+    app.router.add_get('/', handle_index)
+    app.router.add_get('/stream/{index}', stream_handler)
+    app.router.add_get('/fleet', fleet_handler)
+    app.router.add_get('/status', status_handler)
+    app.router.add_get('/ws', ws_handler)
+    app.router.add_static('/static/', path='./web/', name='static')
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    print(f"=== Panzer Vor! Fleet Hub: {len(NODES)} tanks ===")
+    for node in NODES:
+        print(f"  [{node.index}] {node.name}  {node.url}")
+    print(f"Access: http://<IP>:{args.port}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for node in NODES:
+            await node.stop()
+        await session.close()
+        await runner.cleanup()
+        for fake in standins:
+            await fake.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Panzer Vor! fleet hub for spectators")
+    parser.add_argument("--node", action="append", default=[], metavar="NAME=URL",
+                        help="tank node to aggregate (repeatable), e.g. alpha=http://192.168.0.11:8080")
+    parser.add_argument("--standin", type=int, default=0, metavar="N",
+                        help="also start N local stand-in nodes (sim/fake_node.py)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8090)
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        print("\nHub stopped.")
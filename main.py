@@ -1,306 +1,253 @@
 import asyncio
-import yaml
+import argparse
+import contextlib
+import logging
+import multiprocessing
+import signal
 import sys
 import os
-from drivers.motor_driver import TankDriveSystem
-from drivers.servo_driver import TurretController
-from drivers.controller import PS4Controller
-from aiohttp import web
+import time
+from core.startup import Timeline, process_start
+# --profile-startup は import 時間も計るので argparse より先に見る
+STARTUP = Timeline(process_start(), enabled="--profile-startup" in sys.argv)
+STARTUP.mark("interpreter ready")
+
+from core.state import StateBlock, InputBlock
+from core.control import start_control_process, stop_control_process
+from core.telemetry import TelemetryEncoder
+from drivers.camera import Camera
+with STARTUP.step("import aiohttp"):
+    from aiohttp import web
+from core.streaming import stream_mjpeg
 import json
 
-# グローバル状態
-GAME_STATE = {
-    "fired": False,
-    "machinegun": False,
-    "speed": 0.0
-}
+# 制御プロセスと共有する状態 (制御プロセスが書き、Web側は読むだけ)
+STATE = None
+# Web側で最後に通知した発砲イベント番号
+_seen_fire_seq = 0
+# 制御プロセス
+CONTROL_PROC = None
+# 共有カメラ (起動直後から動かしておく)
+CAMERA = None
+# ブラウザのゲームパッド入力 (--input web のときだけ, drivers/web_gamepad.py)
+GAMEPAD = None
+# 熱・電圧低下のガバナー (core/governor.py)
+GOVERNOR = None
+# Web側イベントループの停滞検出 (core/runtime.py)
+LOOP_MONITOR = None
 
 # --- Pi Zero W用 軽量MJPEGストリーミング ---
 async def mjpeg_handler(request):
-    boundary = "frame"
-    response = web.StreamResponse(
-        status=200,
-        headers={
-            'Content-Type': f'multipart/x-mixed-replace;boundary={boundary}',
-            'Cache-Control': 'no-cache',
-            'Connection': 'close',
-        }
-    )
-    await response.prepare(request)
-    
-    # 画質設定: 320x240, 10fps, 500kbps
-    cmd = ['raspivid', '-t', '0', '-w', '320', '-h', '240', '-fps', '10', 
-           '-cd', 'MJPEG', '-b', '500000', '-o', '-', '-n']
-    
-    proc = await asyncio.create_subprocess_exec(
-        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
-    )
-
-    buffer = b''
-    try:
-        while True:
-            chunk = await proc.stdout.read(4096)
-            if not chunk: break
-            buffer += chunk
-
-            while True:
-                start = buffer.find(b'\xff\xd8')
-                end = buffer.find(b'\xff\xd9')
-                if start != -1 and end != -1 and start < end:
-                    jpg = buffer[start:end+2]
-                    buffer = buffer[end+2:]
-                    await response.write(f'--{boundary}\r\n'.encode())
-                    await response.write(b'Content-Type: image/jpeg\r\n')
-                    await response.write(f'Content-Length: {len(jpg)}\r\n\r\n'.encode())
-                    await response.write(jpg)
-                    await response.write(b'\r\n')
-                else:
-                    if len(buffer) > 100000: buffer = b''
-                    break
-    except: pass
-    finally:
-        if proc.returncode is None:
-            try: proc.terminate(); await proc.wait()
-            except: pass
-    return response
+    return await stream_mjpeg(request, CAMERA)
 
 # --- ステータス配信 ---
 async def status_handler(request):
-    global GAME_STATE
-    current_state = GAME_STATE.copy()
-    # 発砲フラグは一度送ったら下げる（音の重複防止）
-    if GAME_STATE["fired"]: GAME_STATE["fired"] = False
-    return web.json_response(current_state)
-
-# --- Web UI (フル機能版) ---
-async def handle_index(request):
-    html = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Panzer Vor! Mission Control</title>
-        <style>
-            body { font-family: 'Courier New', sans-serif; text-align: center; background: #1a1a1a; color: #0f0; margin: 0; }
-            h1 { text-shadow: 0 0 10px #0f0; margin-top: 10px; }
-            .container { 
-                margin: 10px auto; width: 324px; height: 244px; 
-                background: #000; border: 2px solid #555; position: relative;
-                box-shadow: 0 0 20px rgba(0, 255, 0, 0.2);
+    global _seen_fire_seq
+    snap = STATE.snapshot()
+    # 発砲イベント番号が進んでいたら一度だけ fired を返す（音の重複防止）
+    fired = snap.fire_seq != _seen_fire_seq
+    _seen_fire_seq = snap.fire_seq
+    return web.json_response({
+        "fired": fired,
+        "machinegun": bool(snap.machinegun),
+        "speed": snap.speed,
+        # 制御プロセスが最後に書いてからの経過 (負荷試験で状態の鮮度を見る)
+        "age_ms": round((time.monotonic() - snap.updated) * 1000.0, 1) if snap.updated else None
+    })
+
+# --- 制御ループの計測値 ---
+async def metrics_handler(request):
+    snap = STATE.snapshot()
+    return web.json_response({
+        "control": {
+            "alive": CONTROL_PROC is not None and CONTROL_PROC.is_alive(),
+            # 書き込み途中のまま読めず、前回の値を返した回数 (制御プロセスが書き込み中に落ちた)
+            "state_stale_reads": STATE.stale_reads,
+            "ticks": snap.tick_count,
+            "tick_p50_ms": round(snap.tick_p50, 3),
+            "tick_p99_ms": round(snap.tick_p99, 3),
+            "tick_max_ms": round(snap.tick_max, 3)
+        },
+        "link": {
+            "up": bool(snap.link_up),
+            "input_events": snap.input_events,
+            "input_age_ms": round(snap.input_age, 1),
+            "drops": snap.link_drops,
+            "failsafe": {
+                "active": bool(snap.failsafe_active),
+                "trips": snap.failsafe_trips,
+                "detect_ms": round(snap.failsafe_detect, 1),
+                "detect_max_ms": round(snap.failsafe_detect_max, 1)
             }
-            img { width: 320px; height: 240px; object-fit: contain; display: block; margin: 2px; }
-            
-            button { 
-                padding: 10px 30px; font-size: 1.2em; font-weight: bold;
-                background: #c00; color: #fff; border: 2px solid #fff; 
-                cursor: pointer; text-transform: uppercase; letter-spacing: 2px;
-                transition: all 0.3s;
-            }
-            button:hover { background: #f00; box-shadow: 0 0 15px #f00; }
-            button:disabled { background: #333; border-color: #555; color: #888; box-shadow: none; }
-            
-            .controls { width: 300px; margin: 15px auto; text-align: left; background: #222; padding: 10px; border-radius: 5px; }
-            input[type=range] { width: 100%; cursor: pointer; }
-            .status-bar { margin-top: 10px; font-size: 0.9em; color: #888; }
-            .active { color: #0f0; font-weight: bold; }
-        </style>
-    </head>
-    <body>
-        <h1>PANZER VOR!</h1>
-
-        <div class="container">
-            <img id="cam" alt="SYSTEM OFFLINE" />
-        </div>
-
-        <button id="start-btn" onclick="startSystem()">ENGINE START</button>
-
-        <div class="controls">
-            <label>MASTER VOLUME: <span id="vol-disp">50%</span></label>
-            <input type="range" min="0" max="100" value="50" oninput="updateVolume(this.value)">
-        </div>
-        
-        <div class="status-bar">
-            SYSTEM STATUS: <span id="sys-status" class="active">STANDBY</span>
-        </div>
-
-        <script>
-            // 効果音設定
-            const sounds = {
-                fire: new Audio('/sounds/lepard2a5_fire_01.mp3'),
-                idle: new Audio('/sounds/leopard2a5_idring_01.mp3'),
-                drive: new Audio('/sounds/leopard2a5_go_01.mp3'),
-                mg: new Audio('/sounds/leopard2a5_machinegun_01.mp3')
-            };
-
-            sounds.idle.loop = true;
-            sounds.drive.loop = true;
-            sounds.mg.loop = true;
-
-            let masterVol = 0.5;
-            let polling = null;
-
-            function updateVolume(val) {
-                masterVol = val / 100.0;
-                document.getElementById('vol-disp').innerText = val + "%";
-                sounds.fire.volume = masterVol;
-                sounds.mg.volume = masterVol;
-            }
-
-            async function startSystem() {
-                const btn = document.getElementById('start-btn');
-                btn.disabled = true; btn.innerText = "INITIALIZING...";
-
-                // 音声の事前ロードと再生許可トリガー
-                try {
-                    await Promise.all(Object.values(sounds).map(s => {
-                        return s.play().then(() => { s.pause(); s.currentTime = 0; });
-                    }));
-                } catch (e) {
-                    console.error(e);
-                    btn.innerText = "AUDIO ERROR (CLICK TO RETRY)";
-                    btn.disabled = false;
-                    return;
-                }
-
-                // エンジン始動
-                sounds.idle.volume = masterVol; sounds.idle.play();
-                sounds.drive.volume = 0; sounds.drive.play();
-                
-                // カメラ始動 (キャッシュ回避)
-                document.getElementById('cam').src = "/stream?" + Date.now();
-                
-                btn.style.display = 'none';
-                document.getElementById('sys-status').innerText = "ONLINE - COMBAT READY";
-                
-                // ポーリング開始 (Zero負荷軽減のため200ms間隔)
-                if (!polling) polling = setInterval(syncStatus, 200);
-            }
-
-            async function syncStatus() {
-                try {
-                    const res = await fetch('/status');
-                    const data = await res.json();
-
-                    // 発砲音
-                    if (data.fired) {
-                        sounds.fire.currentTime = 0;
-                        sounds.fire.play().catch(()=>{});
-                    }
-
-                    // マシンガン
-                    if (data.machinegun) {
-                        if (sounds.mg.paused) sounds.mg.play().catch(()=>{});
-                    } else {
-                        sounds.mg.pause(); sounds.mg.currentTime = 0;
-                    }
-
-                    // エンジン音のクロスフェード
-                    const spd = data.speed;
-                    const idleVol = Math.max(0, 1.0 - (spd * 1.5)) * masterVol;
-                    const driveVol = Math.min(1.0, spd * 1.2) * masterVol;
-
-                    // ピッチ変化
-                    sounds.idle.playbackRate = 1.0 + (spd * 0.2);
-                    sounds.drive.playbackRate = 0.8 + (spd * 0.8);
-
-                    // 音量適用 (簡易的なスムージング)
-                    sounds.idle.volume = sounds.idle.volume * 0.8 + idleVol * 0.2;
-                    sounds.drive.volume = sounds.drive.volume * 0.8 + driveVol * 0.2;
-
-                } catch (e) {}
+        },
+        "runtime": {
+            "web": LOOP_MONITOR.fields() if LOOP_MONITOR else None,
+            "control": {
+                "stalls": snap.loop_stalls,
+                "worst_ms": round(snap.loop_stall_max, 1),
+                "hw_wait_p99_ms": round(snap.hw_wait_p99, 3),
+                "hw_coalesced": snap.hw_coalesced
             }
-        </script>
-    </body>
-    </html>
-    """
-    return web.Response(text=html, content_type='text/html')
-
-# --- 制御ループ (砲塔・走行) ---
-async def control_loop(tank, turret, controller):
-    print("Control Logic Started")
-    pan_angle = 0
-    tilt_angle = 0
-    
-    while True:
-        try:
-            if not controller.state:
-                await asyncio.sleep(0.1)
-                continue
-
-            # 1. 走行制御
-            thr = controller.state.get('throttle', 0)
-            trn = controller.state.get('turn', 0)
-            tank.drive(thr, trn)
-            GAME_STATE["speed"] = max(abs(thr), abs(trn))
-
-            # 2. 砲塔制御 (相対移動 & 制限)
-            # 右スティック入力を取得
-            t_pan = controller.state.get('turret_pan', 0)   # 左右
-            t_tilt = controller.state.get('turret_tilt', 0) # 上下
-
-            if abs(t_pan) > 0.1 or abs(t_tilt) > 0.1:
-                # 入力がある場合だけ角度を更新 (感度調整: *3, *2)
-                pan_angle += t_pan * 3.0
-                tilt_angle += t_tilt * 2.0
-                
-                # 角度制限 (サーボの限界に合わせて調整してください)
-                pan_angle = max(-90, min(90, pan_angle))
-                tilt_angle = max(-20, min(40, tilt_angle))
-                
-                turret.set_turret(pan_angle, tilt_angle)
-
-            # 3. 武装制御
-            # L2ボタンで機銃
-            l2 = controller.state.get('l2', -1.0)
-            GAME_STATE["machinegun"] = (l2 > 0.1)
-
-            # R2または特定ボタンで主砲
-            if controller.state.get('fire'):
-                GAME_STATE["fired"] = True
-                asyncio.create_task(turret.fire_gun())
-                controller.state['fire'] = False
+        },
+        "gamepad": GAMEPAD.fields() if GAMEPAD else None,
+        "governor": GOVERNOR.fields() if GOVERNOR else None
+    })
+
+# --- 状態プッシュ (WebSocket) ---
+PUSH_INTERVAL = 0.05    # 制御ループと同じ20Hz
+
+async def _push_state(ws):
+    # バイナリテレメトリ (core/telemetry.py)。送信バッファはクライアントごとに使い回す
+    encoder = TelemetryEncoder()
+    last = None
+    while not ws.closed:
+        snap = STATE.snapshot()
+        key = (round(snap.speed, 3), round(snap.pan, 1), round(snap.tilt, 1),
+               snap.machinegun, snap.link_up, snap.fire_seq, snap.mg_seq, snap.link_drops)
+        # 変化があったときだけ送る
+        if key != last:
+            try:
+                await ws.send_bytes(encoder.encode(snap))
+            except ConnectionResetError:
+                return      # ws.closed を見た後にクライアントが切れた
+            last = key
+        # 熱・電圧低下のときはガバナーが間隔を広げる
+        await asyncio.sleep(GOVERNOR.push_interval if GOVERNOR else PUSH_INTERVAL)
+
+async def ws_handler(request):
+    ws = web.WebSocketResponse(heartbeat=10)
+    await ws.prepare(request)
+    push = asyncio.create_task(_push_state(ws))
+    try:
+        # 受信はブラウザのゲームパッド入力 (--input web のとき)。フレームごとに応答を返す
+        async for msg in ws:
+            if GAMEPAD and msg.type == web.WSMsgType.BINARY:
+                try:
+                    ack = GAMEPAD.receive(msg.data)
+                except ValueError:
+                    # 版違いのフレーム (キャッシュに残った古いページなど) は捨てて、接続とプッシュは保つ
+                    GAMEPAD.invalid += 1
+                    continue
+                if ack:
+                    try:
+                        await ws.send_bytes(ack)
+                    except ConnectionResetError:
+                        break
+    finally:
+        push.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await push
+    return ws
 
-            await asyncio.sleep(0.05) # 20Hz制御
-            
-        except Exception as e:
-            print(f"Ctrl Error: {e}")
-            await asyncio.sleep(1)
+# --- Web UI (フル機能版) ---
+async def handle_index(request):
+    return web.FileResponse('./web/index.html')
 
 # --- メインエントリ ---
-async def main():
-    # 設定読み込み
-    config = {}
-    if os.path.exists("config/config.yaml"):
-        with open("config/config.yaml") as f: config = yaml.safe_load(f)
-
-    # ハードウェア初期化
-    tank = TankDriveSystem()
-    turret = TurretController(config.get('turret_system', {}))
-    controller = PS4Controller()
-
-    # Webサーバーセットアップ
+def synthetic_camera(path):
+    """--synthetic-camera: raspivid の代わりに合成フレーム (path があればその MJPEG) を流す"""
+    from drivers.capture import SyntheticSource, jpeg_frames, load_frames
+    codec, frames = load_frames(path) if path else ("mjpeg", jpeg_frames())
+    if codec != "mjpeg" or not frames:
+        raise SystemExit(f"{path}: /stream needs MJPEG frames")
+    return SyntheticSource(frames, fps=10, codec=codec)
+
+async def main(web_ready, camera_source=None, governor_sensor=None, stall_ms=None):
+    global CAMERA, GOVERNOR, LOOP_MONITOR
+    from core.runtime import LoopMonitor, STALL_MS
+    # SIGTERM (kill や bench_viewers の terminate) も Ctrl-C と同じく __main__ の finally を通す
+    # (制御プロセスの後始末と共有メモリの解放)
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    LOOP_MONITOR = LoopMonitor(stall_ms or STALL_MS, name="web loop").install()
+
+    # 1. カメラを最初に起動 (raspivid の立ち上がりを他の初期化と重ねる)
+    CAMERA = Camera(on_frame=lambda jpg: STARTUP.once("time-to-first-frame"), source=camera_source)
+    await CAMERA.start()
+    STARTUP.mark("camera started")
+    if governor_sensor is not None:
+        from core.governor import Governor
+        GOVERNOR = Governor(governor_sensor, camera=CAMERA, state=STATE)
+        asyncio.create_task(GOVERNOR.run())
+
+    # 2. Webサーバーセットアップ
     app = web.Application()
     app.router.add_get('/', handle_index)
     app.router.add_get('/stream', mjpeg_handler)
     app.router.add_get('/status', status_handler)
-    
+    app.router.add_get('/metrics', metrics_handler)
+    app.router.add_get('/ws', ws_handler)
+
     # 重要: 音声ファイルへのパスを通す
     # soundsフォルダがないとブラウザで404エラーになります
     app.router.add_static('/sounds/', path='./sounds/', name='sounds')
+    # UI のスクリプト類
+    app.router.add_static('/static/', path='./web/', name='static')
 
     runner = web.AppRunner(app)
     await runner.setup()
     await web.TCPSite(runner, '0.0.0.0', 8080).start()
+    STARTUP.mark("web server listening")
     print("=== Panzer Vor! System Online ===")
     print("Access: http://<IP>:8080")
 
-    # 全タスク並列実行
-    await asyncio.gather(
-        controller.listen(),
-        control_loop(tank, turret, controller)
-    )
+    # 3. Webが立ち上がったら制御プロセスにハードウェア初期化を始めさせる
+    web_ready.set()
+
+    # Web側は配信のみ。制御は別プロセスで動き続ける
+    await asyncio.Event().wait()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Panzer Vor! tank control server")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print an import/init timeline (time-to-first-frame, time-to-drive)")
+    parser.add_argument("--record-input", metavar="PATH",
+                        help="record raw controller events to a binary trace file")
+    parser.add_argument("--replay-input", metavar="PATH",
+                        help="drive from a recorded input trace instead of the controller")
+    parser.add_argument("--synthetic-camera", metavar="MJPEG", nargs="?", const="",
+                        help="stream generated frames (or frames from an MJPEG file) instead of raspivid")
+    parser.add_argument("--input", choices=("ds4", "web"), default="ds4",
+                        help="drive from the Bluetooth DS4 or from a gamepad in the browser (Gamepad API)")
+    parser.add_argument("--governor-sensor", metavar="JSON",
+                        help="feed the thermal governor from a JSON file instead of /sys (for testing)")
+    parser.add_argument("--stall-ms", type=float,
+                        help="log event-loop callbacks that block longer than this (default 20, both processes)")
+    parser.add_argument("--no-governor", action="store_true",
+                        help="do not scale the stream down on heat, throttling or undervoltage")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+    governor_sensor = None
+    if not args.no_governor:
+        from core.governor import FileSensor, SysSensor
+        governor_sensor = FileSensor(args.governor_sensor) if args.governor_sensor else SysSensor()
+    camera_source = synthetic_camera(args.synthetic_camera) if args.synthetic_camera is not None else None
+
+    # 制御プロセスはイベントループ開始前に fork しておく
+    # (ハードウェア初期化・入力読み取り・モーター出力はすべて子プロセス側)
+    # ただし単一コアのZeroではWeb・カメラを先に立ち上げたいので、
+    # 子プロセスは web_ready が立つまで重い import/初期化を待つ。
+    # 共有状態ブロックは名前付きなので、別プロセスからも attach できる
+    STATE = StateBlock()
+    if args.input == "web":
+        from drivers.web_gamepad import GamepadReceiver
+        GAMEPAD = GamepadReceiver(InputBlock())
+    web_ready = multiprocessing.get_context("fork").Event()
+    CONTROL_PROC = start_control_process(
+        STATE, ready=web_ready, timeline=STARTUP.child("control"),
+        record_path=args.record_input, replay_path=args.replay_input, web_input=args.input == "web",
+        stall_ms=args.stall_ms
+    )
+    STARTUP.mark("control process forked")
+    interrupted = False
     try:
-        asyncio.run(main())
+        asyncio.run(main(web_ready, camera_source, governor_sensor, args.stall_ms))
     except KeyboardInterrupt:
-        print("\nMission Aborted.")
\ No newline at end of file
+        interrupted = True
+        print("\nMission Aborted.")
+    except asyncio.CancelledError:
+        print("Mission Aborted (SIGTERM).")
+    finally:
+        stop_control_process(CONTROL_PROC, interrupted)
+        STATE.close()
+        if GAMEPAD:
+            GAMEPAD.block.close()
\ No newline at end of file
@@ -56,6 +56,7 @@ For more information, please refer to <http://unlicense.org/>
 #include <sys/stat.h>
 #include <sys/file.h>
 #include <sys/socket.h>
+#include <sys/un.h>
 #include <sys/sysmacros.h>
 #include <netinet/tcp.h>
 #include <arpa/inet.h>
@@ -1240,6 +1241,8 @@ static uint32_t sockNetAddr[MAX_CONNECT_ADDRESSES];
 
 static int numSockNetAddr = 0;
 
+static char sockUnixPath[PI_MAX_SOCKET_PATH];
+
 static uint32_t reportedLevel = 0;
 
 static int waveClockInited = 0;
@@ -1292,6 +1295,7 @@ static volatile int runState = PI_STARTING;
 static int pthAlertRunning  = PI_THREAD_NONE;
 static int pthFifoRunning   = PI_THREAD_NONE;
 static int pthSocketRunning = PI_THREAD_NONE;
+static int pthSocketUnixRunning = PI_THREAD_NONE;
 
 static gpioAlert_t      gpioAlert  [PI_MAX_USER_GPIO+1];
 
@@ -1328,6 +1332,7 @@ static FILE * outFifo = NULL;
 static int fdLock       = -1;
 static int fdMem        = -1;
 static int fdSock       = -1;
+static int fdSockUnix   = -1;
 static int fdPmap       = -1;
 static int fdMbox       = -1;
 
@@ -1384,6 +1389,7 @@ static unsigned bufferCycles; /* number of cycles */
 static pthread_t pthAlert;
 static pthread_t pthFifo;
 static pthread_t pthSocket;
+static pthread_t pthSocketUnix;
 
 static uint32_t spi_dummy;
 
@@ -7017,6 +7023,115 @@ static void * pthFifoThread(void *x)
 
 /* ----------------------------------------------------------------------- */
 
+static int myBatchable(unsigned cmd)
+{
+   switch (cmd)
+   {
+      /* commands which send an extension */
+
+      case PI_CMD_BI2CO:
+      case PI_CMD_BSPIO:
+      case PI_CMD_CF1:
+      case PI_CMD_FN:
+      case PI_CMD_FO:
+      case PI_CMD_FS:
+      case PI_CMD_FW:
+      case PI_CMD_HP:
+      case PI_CMD_I2CO:
+      case PI_CMD_I2CPC:
+      case PI_CMD_I2CWB:
+      case PI_CMD_I2CWD:
+      case PI_CMD_I2CWI:
+      case PI_CMD_I2CWK:
+      case PI_CMD_I2CWW:
+      case PI_CMD_PROC:
+      case PI_CMD_PROCR:
+      case PI_CMD_PROCU:
+      case PI_CMD_SERO:
+      case PI_CMD_SERW:
+      case PI_CMD_SHELL:
+      case PI_CMD_SLRO:
+      case PI_CMD_SPIO:
+      case PI_CMD_SPIW:
+      case PI_CMD_TRIG:
+      case PI_CMD_WVAG:
+      case PI_CMD_WVAS:
+      case PI_CMD_WVCHA:
+
+      /* commands which return an extension */
+
+      case PI_CMD_BI2CZ:
+      case PI_CMD_BSCX:
+      case PI_CMD_CF2:
+      case PI_CMD_FL:
+      case PI_CMD_FR:
+      case PI_CMD_I2CPK:
+      case PI_CMD_I2CRD:
+      case PI_CMD_I2CRI:
+      case PI_CMD_I2CRK:
+      case PI_CMD_I2CZ:
+      case PI_CMD_PROCP:
+      case PI_CMD_SERR:
+      case PI_CMD_SLR:
+      case PI_CMD_SPIX:
+      case PI_CMD_SPIR:
+      case PI_CMD_BSPIX:
+
+      /* socket only */
+
+      case PI_CMD_NOIB:
+      case PI_CMD_BATCH:
+
+         return 0;
+
+      default:
+         return 1;
+   }
+}
+
+/* ----------------------------------------------------------------------- */
+
+static int myDoBatch(unsigned len, char *buf)
+{
+   uintptr_t p[10];
+   uint32_t cmd[3];
+   char ext[4];
+   int i, count, res;
+
+   /* buf holds count (cmd, p1, p2) triples.  Each result is written
+      back over the start of buf, result i never overlaps a triple
+      still to be read.
+   */
+
+   if ((len == 0) || (len % sizeof(cmd))) return PI_BAD_BATCH;
+
+   count = len / sizeof(cmd);
+
+   for (i=0; i<count; i++)
+   {
+      memcpy(cmd, buf + (i * sizeof(cmd)), sizeof(cmd));
+
+      if (myBatchable(cmd[0]))
+      {
+         p[0] = cmd[0];
+         p[1] = cmd[1];
+         p[2] = cmd[2];
+         p[3] = 0;
+
+         ext[0] = 0;
+
+         res = myDoCommand(p, 0, ext);
+      }
+      else res = PI_BAD_BATCH;
+
+      memcpy(buf + (i * 4), &res, 4);
+   }
+
+   return count * 4;
+}
+
+/* ----------------------------------------------------------------------- */
+
 static void *pthSocketThreadHandler(void *fdC)
 {
    int sock = *(int*)fdC;
@@ -7108,6 +7223,10 @@ static void *pthSocketThreadHandler(void *fdC)
             }
             break;
 
+         case PI_CMD_BATCH:
+            p[3] = myDoBatch(p[3], buf);
+            break;
+
          default:
             p[3] = myDoCommand(p, sizeof(buf)-1, buf);
       }
@@ -7143,6 +7262,7 @@ static void *pthSocketThreadHandler(void *fdC)
          case PI_CMD_SPIX:
          case PI_CMD_SPIR:
          case PI_CMD_BSPIX:
+         case PI_CMD_BATCH:
 
             if (((int)p[3]) > 0)
             {
@@ -7171,6 +7291,9 @@ static int addrAllowed(struct sockaddr *saddr)
 
    if (!numSockNetAddr) return 1;
 
+   /* local clients, see gpioCfgSocketPath */
+   if (saddr->sa_family == AF_UNIX) return 1;
+
    // FIXME: add IPv6 whitelisting support
    if (saddr->sa_family != AF_INET) return 0;
 
@@ -7187,6 +7310,7 @@ static int addrAllowed(struct sockaddr *saddr)
 
 static void * pthSocketThread(void *x)
 {
+   int fdListen = *(int*)x;
    int fdC=0, c, *sock;
    struct sockaddr_storage client;
    pthread_attr_t attr;
@@ -7206,7 +7330,7 @@ static void * pthSocketThread(void *x)
    /* fdSock opened in gpioInitialise so that we can treat
       failure to bind as fatal. */
 
-   listen(fdSock, 100);
+   listen(fdListen, 100);
 
    c = sizeof(client);
 
@@ -7218,7 +7342,7 @@ static void * pthSocketThread(void *x)
    {
       pthread_t thr;
 
-      fdC = accept(fdSock, (struct sockaddr *)&client, (socklen_t*)&c);
+      fdC = accept(fdListen, (struct sockaddr *)&client, (socklen_t*)&c);
 
       closeOrphanedNotifications(-1, fdC);
 
@@ -7969,6 +8093,7 @@ static void initClearGlobals(void)
    pthAlertRunning  = PI_THREAD_NONE;
    pthFifoRunning   = PI_THREAD_NONE;
    pthSocketRunning = PI_THREAD_NONE;
+   pthSocketUnixRunning = PI_THREAD_NONE;
 
    wfc[0] = 0;
    wfc[1] = 0;
@@ -8051,6 +8176,7 @@ static void initClearGlobals(void)
    fdLock       = -1;
    fdMem        = -1;
    fdSock       = -1;
+   fdSockUnix   = -1;
 
    dmaMboxBlk = MAP_FAILED;
    dmaPMapBlk = MAP_FAILED;
@@ -8120,6 +8246,13 @@ static void initReleaseResources(void)
       pthSocketRunning = PI_THREAD_NONE;
    }
 
+   if (pthSocketUnixRunning != PI_THREAD_NONE)
+   {
+      pthread_cancel(pthSocketUnix);
+      pthread_join(pthSocketUnix, NULL);
+      pthSocketUnixRunning = PI_THREAD_NONE;
+   }
+
    /* release mmap'd memory */
 
    if (auxReg  != MAP_FAILED) munmap((void *)auxReg,  AUX_LEN);
@@ -8224,6 +8357,13 @@ static void initReleaseResources(void)
       fdSock = -1;
    }
 
+   if (fdSockUnix != -1)
+   {
+      close(fdSockUnix);
+      unlink(sockUnixPath);
+      fdSockUnix = -1;
+   }
+
    if (fdPmap != -1)
    {
       close(fdPmap);
@@ -8240,6 +8380,8 @@ static void initReleaseResources(void)
    gpioStats.dmaInitCbsCount = 0;
 
    numSockNetAddr = 0;
+
+   sockUnixPath[0] = 0;
 }
 
 int initInitialise(void)
@@ -8248,6 +8390,7 @@ int initInitialise(void)
    unsigned rev, model;
    struct sockaddr_in server;
    struct sockaddr_in6 server6;
+   struct sockaddr_un serverUnix;
    char * portStr;
    unsigned port;
    struct sched_param param;
@@ -8425,12 +8568,42 @@ int initInitialise(void)
             SOFT_ERROR(PI_INIT_FAILED, "bind to port %d failed (%m)", port);
       }
 
-      if (pthread_create(&pthSocket, &pthAttr, pthSocketThread, &i))
+      if (pthread_create(&pthSocket, &pthAttr, pthSocketThread, &fdSock))
          SOFT_ERROR(PI_INIT_FAILED, "pthread_create socket failed (%m)");
 
       pthSocketRunning = PI_THREAD_STARTED;
    }
 
+   /* The Unix domain socket is configured separately from the TCP
+      port so it may be the only socket (-k -u path). */
+
+   if (sockUnixPath[0])
+   {
+      fdSockUnix = socket(AF_UNIX, SOCK_STREAM, 0);
+
+      if (fdSockUnix == -1)
+         SOFT_ERROR(PI_INIT_FAILED, "unix socket failed (%m)");
+
+      bzero((char *)&serverUnix, sizeof(serverUnix));
+      serverUnix.sun_family = AF_UNIX;
+      strcpy(serverUnix.sun_path, sockUnixPath);
+
+      unlink(sockUnixPath);
+
+      if (bind(fdSockUnix, (struct sockaddr *)&serverUnix,
+         sizeof(serverUnix)) < 0)
+         SOFT_ERROR(PI_INIT_FAILED, "bind to %s failed (%m)", sockUnixPath);
+
+      if (chmod(sockUnixPath, 0666) < 0)
+         SOFT_ERROR(PI_INIT_FAILED, "chmod %s failed (%m)", sockUnixPath);
+
+      if (pthread_create(&pthSocketUnix, &pthAttr, pthSocketThread,
+         &fdSockUnix))
+         SOFT_ERROR(PI_INIT_FAILED, "pthread_create unix socket failed (%m)");
+
+      pthSocketUnixRunning = PI_THREAD_STARTED;
+   }
+
    myGpioDelay(1000);
 
    dmaInitCbs();
@@ -14014,6 +14187,23 @@ int gpioCfgNetAddr(int numSockAddr, uint32_t *sockAddr)
 }
 
 
+/* ----------------------------------------------------------------------- */
+
+int gpioCfgSocketPath(const char *path)
+{
+   DBG(DBG_USER, "path=%s", path);
+
+   CHECK_NOT_INITED;
+
+   if (strlen(path) >= PI_MAX_SOCKET_PATH)
+      SOFT_ERROR(PI_BAD_PATHNAME, "bad path (%s)", path);
+
+   strcpy(sockUnixPath, path);
+
+   return 0;
+}
+
+
 /* ----------------------------------------------------------------------- */
 
 uint32_t gpioCfgGetInternals(void)
@@ -385,6 +385,7 @@ gpioCfgDMAchannels         Configure the DMA channels
 gpioCfgPermissions         Configure the GPIO access permissions
 gpioCfgInterfaces          Configure user interfaces
 gpioCfgSocketPort          Configure socket port
+gpioCfgSocketPath          Configure Unix domain socket path
 gpioCfgMemAlloc            Configure DMA memory allocation mode
 gpioCfgNetAddr             Configure allowed network addresses
 
@@ -883,6 +884,10 @@ typedef void *(gpioThreadFunc_t) (void *);
 #define PI_MIN_SOCKET_PORT 1024
 #define PI_MAX_SOCKET_PORT 32000
 
+/* gpioCfgSocketPath: sizeof(sun_path) */
+
+#define PI_MAX_SOCKET_PATH 108
+
 
 /* ifFlags: */
 
@@ -4919,6 +4924,30 @@ The default setting is to use port 8888.
 D*/
 
 
+/*F*/
+int gpioCfgSocketPath(const char *path);
+/*D
+Configures pigpio to also listen on a Unix domain socket at path.
+
+This function is only effective if called before [*gpioInitialise*].
+
+. .
+path: the socket path, less than PI_MAX_SOCKET_PATH characters,
+      or "" for no Unix domain socket.
+. .
+
+Clients on the same machine may connect to the path instead of
+the TCP port.  The command and notification protocol is the same
+but a round trip costs less than over TCP loopback.
+
+Any existing file at path is removed.  The socket is created
+with permissions 0666, like the TCP port it may be used by any
+local user.
+
+The default setting is no Unix domain socket.
+D*/
+
+
 /*F*/
 int gpioCfgInterfaces(unsigned ifFlags);
 /*D
@@ -5538,6 +5567,7 @@ These functions are only effective if called before [*gpioInitialise*].
 [*gpioCfgPermissions*] 
 [*gpioCfgInterfaces*] 
 [*gpioCfgSocketPort*] 
+[*gpioCfgSocketPath*] 
 [*gpioCfgMemAlloc*]
 
 gpioGetSamplesFunc_t::
@@ -6317,6 +6347,8 @@ PARAMS*/
 #define PI_CMD_PROCU 117
 #define PI_CMD_WVCAP 118
 
+#define PI_CMD_BATCH 119
+
 /*DEF_E*/
 
 /*
@@ -6329,6 +6361,17 @@ The socket should be dedicated to receiving notifications
 after this command is issued.
 */
 
+/*
+PI CMD_BATCH only works on the socket interface.
+The extension holds a list of commands, each as three 32-bit
+words (cmd, p1, p2).  The commands are run one after the other
+without reading the socket in between and the extension
+returned holds one 32-bit result per command.
+
+Commands which send or return an extension can't be batched,
+their result is PI_BAD_BATCH.
+*/
+
 /* pseudo commands */
 
 #define PI_CMD_SCRIPT 800
@@ -6528,6 +6571,7 @@ after this command is issued.
 #define PI_CMD_INTERRUPTED -144 // Used by Python
 #define PI_NOT_ON_BCM2711  -145 // not available on BCM2711
 #define PI_ONLY_ON_BCM2711 -146 // only available on BCM2711
+#define PI_BAD_BATCH       -147 // command can't be batched
 
 #define PI_PIGIF_ERR_0    -2000
 #define PI_PIGIF_ERR_99   -2099
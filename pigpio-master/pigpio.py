@@ -144,8 +144,10 @@ set_bank_1                Set selected GPIO in bank 1
 set_bank_2                Set selected GPIO in bank 2
 
 callback                  Create GPIO level change callback
+bulk_callback             Create GPIO level change callback (arrays)
 
 wait_for_edge             Wait for GPIO level change
+edge_waiter               Wait repeatedly for GPIO level changes
 
 ADVANCED
 
@@ -154,6 +156,9 @@ notify_begin              Start notifications for selected GPIO
 notify_pause              Pause notifications
 notify_close              Close a notification
 
+notify_stats              Get lost and queued notification counts
+set_notify_queue_size     Set the notification dispatch queue size
+
 hardware_clock            Start hardware clock on supported GPIO
 
 hardware_PWM              Start hardware PWM on supported GPIO
@@ -178,6 +183,7 @@ event_callback            Sets a callback for an event
 event_trigger             Triggers an event
 
 wait_for_event            Wait for an event
+event_waiter              Wait repeatedly for an event
 
 Scripts
 
@@ -316,6 +322,9 @@ UTILITIES
 
 get_current_tick          Get current tick (microseconds)
 
+batch                     Pipeline several commands
+exec_batch                Run several commands in one request
+
 get_hardware_revision     Get hardware revision
 get_pigpio_version        Get the pigpio version
 
@@ -330,6 +339,8 @@ import time
 import threading
 import os
 import atexit
+import array
+import collections
 
 VERSION = "1.78"  # sync minor number to pigpio library version
 
@@ -574,6 +585,8 @@ _PI_CMD_EVT  =116
 _PI_CMD_PROCU=117
 _PI_CMD_WVCAP=118
 
+_PI_CMD_BATCH=119
+
 # pigpio error numbers
 
 _PI_INIT_FAILED     =-1
@@ -723,6 +736,7 @@ PI_BAD_EVENT_ID     =-143
 PI_CMD_INTERRUPTED  =-144
 PI_NOT_ON_BCM2711   =-145
 PI_ONLY_ON_BCM2711  =-146
+PI_BAD_BATCH        =-147
 
 # pigpio error text
 
@@ -871,6 +885,7 @@ _errors=[
    [PI_CMD_INTERRUPTED   , "pigpio command interrupted"],
    [PI_NOT_ON_BCM2711    , "not available on BCM2711"],
    [PI_ONLY_ON_BCM2711   , "only available on BCM2711"],
+   [PI_BAD_BATCH         , "command can't be batched"],
 ]
 
 _except_a = "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n{}"
@@ -1117,114 +1132,462 @@ class _callback_ADT:
       self.func = func
       self.bit = 1<<gpio
 
+def _wide_ticks(ticks, high):
+   """
+   Returns the 32 bit ticks (an array('I')) as an array('Q') of
+   64 bit ticks with the given upper word.
+   """
+   wide = array.array('Q', bytes(8 * len(ticks)))
+   words = memoryview(wide).cast('B').cast('I')
+   lo = 0 if sys.byteorder == 'little' else 1
+   words[lo::2] = ticks
+   words[1-lo::2] = array.array('I', [high]) * len(ticks)
+   return wide
+
+class _bulk_ADT:
+   """An ADT class to hold bulk edge callback information."""
+
+   def __init__(self, bits, func, wide_ticks, use_numpy):
+      """
+      Initialises a bulk edge callback ADT.
+
+            bits:= the GPIO as a bit mask.
+            func:= a user function taking two arguments (ticks, levels).
+      wide_ticks:= True to deliver wrap corrected 64 bit ticks.
+       use_numpy:= True to deliver NumPy arrays.
+      """
+      self.bits = bits
+      self.func = func
+      self.wide = wide_ticks
+      self.numpy = use_numpy
+      self.edges = 0
+      self.high = 0       # upper word of the 64 bit ticks
+      self.last_tick = None
+      self.ticks = array.array('I')
+      self.levels = array.array('I')
+
+   def _widen(self, ticks):
+      # A chunk spans far less than the 72 minute tick period so it
+      # holds at most one wrap.
+      high = self.high
+      if self.last_tick is not None and ticks[0] < self.last_tick:
+         high += 1
+      split = len(ticks)
+      if ticks[-1] < ticks[0]:
+         for i in range(1, len(ticks)):
+            if ticks[i] < ticks[i-1]:
+               split = i
+               break
+      self.high = high + (split < len(ticks))
+      self.last_tick = ticks[-1]
+      return _wide_ticks(ticks[:split], high) + _wide_ticks(ticks[split:], self.high)
+
+   def deliver(self):
+      """Calls the user function with the edges queued from a chunk."""
+      ticks, levels = self.ticks, self.levels
+      self.ticks = array.array('I')
+      self.levels = array.array('I')
+      self.edges += len(ticks)
+      if self.wide:
+         ticks = self._widen(ticks)
+      self.func(ticks, levels)
+
+   def deliver_numpy(self, np, records, level):
+      """
+      Selects and delivers the edges of a chunk with NumPy.
+
+      records:= the chunk's reports as a structured array.
+        level:= the levels before the chunk.
+      """
+      reports = records[records['flags'] == 0]
+      if not len(reports):
+         return
+      levels = reports['level']
+      prev = np.empty_like(levels)
+      prev[0] = level
+      prev[1:] = levels[:-1]
+      mask = ((levels ^ prev) & self.bits) != 0
+      if not mask.any():
+         return
+      levels = levels[mask]
+      ticks = reports['tick'][mask]
+      if self.wide:
+         t = ticks.astype(np.int64)
+         last = t[0] if self.last_tick is None else self.last_tick
+         wraps = np.cumsum(np.diff(t, prepend=last) < 0) + self.high
+         ticks = (t + (wraps << 32)).astype(np.uint64)
+         self.high = int(wraps[-1])
+         self.last_tick = int(t[-1])
+      self.edges += len(ticks)
+      self.func(ticks, levels)
+
+# Notification report: seq, flags, tick, level.
+_NOTIFY_MSG = struct.Struct('HHII')
+_NOTIFY_BUF_SIZ = 65532 # a whole number of reports
+_NOTIFY_QUEUE_SIZ = 65536 # reports waiting for the dispatcher
+
+def _local_host(host):
+   """Returns True if host only resolves to loopback addresses."""
+   try:
+      addrs = [info[4][0] for info in socket.getaddrinfo(host, None)]
+   except socket.error:
+      return False
+   for addr in addrs:
+      if not (addr.startswith('127.') or addr == '::1'):
+         return False
+   return len(addrs) > 0
+
+def _connect(host, port, unix_path=None):
+   """
+   Returns a socket connected to the daemon's Unix domain socket
+   if unix_path is set, otherwise to its TCP port.
+   """
+   if unix_path:
+      s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+      try:
+         s.connect(unix_path)
+      except socket.error:
+         s.close()
+         raise
+      return s
+   return socket.create_connection((host, port), None)
+
 class _callback_thread(threading.Thread):
    """A class to encapsulate pigpio notification callbacks."""
-   def __init__(self, control, host, port):
-      """Initialises notifications."""
+   def __init__(self, control, host, port, fifo=False, unix_path=None):
+      """
+      Initialises notifications.
+
+           fifo:= True to read a notification pipe (/dev/pigpioN),
+                  False to use a second socket.
+      unix_path:= the daemon's Unix domain socket, if used.
+      """
       threading.Thread.__init__(self)
       self.control = control
       self.sl = _socklock()
+      self.fd = None
       self.go = False
       self.daemon = True
       self.monitor = 0
       self.event_bits = 0
       self.callbacks = []
       self.events = []
-      self.sl.s = socket.create_connection((host, port), None)
-      self.lastLevel = _pigpio_command(self.sl,  _PI_CMD_BR1, 0, 0)
-      self.handle = _u2i(_pigpio_command(self.sl, _PI_CMD_NOIB, 0, 0))
+      # Dispatch tables with a slot per GPIO (or event).  A slot holds
+      # a tuple which is replaced, never changed, so run() needs no lock.
+      self.rising = [()] * 32    # called when the GPIO goes high
+      self.falling = [()] * 32   # called when the GPIO goes low
+      self.watchdogs = [()] * 32 # every callback on the GPIO
+      self.event_slots = [()] * 32
+      # Bulk edge callbacks (array and NumPy delivery).
+      self.bulk = ()
+      self.bulk_np = ()
+      self.bulk_bits = 0
+      self.np = None
+      self.np_dtype = None
+      self.tlock = threading.Lock()
+      # The reader (this thread) only receives and checks reports,
+      # the dispatcher thread decodes them and runs the callbacks so
+      # a slow callback doesn't stop the socket being drained.
+      self.queue = collections.deque()
+      self.queue_size = _NOTIFY_QUEUE_SIZ
+      self.ready = threading.Event()
+      self.received = 0   # reports read from the socket
+      self.lost = 0       # reports dropped by pigpiod (seq gaps)
+      self.overflowed = 0 # reports dropped because the queue was full
+      self.queued = 0     # reports put on the queue
+      self.max_queued = 0
+      self.dispatched = 0 # reports taken off the queue
+      self.dispatcher = threading.Thread(target=self.dispatch)
+      self.dispatcher.daemon = True
+      if fifo:
+         self._open_fifo()
+      if self.fd is None:
+         self.sl.s = _connect(host, port, unix_path)
+         self.lastLevel = _pigpio_command(self.sl,  _PI_CMD_BR1, 0, 0)
+         self.handle = _u2i(_pigpio_command(self.sl, _PI_CMD_NOIB, 0, 0))
+         self.read_into = self.sl.s.recv_into
       self.go = True
+      self.dispatcher.start()
       self.start()
 
+   def _open_fifo(self):
+      """
+      Opens a notification pipe, leaves fd None if that isn't
+      possible (e.g. the pipe is on another machine).
+      """
+      try:
+         handle = _u2i(_pigpio_command(self.control, _PI_CMD_NO, 0, 0))
+      except error:
+         return
+      if handle < 0:
+         return
+      try:
+         # The daemon holds the pipe open for reading and writing so
+         # this doesn't block, reads end when the daemon closes it.
+         fd = os.open(os.getenv("PIGPIO_FIFO", "/dev/pigpio") + str(handle),
+            os.O_RDONLY | os.O_NONBLOCK)
+      except OSError:
+         _pigpio_command(self.control, _PI_CMD_NC, handle, 0)
+         return
+      os.set_blocking(fd, True)
+      self.fd = fd
+      self.handle = handle
+      self.lastLevel = _pigpio_command(self.control, _PI_CMD_BR1, 0, 0)
+      self.read_into = lambda b: os.readv(fd, [b])
+
    def stop(self):
       """Stops notifications."""
       if self.go:
          self.go = False
-         self.sl.s.send(struct.pack('IIII', _PI_CMD_NC, self.handle, 0, 0))
+         try:
+            if self.fd is None:
+               self.sl.s.send(struct.pack('IIII', _PI_CMD_NC, self.handle, 0, 0))
+            else:
+               _pigpio_command(self.control, _PI_CMD_NC, self.handle, 0)
+         except (socket.error, struct.error, AttributeError):
+            pass # the socket is already closed (e.g. the daemon went away)
+
+   def _index(self, gpio):
+      """Rebuilds the slots of a GPIO, returns True if any are used."""
+      if not 0 <= gpio < 32:
+         return False
+      cbs = tuple(cb for cb in self.callbacks if cb.gpio == gpio)
+      self.rising[gpio] = tuple(cb for cb in cbs if cb.edge != FALLING_EDGE)
+      self.falling[gpio] = tuple(cb for cb in cbs if cb.edge != RISING_EDGE)
+      self.watchdogs[gpio] = cbs
+      return len(cbs) > 0
+
+   def _index_event(self, event):
+      """Rebuilds the slot of an event, returns True if it is used."""
+      if not 0 <= event < 32:
+         return False
+      cbs = tuple(cb for cb in self.events if cb.event == event)
+      self.event_slots[event] = cbs
+      return len(cbs) > 0
 
    def append(self, callb):
       """Adds a callback to the notification thread."""
-      self.callbacks.append(callb)
-      self.monitor = self.monitor | callb.bit
-      _pigpio_command(self.control, _PI_CMD_NB, self.handle, self.monitor)
+      with self.tlock:
+         self.callbacks.append(callb)
+         self._index(callb.gpio)
+         if not self.monitor & callb.bit:
+            self.monitor = self.monitor | callb.bit
+            _pigpio_command(self.control, _PI_CMD_NB, self.handle, self.monitor)
 
    def remove(self, callb):
       """Removes a callback from the notification thread."""
-      if callb in self.callbacks:
-         self.callbacks.remove(callb)
-         newMonitor = 0
-         for c in self.callbacks:
-            newMonitor |= c.bit
-         if newMonitor != self.monitor:
-            self.monitor = newMonitor
-            _pigpio_command(
-               self.control, _PI_CMD_NB, self.handle, self.monitor)
+      with self.tlock:
+         if callb in self.callbacks:
+            self.callbacks.remove(callb)
+            if (not self._index(callb.gpio) and
+                self.monitor & callb.bit & ~self._bulk_wanted()):
+               self.monitor = self.monitor & ~callb.bit
+               _pigpio_command(
+                  self.control, _PI_CMD_NB, self.handle, self.monitor)
+
+   def _bulk_wanted(self):
+      """Returns the GPIO bits wanted by bulk edge callbacks."""
+      bits = 0
+      for b in self.bulk + self.bulk_np:
+         bits |= b.bits
+      return bits
+
+   def append_bulk(self, bulk):
+      """Adds a bulk edge callback to the notification thread."""
+      with self.tlock:
+         if bulk.numpy:
+            import numpy
+            self.np = numpy
+            self.np_dtype = numpy.dtype([('seq', '<u2'), ('flags', '<u2'),
+               ('tick', '<u4'), ('level', '<u4')])
+            self.bulk_np = self.bulk_np + (bulk,)
+         else:
+            self.bulk = self.bulk + (bulk,)
+            self.bulk_bits = self.bulk_bits | bulk.bits
+         if bulk.bits & ~self.monitor:
+            self.monitor = self.monitor | bulk.bits
+            _pigpio_command(self.control, _PI_CMD_NB, self.handle, self.monitor)
+
+   def remove_bulk(self, bulk):
+      """Removes a bulk edge callback from the notification thread."""
+      with self.tlock:
+         self.bulk = tuple(b for b in self.bulk if b is not bulk)
+         self.bulk_np = tuple(b for b in self.bulk_np if b is not bulk)
+         bits = 0
+         for b in self.bulk:
+            bits |= b.bits
+         self.bulk_bits = bits
+         unused = bulk.bits & ~self._bulk_wanted()
+         for gpio in range(32):
+            if self.watchdogs[gpio]:
+               unused &= ~(1<<gpio)
+         if self.monitor & unused:
+            self.monitor = self.monitor & ~unused
+            _pigpio_command(self.control, _PI_CMD_NB, self.handle, self.monitor)
 
    def append_event(self, callb):
       """
       Adds an event callback to the notification thread.
       """
-      self.events.append(callb)
-      self.event_bits = self.event_bits | callb.bit
-      _pigpio_command(self.control, _PI_CMD_EVM, self.handle, self.event_bits)
+      with self.tlock:
+         self.events.append(callb)
+         self._index_event(callb.event)
+         if not self.event_bits & callb.bit:
+            self.event_bits = self.event_bits | callb.bit
+            _pigpio_command(
+               self.control, _PI_CMD_EVM, self.handle, self.event_bits)
 
    def remove_event(self, callb):
       """
       Removes an event callback from the notification thread.
       """
-      if callb in self.events:
-         self.events.remove(callb)
-         new_event_bits = 0
-         for c in self.events:
-            new_event_bits |= c.bit
-         if new_event_bits != self.event_bits:
-            self.event_bits = new_event_bits
-            _pigpio_command(
-               self.control, _PI_CMD_EVM, self.handle, self.event_bits)
+      with self.tlock:
+         if callb in self.events:
+            self.events.remove(callb)
+            if not self._index_event(callb.event) and self.event_bits & callb.bit:
+               self.event_bits = self.event_bits & ~callb.bit
+               _pigpio_command(
+                  self.control, _PI_CMD_EVM, self.handle, self.event_bits)
 
    def run(self):
-      """Runs the notification thread."""
+      """Runs the notification reader thread."""
 
-      lastLevel = self.lastLevel
+      MSG_SIZ = _NOTIFY_MSG.size
+      SEQ = struct.Struct('H')
+
+      queue = self.queue
+      ready = self.ready
+      read_into = self.read_into
 
-      RECV_SIZ = 4096
-      MSG_SIZ = 12
+      # Reports are received into a fixed buffer and queued as bytes,
+      # a partial trailing report is moved to the front.  A pipe is
+      # read up to its 64K capacity at a time.
+      buf = bytearray(_NOTIFY_BUF_SIZ)
+      view = memoryview(buf)
+      have = 0
+      nextSeq = 0
 
-      buf = bytes()
       while self.go:
 
-         buf += self.sl.s.recv(RECV_SIZ)
-         offset = 0
-
-         while self.go and (len(buf) - offset) >= MSG_SIZ:
-            msgbuf = buf[offset:offset + MSG_SIZ]
-            offset += MSG_SIZ
-            seq, flags, tick, level = (struct.unpack('HHII', msgbuf))
-
-            if flags == 0:
-               changed = level ^ lastLevel
-               lastLevel = level
-               for cb in self.callbacks:
-                  if cb.bit & changed:
-                     newLevel = 0
-                     if cb.bit & level:
-                        newLevel = 1
-                     if (cb.edge ^ newLevel):
-                         cb.func(cb.gpio, newLevel, tick)
-            else:
-               if flags & NTFY_FLAGS_WDOG:
-                  gpio = flags & NTFY_FLAGS_GPIO
-                  for cb in self.callbacks:
-                     if cb.gpio == gpio:
+         got = read_into(view[have:])
+         if not got:
+            break
+         have += got
+         end = have - (have % MSG_SIZ)
+
+         if end:
+            count = end // MSG_SIZ
+            self.received += count
+
+            # pigpiod numbers every report it generates, including
+            # those it couldn't write, so a gap in seq is a loss.
+            first = SEQ.unpack_from(view, 0)[0]
+            last = SEQ.unpack_from(view, end - MSG_SIZ)[0]
+            if first != nextSeq or (last - first) & 0xFFFF != count - 1:
+               for seq, flags, tick, level in _NOTIFY_MSG.iter_unpack(view[:end]):
+                  self.lost += (seq - nextSeq) & 0xFFFF
+                  nextSeq = seq + 1
+            nextSeq = (last + 1) & 0xFFFF
+
+            space = self.queue_size - (self.queued - self.dispatched)
+            if count > space:
+               self.overflowed += count - max(space, 0)
+               count = max(space, 0)
+            if count:
+               queue.append(bytes(view[:count * MSG_SIZ]))
+               self.queued += count
+               depth = self.queued - self.dispatched
+               if depth > self.max_queued:
+                  self.max_queued = depth
+               if not ready.is_set():
+                  ready.set()
+
+         have -= end
+         if have:
+            buf[:have] = view[end:end + have]
+
+      view.release()
+      if self.fd is None:
+         self.sl.s.close()
+      else:
+         os.close(self.fd)
+      queue.append(None)
+      ready.set()
+
+   def dispatch(self):
+      """Runs the callbacks for the queued reports."""
+
+      lastLevel = self.lastLevel
+
+      MSG_SIZ = _NOTIFY_MSG.size
+
+      queue = self.queue
+      ready = self.ready
+
+      rising = self.rising
+      falling = self.falling
+      watchdogs = self.watchdogs
+      event_slots = self.event_slots
+
+      while True:
+
+         ready.wait()
+         ready.clear()
+
+         while queue:
+
+            data = queue.popleft()
+            if data is None:
+               return
+
+            monitor = self.monitor
+            bulk = self.bulk
+            bulk_bits = self.bulk_bits
+            bulk_np = self.bulk_np
+            chunkLevel = lastLevel
+
+            for seq, flags, tick, level in _NOTIFY_MSG.iter_unpack(data):
+
+               if flags == 0:
+                  changed = level ^ lastLevel
+                  lastLevel = level
+                  if changed & bulk_bits:
+                     for b in bulk:
+                        if changed & b.bits:
+                           b.ticks.append(tick)
+                           b.levels.append(level)
+                  # Visit only the monitored GPIOs which changed, lowest first.
+                  changed &= monitor
+                  while changed:
+                     bit = changed & -changed
+                     changed ^= bit
+                     gpio = bit.bit_length() - 1
+                     if level & bit:
+                        for cb in rising[gpio]:
+                           cb.func(gpio, 1, tick)
+                     else:
+                        for cb in falling[gpio]:
+                           cb.func(gpio, 0, tick)
+               else:
+                  if flags & NTFY_FLAGS_WDOG:
+                     gpio = flags & NTFY_FLAGS_GPIO
+                     for cb in watchdogs[gpio]:
                         cb.func(gpio, TIMEOUT, tick)
-               elif flags & NTFY_FLAGS_EVENT:
-                  event = flags & NTFY_FLAGS_GPIO
-                  for cb in self.events:
-                     if cb.event == event:
+                  elif flags & NTFY_FLAGS_EVENT:
+                     event = flags & NTFY_FLAGS_GPIO
+                     for cb in event_slots[event]:
                         cb.func(event, tick)
-         buf = buf[offset:]
 
-      self.sl.s.close()
+            # Bulk edge callbacks get the whole chunk in one call.
+            for b in bulk:
+               if b.ticks:
+                  b.deliver()
+            if bulk_np:
+               records = self.np.frombuffer(data, self.np_dtype)
+               for b in bulk_np:
+                  b.deliver_numpy(self.np, records, chunkLevel)
+
+            self.dispatched += len(data) // MSG_SIZ
 
 class _callback:
    """A class to provide GPIO level change callbacks."""
@@ -1269,6 +1632,31 @@ class _callback:
       self._reset = True
       self.count = 0
 
+class _bulk_callback:
+   """A class to provide bulk edge callbacks."""
+
+   def __init__(self, notify, bits, func, wide_ticks=False, use_numpy=False):
+      """
+      Initialise a bulk edge callback and adds it to the
+      notification thread.
+      """
+      self._notify = notify
+      self.callb = _bulk_ADT(bits, func, wide_ticks, use_numpy)
+      self._notify.append_bulk(self.callb)
+
+   def cancel(self):
+      """
+      Cancels a bulk edge callback by removing it from the
+      notification thread.
+      """
+      self._notify.remove_bulk(self.callb)
+
+   def edges(self):
+      """
+      Returns the number of edges delivered so far.
+      """
+      return self.callb.edges
+
 class _event:
    """A class to provide event callbacks."""
 
@@ -1318,38 +1706,241 @@ class _event:
 class _wait_for_edge:
    """Encapsulates waiting for GPIO edges."""
 
-   def __init__(self, notify, gpio, edge, timeout):
-      """Initialises a wait_for_edge."""
+   def __init__(self, notify, gpio, edge):
+      """
+      Initialises a wait_for_edge and adds its callback to the
+      notification thread.
+      """
       self._notify = notify
+      self._lock = threading.Lock()
+      self._event = threading.Event()
+      self._edge = None
       self.callb = _callback_ADT(gpio, edge, self.func)
-      self.trigger = False
       self._notify.append(self.callb)
-      self.start = time.time()
-      while (self.trigger == False) and ((time.time()-self.start) < timeout):
-         time.sleep(0.05)
-      self._notify.remove(self.callb)
 
    def func(self, gpio, level, tick):
-      """Sets wait_for_edge triggered."""
-      self.trigger = True
+      """Records the edge and wakes the waiter."""
+      with self._lock:
+         self._edge = (level, tick)
+         self._event.set()
+
+   def wait(self, timeout=None):
+      """
+      Waits for an edge.
+
+      timeout:= seconds to wait, None (default) to wait forever.
+
+      Returns (level, tick) of the latest edge since the previous
+      wait (or since the waiter was made), or None on timeout.
+      """
+      if not self._event.wait(timeout):
+         return None
+      with self._lock:
+         edge = self._edge
+         self._edge = None
+         self._event.clear()
+      return edge
+
+   def cancel(self):
+      """Removes the waiter from the notification thread."""
+      self._notify.remove(self.callb)
 
 class _wait_for_event:
    """Encapsulates waiting for an event."""
 
-   def __init__(self, notify, event, timeout):
-      """Initialises wait_for_event."""
+   def __init__(self, notify, event):
+      """
+      Initialises a wait_for_event and adds its callback to the
+      notification thread.
+      """
       self._notify = notify
+      self._lock = threading.Lock()
+      self._event = threading.Event()
+      self._tick = None
       self.callb = _event_ADT(event, self.func)
-      self.trigger = False
       self._notify.append_event(self.callb)
-      self.start = time.time()
-      while (self.trigger == False) and ((time.time()-self.start) < timeout):
-         time.sleep(0.05)
-      self._notify.remove_event(self.callb)
 
    def func(self, event, tick):
-      """Sets wait_for_event triggered."""
-      self.trigger = True
+      """Records the event and wakes the waiter."""
+      with self._lock:
+         self._tick = tick
+         self._event.set()
+
+   def wait(self, timeout=None):
+      """
+      Waits for the event.
+
+      timeout:= seconds to wait, None (default) to wait forever.
+
+      Returns the tick of the latest event since the previous
+      wait (or since the waiter was made), or None on timeout.
+      """
+      if not self._event.wait(timeout):
+         return None
+      with self._lock:
+         tick = self._tick
+         self._tick = None
+         self._event.clear()
+      return tick
+
+   def cancel(self):
+      """Removes the waiter from the notification thread."""
+      self._notify.remove_event(self.callb)
+
+def _recv_all(s, count):
+   """Returns count bytes from socket s."""
+   data = bytearray()
+   while len(data) < count:
+      chunk = s.recv(count - len(data))
+      if not chunk:
+         raise error("connection closed during batch")
+      data.extend(chunk)
+   return data
+
+class _batch_socket:
+   """
+   Stands in for the command socket while a batch is built.  Requests
+   are appended to a buffer and each reply is a zero placeholder.
+   """
+   def __init__(self):
+      self.buf = bytearray()
+      self.cmds = []
+      self.requests = []
+
+   def send(self, data):
+      cmd = struct.unpack_from('I', data)[0]
+      if cmd in _BATCH_EXT:
+         raise error("commands returning extra data can't be batched")
+      self.buf.extend(data)
+      self.cmds.append(cmd)
+      self.requests.append(bytes(data))
+      return len(data)
+
+   def sendall(self, data):
+      self.send(data)
+
+   def recv(self, count):
+      return bytes(count)
+
+# Commands whose reply is an unsigned value rather than a status.
+_BATCH_UNSIGNED = (
+   _PI_CMD_BR1, _PI_CMD_BR2, _PI_CMD_TICK, _PI_CMD_HWVER, _PI_CMD_PIGPV)
+
+# Commands whose reply is followed by extra data.
+_BATCH_EXT = (
+   _PI_CMD_BI2CZ, _PI_CMD_BSCX, _PI_CMD_BSPIX, _PI_CMD_CF2, _PI_CMD_FL,
+   _PI_CMD_FR, _PI_CMD_I2CPK, _PI_CMD_I2CRD, _PI_CMD_I2CRI, _PI_CMD_I2CRK,
+   _PI_CMD_I2CZ, _PI_CMD_PROCP, _PI_CMD_SERR, _PI_CMD_SLR, _PI_CMD_SPIR,
+   _PI_CMD_SPIX, _PI_CMD_BATCH)
+
+# Most commands in one PI_CMD_BATCH, (CMD_MAX_EXTENSION - 1) // 12.
+_EXEC_BATCH_MAX = 5461
+
+def _exec_batch_requests(requests):
+   """
+   Groups requests for [*exec_batch*].  Runs of plain commands (no
+   extension) become one PI_CMD_BATCH request.  Returns a list of
+   (request, count), count is 0 for a request sent as it is.
+   """
+   plan = []
+   i = 0
+   while i < len(requests):
+      j = i
+      while (j < len(requests) and j - i < _EXEC_BATCH_MAX and
+             len(requests[j]) == _SOCK_CMD_LEN and
+             not struct.unpack_from('I', requests[j], 12)[0]):
+         j += 1
+      if j - i > 1:
+         ext = b''.join([r[:12] for r in requests[i:j]])
+         plan.append(
+            (struct.pack('IIII', _PI_CMD_BATCH, 0, 0, len(ext)) + ext, j - i))
+         i = j
+      else:
+         plan.append((requests[i], 0))
+         i += 1
+   return plan
+
+class _batch:
+   """
+   Queues pigpio commands and sends them in one write, see [*batch*].
+   """
+   def __init__(self, pi):
+      self._pi = pi
+      self.sl = _socklock()
+      self.sl.s = _batch_socket()
+      self.results = None
+
+   def __getattr__(self, name):
+      # pi methods run against this object so their requests are queued.
+      attr = getattr(type(self._pi), name, None)
+      if not callable(attr) or name.startswith('__'):
+         raise AttributeError(name)
+      return attr.__get__(self)
+
+   def __len__(self):
+      return len(self.sl.s.cmds)
+
+   def __enter__(self):
+      return self
+
+   def __exit__(self, exc_type, exc_value, tb):
+      if exc_type is None:
+         self.send()
+      else:
+         self.sl.s = _batch_socket()
+      return False
+
+   def _exchange(self, s, queued):
+      """Sends the queued requests and returns their raw replies."""
+      s.sendall(queued.buf)
+      data = _recv_all(s, len(queued.cmds) * _SOCK_CMD_LEN)
+      return [res for (res,) in struct.iter_unpack('12xI', data)]
+
+   def send(self):
+      """
+      Sends the queued commands and reads all their replies.
+
+      Returns a list of results, one per queued command.  If
+      exceptions are enabled the first failing command raises a
+      pigpio error once all the replies have been read, the
+      complete list is still available as results.
+      """
+      queued = self.sl.s
+      self.sl.s = _batch_socket()
+      results = []
+      if queued.cmds:
+         sl = self._pi.sl
+         with sl.l:
+            replies = self._exchange(sl.s, queued)
+         for cmd, res in zip(queued.cmds, replies):
+            results.append(res if cmd in _BATCH_UNSIGNED else u2i(res))
+      self.results = results
+      if exceptions:
+         for res, cmd in zip(results, queued.cmds):
+            if res < 0 and cmd not in _BATCH_UNSIGNED:
+               raise error(error_text(res))
+      return results
+
+class _exec_batch(_batch):
+   """
+   Queues pigpio commands and has the daemon run them as one
+   request, see [*exec_batch*].
+   """
+   def _exchange(self, s, queued):
+      plan = _exec_batch_requests(queued.requests)
+      s.sendall(b''.join([request for request, count in plan]))
+      replies = []
+      for request, count in plan:
+         res = struct.unpack('12xI', _recv_all(s, _SOCK_CMD_LEN))[0]
+         if not count:
+            replies.append(res)
+         elif u2i(res) > 0:
+            replies.extend(
+               [r for (r,) in struct.iter_unpack('I', _recv_all(s, res))])
+         else:
+            # The whole batch failed, e.g. a daemon without PI_CMD_BATCH.
+            replies.extend([res] * count)
+      return replies
 
 class pi():
 
@@ -5077,6 +5668,56 @@ class pi():
       """
       return _callback(self._notify, user_gpio, edge, func)
 
+   def bulk_callback(self, user_gpios, func, wide_ticks=False, use_numpy=False):
+      """
+      Calls a user supplied function with the edges of one or more
+      GPIO in bulk, once per chunk read from the notification socket
+      instead of once per edge.
+
+      user_gpios:= a GPIO (0-31) or a list of GPIO.
+            func:= user supplied function taking (ticks, levels).
+      wide_ticks:= True for wrap corrected 64 bit ticks.
+       use_numpy:= True for NumPy arrays (NumPy must be installed).
+
+      ticks and levels are arrays of equal length holding, for each
+      report in which one of the GPIO changed, the tick and the level
+      of all of GPIO 0-31 (bit n is GPIO n).  They are array('I')
+      (array('Q') for wide ticks) or, with use_numpy, uint32 (uint64)
+      NumPy arrays.
+
+      32 bit ticks wrap from 4294967295 to 0 roughly every 72 minutes.
+      Wide ticks count the wraps in the upper word so they only ever
+      increase.
+
+      Decoders of fast signals (tens of kHz) can then work on
+      thousands of edges per call, with vectorised code if NumPy is
+      used.  Watchdog timeouts and events are not delivered.
+
+      The callback may be cancelled by calling the cancel function,
+      edges returns the number of edges delivered.
+
+      ...
+      import numpy as np
+
+      def pulses(ticks, levels):
+         high = (levels >> 4) & 1
+         widths = np.diff(ticks.astype(np.int64))
+         ...
+
+      cb = pi.bulk_callback(4, pulses, use_numpy=True)
+      ...
+      cb.cancel()
+      ...
+      """
+      if isinstance(user_gpios, int):
+         user_gpios = [user_gpios]
+      bits = 0
+      for g in user_gpios:
+         if not 0 <= g < 32:
+            raise error(error_text(PI_BAD_USER_GPIO))
+         bits |= 1<<g
+      return _bulk_callback(self._notify, bits, func, wide_ticks, use_numpy)
+
    def event_callback(self, event, func=None):
       """
       Calls a user supplied function (a callback) whenever the
@@ -5128,10 +5769,11 @@ class pi():
       The function returns when the edge is detected or after
       the number of seconds specified by timeout has expired.
 
-      Do not use this function for precise timing purposes,
-      the edge is only checked 20 times a second. Whenever
-      you need to know the accurate time of GPIO events use
-      a [*callback*] function.
+      The notification thread wakes the caller directly, typically
+      well under a millisecond after the report arrives.  The
+      callback is added when the function is called, so an edge
+      caused just before may be missed, use [*edge_waiter*] for
+      handshakes and to get the level and tick of the edge.
 
       The function returns True if the edge is detected,
       otherwise False.
@@ -5148,8 +5790,38 @@ class pi():
          print("wait for falling edge timed out")
       ...
       """
-      a = _wait_for_edge(self._notify, user_gpio, edge, wait_timeout)
-      return a.trigger
+      a = _wait_for_edge(self._notify, user_gpio, edge)
+      try:
+         return a.wait(wait_timeout) is not None
+      finally:
+         a.cancel()
+
+   def edge_waiter(self, user_gpio, edge=RISING_EDGE):
+      """
+      Returns a waiter for edges on a GPIO.
+
+      user_gpio:= 0-31.
+           edge:= EITHER_EDGE, RISING_EDGE (default), or
+                  FALLING_EDGE.
+
+      The waiter's wait(timeout) method returns (level, tick) for
+      the latest edge since the previous wait, or None if no edge
+      arrived within timeout seconds.  The waiter stays armed
+      between waits so an edge which arrives before wait is called
+      is not missed.
+
+      The waiter may be cancelled by calling its cancel function.
+
+      ...
+      w = pi.edge_waiter(23, pigpio.EITHER_EDGE)
+      pi.write(24, 1)           # request
+      edge = w.wait(0.1)        # acknowledge
+      if edge is not None:
+         level, tick = edge
+      w.cancel()
+      ...
+      """
+      return _wait_for_edge(self._notify, user_gpio, edge)
 
    def wait_for_event(self, event, wait_timeout=60.0):
       """
@@ -5171,13 +5843,138 @@ class pi():
          print("wait for event timed out")
       ...
       """
-      a = _wait_for_event(self._notify, event, wait_timeout)
-      return a.trigger
+      a = _wait_for_event(self._notify, event)
+      try:
+         return a.wait(wait_timeout) is not None
+      finally:
+         a.cancel()
+
+   def event_waiter(self, event):
+      """
+      Returns a waiter for an event.
+
+      event:= 0-31.
+
+      The waiter's wait(timeout) method returns the tick of the
+      latest event since the previous wait, or None if the event
+      wasn't signalled within timeout seconds.
+
+      The waiter may be cancelled by calling its cancel function.
+
+      ...
+      w = pi.event_waiter(23)
+      pi.event_trigger(23)
+      tick = w.wait(1.0)
+      w.cancel()
+      ...
+      """
+      return _wait_for_event(self._notify, event)
+
+   def notify_stats(self):
+      """
+      Returns notification counters for sizing against overload.
+
+      The counters are returned as a tuple (received, lost,
+      overflowed, queued, max_queued).
+
+        received:= reports read from the notification socket.
+            lost:= reports pigpiod couldn't send (gaps in the report
+                   sequence numbers), normally because the socket
+                   wasn't read quickly enough.
+      overflowed:= reports dropped because the dispatch queue was full,
+                   i.e. callbacks couldn't keep up.
+          queued:= reports waiting for their callbacks to be run.
+      max_queued:= the most reports ever waiting.
+
+      Edges lost either way are not seen by callbacks.
+
+      ...
+      received, lost, overflowed, queued, max_queued = pi.notify_stats()
+      if lost or overflowed:
+         print("missed {} edges".format(lost + overflowed))
+      ...
+      """
+      n = self._notify
+      return (n.received, n.lost, n.overflowed,
+              n.queued - n.dispatched, n.max_queued)
+
+   def set_notify_queue_size(self, reports):
+      """
+      Sets the number of reports which may wait for their callbacks.
+
+      reports:= >0 (default 65536).
+
+      Callbacks are run by a dispatcher thread separate from the
+      thread reading the notification socket.  Reports arriving
+      while the queue is full are dropped and counted (see
+      [*notify_stats*]).  Each waiting report needs 12 bytes.
+
+      ...
+      pi.set_notify_queue_size(1000000)
+      ...
+      """
+      self._notify.queue_size = reports
+
+   def batch(self):
+      """
+      Returns a batch which pipelines commands over the command
+      socket.
+
+      pi methods called on the batch are queued rather than sent.
+      Leaving the with block (or calling send) writes all the
+      queued requests at once and then reads all the replies, so
+      n commands cost one network round trip instead of n.  Other
+      threads using this pi wait until the batch has completed.
+
+      Values returned by methods called on the batch are
+      placeholders, the real results are in the batch's results
+      list in queue order.  Commands which return extra data
+      (e.g. i2c_read_device) can't be batched.
+
+      ...
+      with pi.batch() as b:
+         b.set_PWM_dutycycle(17, 128)
+         b.set_PWM_dutycycle(18, 0)
+         b.set_servo_pulsewidth(12, 1500)
+         b.get_current_tick()
+      print(b.results) # [0, 0, 0, 3453247]
+      ...
+      """
+      return _batch(self)
+
+   def exec_batch(self):
+      """
+      Returns a batch whose commands the daemon runs as one request.
+
+      Used like [*batch*], but each run of queued commands without
+      extra data is sent as a single PI_CMD_BATCH request of
+      (cmd, p1, p2) triples.  The daemon runs the commands of a
+      request one after the other without reading its socket in
+      between and returns all their results together, so e.g. the
+      duty cycles of several GPIO change within microseconds of
+      each other.  Commands which send extra data (e.g.
+      update_script) are pipelined between the runs.
+
+      A daemon without PI_CMD_BATCH fails every command of a run
+      with PI_UNKNOWN_COMMAND.
+
+      ...
+      with pi.exec_batch() as b:
+         b.set_PWM_dutycycle(17, 128)
+         b.set_PWM_dutycycle(18, 0)
+         b.set_servo_pulsewidth(12, 1500)
+         b.set_servo_pulsewidth(13, 1500)
+      print(b.results) # [0, 0, 0, 0]
+      ...
+      """
+      return _exec_batch(self)
 
    def __init__(self,
                 host = os.getenv("PIGPIO_ADDR", 'localhost'),
                 port = os.getenv("PIGPIO_PORT", 8888),
-                show_errors = True):
+                show_errors = True,
+                notify_fifo = None,
+                unix_path = None):
       """
       Grants access to a Pi's GPIO.
 
@@ -5190,6 +5987,30 @@ class pi():
              environment variable.  The pigpio daemon must have been
              started with the same port number.
 
+      notify_fifo:= how notifications (callbacks) are received.  False
+             uses a second socket, True tries a notification pipe
+             (/dev/pigpioN) first and falls back to the socket.  The
+             pipe avoids the TCP stack on the edge path but only
+             works if the daemon is on this machine.  The default is
+             None, which uses the pipe if the PIGPIO_NOTIFY_FIFO
+             environment variable is 1 and the daemon is on this
+             machine, otherwise the socket.  The pipe name prefix
+             may be changed with the PIGPIO_FIFO environment variable.
+
+             The daemon releases a socket's notification handle when
+             the socket closes, but not a pipe's.  A script using the
+             pipe which dies without calling [*stop*] leaves its
+             handle in use until the daemon is restarted (there are
+             32 handles), so only use the pipe in scripts which
+             always call [*stop*].
+
+      unix_path:= the path of the daemon's Unix domain socket (see
+             pigpiod -u).  If set host and port are not used.  The
+             default is None unless the daemon is on this machine
+             and the PIGPIO_UNIX_PATH environment variable is set.
+             The same commands and notifications are carried with
+             less overhead per round trip than TCP loopback.
+
       This connects to the pigpio daemon and reserves resources
       to be used for sending commands and receiving notifications.
 
@@ -5201,6 +6022,7 @@ class pi():
       pi = pigio.pi()              # use defaults
       pi = pigpio.pi('mypi')       # specify host, default port
       pi = pigpio.pi('mypi', 7777) # specify host and port
+      pi = pigpio.pi(unix_path='/var/run/pigpio.sock')
 
       pi = pigpio.pi()             # exit script if no connection
       if not pi.connected:
@@ -5221,12 +6043,24 @@ class pi():
       self._port = port
 
       try:
-         self.sl.s = socket.create_connection((host, port), None)
+         if unix_path is None and os.getenv("PIGPIO_UNIX_PATH"):
+            if _local_host(host):
+               unix_path = os.getenv("PIGPIO_UNIX_PATH")
+
+         self._unix_path = unix_path
+
+         if notify_fifo is None:
+            notify_fifo = (os.getenv("PIGPIO_NOTIFY_FIFO", "0") == "1" and
+               (bool(unix_path) or _local_host(host)))
 
-         # Disable the Nagle algorithm.
-         self.sl.s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+         self.sl.s = _connect(host, port, unix_path)
 
-         self._notify = _callback_thread(self.sl, host, port)
+         if not unix_path:
+            # Disable the Nagle algorithm.
+            self.sl.s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+         self._notify = _callback_thread(
+            self.sl, host, port, notify_fifo, unix_path)
 
       except socket.error:
          exception = 1
@@ -5251,7 +6085,10 @@ class pi():
 
          if show_errors:
 
-            s = "Can't connect to pigpio at {}({})".format(host, str(port))
+            if unix_path:
+               s = "Can't connect to pigpio at {}".format(unix_path)
+            else:
+               s = "Can't connect to pigpio at {}({})".format(host, str(port))
 
 
             print(_except_a.format(s))
@@ -5264,6 +6101,8 @@ class pi():
             print(_except_z)
 
    def __repr__(self):
+      if self._unix_path:
+         return "<pipio.pi unix_path={}>".format(self._unix_path)
       return "<pipio.pi host={} port={}>".format(self._host, self._port)
 
    def stop(self):
@@ -5501,6 +6340,7 @@ def xref():
    PI_CMD_INTERRUPTED = -144
    PI_NOT_ON_BCM2711   = -145
    PI_ONLY_ON_BCM2711  = -146
+   PI_BAD_BATCH        = -147
    . .
 
    event:0-31
@@ -0,0 +1,851 @@
+"""
+pigpio_asyncio is an asyncio client for the pigpio daemon.
+
+It speaks the same socket protocol as pigpio.py but runs on an
+asyncio event loop, so one loop can drive GPIO, video and web
+without threads or blocking socket calls.
+
+...
+import asyncio
+import pigpio
+import pigpio_asyncio
+
+async def main():
+   pi = await pigpio_asyncio.connect()
+
+   await pi.set_mode(17, pigpio.OUTPUT)
+   await pi.set_PWM_dutycycle(17, 128)
+
+   cb = await pi.callback(4, pigpio.EITHER_EDGE, print)
+
+   async with pi.edges(23) as edges:
+      async for gpio, level, tick in edges:
+         print(gpio, level, tick)
+
+   await cb.cancel()
+   await pi.stop()
+
+asyncio.run(main())
+...
+
+Every command method of pigpio.pi is available on pigpio_asyncio.pi
+with the same arguments and results.  Calling one writes the request
+at once and returns a future, so requests issued back to back are in
+flight together (pipelined) and their replies are matched in order.
+
+...
+# Four commands, one round trip.
+await asyncio.gather(
+   pi.set_PWM_dutycycle(17, 64), pi.set_PWM_dutycycle(27, 0),
+   pi.set_servo_pulsewidth(12, 1500), pi.set_servo_pulsewidth(13, 1500))
+...
+
+Notifications use a second connection, read by a task on the loop.
+Callbacks are called on the loop (a coroutine function is run as a
+task), see [*callback*], [*edges*] and [*wait_for_edge*].
+
+The methods must be called from the thread running the loop.
+"""
+
+import asyncio
+import collections
+import os
+import struct
+
+import pigpio
+
+from pigpio import (
+   EITHER_EDGE, NTFY_FLAGS_EVENT, NTFY_FLAGS_GPIO, NTFY_FLAGS_WDOG,
+   RISING_EDGE, TIMEOUT, error, _BATCH_EXT, _PI_CMD_BR1, _PI_CMD_EVM,
+   _PI_CMD_NB, _PI_CMD_NC, _PI_CMD_NOIB, _SOCK_CMD_LEN, _exec_batch_requests,
+   _socklock)
+
+_REQUEST = struct.Struct('IIII')
+_REPLY = struct.Struct('IIIi')
+_REPORT = struct.Struct('HHII')
+
+class _recorder:
+   """
+   Captures the requests a pigpio.pi method sends.  Each reply is
+   a zero placeholder.
+   """
+   def __init__(self):
+      self.requests = []
+
+   def send(self, data):
+      self.requests.append(bytes(data))
+      return len(data)
+
+   def sendall(self, data):
+      self.send(data)
+
+   def recv(self, count):
+      return bytes(count)
+
+class _replay:
+   """
+   Feeds the replies read by the client back to a pigpio.pi method.
+   """
+   def __init__(self, replies):
+      self.replies = collections.deque(replies)
+      self.data = b''
+
+   def send(self, data):
+      return len(data)
+
+   def sendall(self, data):
+      pass
+
+   def recv(self, count):
+      header, self.data = self.replies.popleft()
+      return header
+
+class _method_context:
+   """
+   Stands in for pigpio.pi while one of its methods runs.
+   """
+   def __init__(self, sock):
+      self.sl = _socklock()
+      self.sl.s = sock
+
+   def _rxbuf(self, count):
+      return bytearray(self.sl.s.data[:count])
+
+class _callback_ADT:
+   """An ADT class to hold callback information."""
+
+   def __init__(self, gpio, edge, func):
+      self.gpio = gpio
+      self.edge = edge
+      self.func = func
+      self.bit = 1<<gpio
+
+class _event_ADT:
+   """An ADT class to hold event callback information."""
+
+   def __init__(self, event, func):
+      self.event = event
+      self.func = func
+      self.bit = 1<<event
+
+def _open(host, port, unix_path):
+   """Opens a stream to the daemon's Unix domain socket or TCP port."""
+   if unix_path:
+      return asyncio.open_unix_connection(unix_path)
+   return asyncio.open_connection(host, port)
+
+class _notify:
+   """
+   Reads the notification stream of a second connection in a task.
+   """
+   def __init__(self, control):
+      self.control = control
+      self.monitor = 0
+      self.event_bits = 0
+      self.callbacks = []
+      self.events = []
+      self.handle = None
+      self.lastLevel = 0
+      self.received = 0
+      self.lost = 0       # gaps in the report sequence numbers
+      self._reader = None
+      self._writer = None
+      self._task = None
+
+   async def open(self, host, port, unix_path=None):
+      self._reader, self._writer = await _open(host, port, unix_path)
+      self.lastLevel = await self._command(_PI_CMD_BR1)
+      self.handle = pigpio._u2i(await self._command(_PI_CMD_NOIB))
+      self._task = asyncio.ensure_future(self._run())
+
+   async def _command(self, cmd):
+      # Only used before the connection becomes a notification stream.
+      self._writer.write(_REQUEST.pack(cmd, 0, 0, 0))
+      header = await self._reader.readexactly(_SOCK_CMD_LEN)
+      return struct.unpack_from('I', header, 12)[0]
+
+   async def close(self):
+      if self._writer is None:
+         return
+      if self.handle is not None and not self._writer.is_closing():
+         self._writer.write(_REQUEST.pack(_PI_CMD_NC, self.handle, 0, 0))
+      if self._task is not None:
+         self._task.cancel()
+      self._writer.close()
+      self._writer = None
+
+   async def append(self, callb):
+      self.callbacks.append(callb)
+      await self._update_monitor()
+
+   async def remove(self, callb):
+      if callb in self.callbacks:
+         self.callbacks.remove(callb)
+         await self._update_monitor()
+
+   async def _update_monitor(self):
+      monitor = 0
+      for c in self.callbacks:
+         monitor |= c.bit
+      if monitor != self.monitor:
+         self.monitor = monitor
+         await self.control._command(_PI_CMD_NB, self.handle, monitor)
+
+   async def append_event(self, callb):
+      self.events.append(callb)
+      await self._update_events()
+
+   async def remove_event(self, callb):
+      if callb in self.events:
+         self.events.remove(callb)
+         await self._update_events()
+
+   async def _update_events(self):
+      bits = 0
+      for c in self.events:
+         bits |= c.bit
+      if bits != self.event_bits:
+         self.event_bits = bits
+         await self.control._command(_PI_CMD_EVM, self.handle, bits)
+
+   def _call(self, func, *args):
+      res = func(*args)
+      if asyncio.iscoroutine(res):
+         asyncio.ensure_future(res)
+
+   async def _run(self):
+      lastLevel = self.lastLevel
+      buf = bytearray()
+      MSG_SIZ = _REPORT.size
+      nextSeq = 0
+      while True:
+         data = await self._reader.read(4096)
+         if not data:
+            break
+         buf += data
+         end = len(buf) - len(buf) % MSG_SIZ
+         if end:
+            count = end // MSG_SIZ
+            self.received += count
+            first = struct.unpack_from('H', buf, 0)[0]
+            last = struct.unpack_from('H', buf, end - MSG_SIZ)[0]
+            if first != nextSeq or (last - first) & 0xFFFF != count - 1:
+               for seq, in struct.iter_unpack('H10x', buf[:end]):
+                  self.lost += (seq - nextSeq) & 0xFFFF
+                  nextSeq = seq + 1
+            nextSeq = (last + 1) & 0xFFFF
+         for seq, flags, tick, level in _REPORT.iter_unpack(buf[:end]):
+            if flags == 0:
+               changed = level ^ lastLevel
+               lastLevel = level
+               for cb in self.callbacks:
+                  if cb.bit & changed:
+                     newLevel = 1 if cb.bit & level else 0
+                     if cb.edge ^ newLevel:
+                        self._call(cb.func, cb.gpio, newLevel, tick)
+            elif flags & NTFY_FLAGS_WDOG:
+               gpio = flags & NTFY_FLAGS_GPIO
+               for cb in self.callbacks:
+                  if cb.gpio == gpio:
+                     self._call(cb.func, gpio, TIMEOUT, tick)
+            elif flags & NTFY_FLAGS_EVENT:
+               event = flags & NTFY_FLAGS_GPIO
+               for cb in self.events:
+                  if cb.event == event:
+                     self._call(cb.func, event, tick)
+         del buf[:end]
+
+class _callback:
+   """A class to provide GPIO level change callbacks."""
+
+   def __init__(self, notify, user_gpio, edge=RISING_EDGE, func=None):
+      self._notify = notify
+      self.count = 0
+      if func is None:
+         func = self._tally
+      self.callb = _callback_ADT(user_gpio, edge, func)
+
+   async def cancel(self):
+      """Cancels a callback by removing it from the notifications."""
+      await self._notify.remove(self.callb)
+
+   def _tally(self, user_gpio, level, tick):
+      self.count += 1
+
+   def tally(self):
+      """
+      Provides a count of how many times the default tally
+      callback has triggered.
+      """
+      return self.count
+
+   def reset_tally(self):
+      """Resets the tally count to zero."""
+      self.count = 0
+
+class _event(_callback):
+   """A class to provide event callbacks."""
+
+   def __init__(self, notify, event, func=None):
+      self._notify = notify
+      self.count = 0
+      if func is None:
+         func = self._tally
+      self.callb = _event_ADT(event, func)
+
+   async def cancel(self):
+      """Cancels an event callback."""
+      await self._notify.remove_event(self.callb)
+
+   def _tally(self, event, tick):
+      self.count += 1
+
+class _edges:
+   """
+   An async iterator of (gpio, level, tick) for one GPIO, see [*edges*].
+   """
+   def __init__(self, pi, user_gpio, edge, maxsize):
+      self._pi = pi
+      self.gpio = user_gpio
+      self.edge = edge
+      self.dropped = 0
+      self._queue = asyncio.Queue(maxsize)
+      self._cb = None
+
+   def _put(self, gpio, level, tick):
+      try:
+         self._queue.put_nowait((gpio, level, tick))
+      except asyncio.QueueFull:
+         self.dropped += 1
+
+   async def start(self):
+      if self._cb is None:
+         self._cb = await self._pi.callback(self.gpio, self.edge, self._put)
+      return self
+
+   async def aclose(self):
+      if self._cb is not None:
+         await self._cb.cancel()
+         self._cb = None
+
+   def __aiter__(self):
+      return self
+
+   async def __anext__(self):
+      await self.start()
+      return await self._queue.get()
+
+   async def __aenter__(self):
+      return await self.start()
+
+   async def __aexit__(self, exc_type, exc_value, tb):
+      await self.aclose()
+      return False
+
+class _edge_waiter:
+   """
+   Waits repeatedly for edges on a GPIO, see [*edge_waiter*].
+   """
+   def __init__(self, pi, user_gpio, edge):
+      self._pi = pi
+      self.gpio = user_gpio
+      self.edge = edge
+      self._cb = None
+      self._last = None
+      self._future = None
+
+   def _func(self, gpio, level, tick):
+      self._set((level, tick))
+
+   def _set(self, value):
+      self._last = value
+      if self._future is not None and not self._future.done():
+         self._future.set_result(None)
+
+   async def start(self):
+      if self._cb is None:
+         self._cb = await self._pi.callback(self.gpio, self.edge, self._func)
+      return self
+
+   async def wait(self, timeout=None):
+      """
+      Returns (level, tick) of the latest edge since the previous
+      wait, or None if no edge arrives within timeout seconds.
+      """
+      await self.start()
+      if self._last is None:
+         self._future = asyncio.get_running_loop().create_future()
+         try:
+            await asyncio.wait_for(self._future, timeout)
+         except asyncio.TimeoutError:
+            return None
+         finally:
+            self._future = None
+      last, self._last = self._last, None
+      return last
+
+   async def cancel(self):
+      if self._cb is not None:
+         await self._cb.cancel()
+         self._cb = None
+
+class _event_waiter(_edge_waiter):
+   """
+   Waits repeatedly for an event, see [*event_waiter*].
+   """
+   def __init__(self, pi, event):
+      _edge_waiter.__init__(self, pi, None, None)
+      self.event = event
+
+   def _func(self, event, tick):
+      self._set(tick)
+
+   async def start(self):
+      if self._cb is None:
+         self._cb = await self._pi.event_callback(self.event, self._func)
+      return self
+
+class _batch:
+   """
+   Groups commands and waits for all of them, see [*batch*].
+   """
+   def __init__(self, pi):
+      self._pi = pi
+      self._futures = []
+      self.results = None
+
+   def __getattr__(self, name):
+      method = getattr(self._pi, name)
+      def queue(*args, **kwargs):
+         future = method(*args, **kwargs)
+         self._futures.append(future)
+         return future
+      return queue
+
+   async def __aenter__(self):
+      return self
+
+   async def __aexit__(self, exc_type, exc_value, tb):
+      futures, self._futures = self._futures, []
+      self.results = await asyncio.gather(*futures, return_exceptions=True)
+      if exc_type is None:
+         for res in self.results:
+            if isinstance(res, Exception):
+               raise res
+      return False
+
+class _exec_batch:
+   """
+   Queues commands and has the daemon run them as one request,
+   see [*exec_batch*].
+   """
+   def __init__(self, pi):
+      self._pi = pi
+      self._calls = []
+      self._requests = []
+      self.results = None
+
+   def __getattr__(self, name):
+      method = getattr(pigpio.pi, name, None)
+      if name.startswith('_') or not callable(method):
+         raise AttributeError(name)
+      def queue(*args, **kwargs):
+         rec = _recorder()
+         method(_method_context(rec), *args, **kwargs)
+         for r in rec.requests:
+            if struct.unpack_from('I', r)[0] in _BATCH_EXT:
+               raise error("commands returning extra data can't be batched")
+         self._calls.append((method, args, kwargs, len(rec.requests)))
+         self._requests.extend(rec.requests)
+      return queue
+
+   async def __aenter__(self):
+      return self
+
+   async def __aexit__(self, exc_type, exc_value, tb):
+      calls, self._calls = self._calls, []
+      requests, self._requests = self._requests, []
+      if exc_type is None:
+         await self._send(calls, requests)
+      return False
+
+   async def _send(self, calls, requests):
+      plan = _exec_batch_requests(requests)
+      sent = await asyncio.gather(
+         *[self._pi._request(request) for request, count in plan])
+      replies = []
+      for (request, count), (header, data) in zip(plan, sent):
+         res = _REPLY.unpack(header)[3]
+         if not count:
+            replies.append((header, data))
+         elif res > 0:
+            replies.extend([(header[:12] + r, b'') for r in
+               struct.unpack('4s' * count, data)])
+         else:
+            replies.extend([(header, b'')] * count)
+      self.results = []
+      for method, args, kwargs, n in calls:
+         try:
+            self.results.append(method(
+               _method_context(_replay(replies[:n])), *args, **kwargs))
+         except Exception as e:
+            self.results.append(e)
+         del replies[:n]
+      for res in self.results:
+         if isinstance(res, Exception):
+            raise res
+
+class pi():
+   """
+   An asyncio connection to the pigpio daemon, see [*connect*].
+   """
+   def __init__(self):
+      self.connected = False
+      self._host = None
+      self._port = None
+      self._unix_path = None
+      self._reader = None
+      self._writer = None
+      self._pending = collections.deque()
+      self._task = None
+      self._notify = None
+      self._notify_open = None
+
+   async def connect(self,
+                     host = os.getenv("PIGPIO_ADDR", 'localhost'),
+                     port = os.getenv("PIGPIO_PORT", 8888),
+                     unix_path = None):
+      """
+      Connects to the pigpio daemon at host:port, or at its Unix
+      domain socket if unix_path is set.
+      """
+      self._host = host
+      self._port = int(port)
+      self._unix_path = unix_path
+      self._reader, self._writer = await _open(host, self._port, unix_path)
+      self._task = asyncio.ensure_future(self._read_replies())
+      self.connected = True
+      return self
+
+   def __repr__(self):
+      if self._unix_path:
+         return "<pigpio_asyncio.pi unix_path={}>".format(self._unix_path)
+      return "<pigpio_asyncio.pi host={} port={}>".format(
+         self._host, self._port)
+
+   def __getattr__(self, name):
+      # pigpio.pi command methods, run against recorded/replayed replies.
+      method = getattr(pigpio.pi, name, None)
+      if name.startswith('_') or not callable(method):
+         raise AttributeError(name)
+      def command(*args, **kwargs):
+         return self._run(method, args, kwargs)
+      command.__name__ = name
+      command.__doc__ = method.__doc__
+      setattr(self, name, command)
+      return command
+
+   def _request(self, data):
+      """Writes one request and returns a future for its reply."""
+      if self._writer is None:
+         raise error("not connected to pigpio")
+      future = asyncio.get_running_loop().create_future()
+      cmd = struct.unpack_from('I', data)[0]
+      self._pending.append((future, cmd in _BATCH_EXT))
+      self._writer.write(data)
+      return future
+
+   async def _command(self, cmd, p1=0, p2=0):
+      header, data = await self._request(_REQUEST.pack(cmd, p1, p2, 0))
+      return pigpio._u2i(struct.unpack_from('I', header, 12)[0])
+
+   def _run(self, method, args, kwargs):
+      # The first call only captures the requests, the second runs
+      # pigpio.pi's own result handling on the real replies.
+      rec = _recorder()
+      value = method(_method_context(rec), *args, **kwargs)
+      result = asyncio.get_running_loop().create_future()
+      if not rec.requests:
+         result.set_result(value)
+         return result
+
+      def finish(replies):
+         if result.cancelled():
+            return
+         exc = replies.exception()
+         if exc is not None:
+            result.set_exception(exc)
+            return
+         try:
+            result.set_result(method(
+               _method_context(_replay(replies.result())), *args, **kwargs))
+         except Exception as e:
+            result.set_exception(e)
+
+      replies = [self._request(r) for r in rec.requests]
+      asyncio.gather(*replies).add_done_callback(finish)
+      return result
+
+   async def _read_replies(self):
+      exc = error("connection to pigpio closed")
+      try:
+         while True:
+            header = await self._reader.readexactly(_SOCK_CMD_LEN)
+            future, ext = self._pending.popleft()
+            data = b''
+            if ext:
+               res = _REPLY.unpack(header)[3]
+               if res > 0:
+                  data = await self._reader.readexactly(res)
+            if not future.done():
+               future.set_result((header, data))
+      except (asyncio.IncompleteReadError, ConnectionError) as e:
+         exc = error("connection to pigpio lost ({})".format(e))
+      finally:
+         self.connected = False
+         while self._pending:
+            future, ext = self._pending.popleft()
+            if not future.done():
+               future.set_exception(exc)
+
+   def batch(self):
+      """
+      Returns a batch which waits for a group of commands.
+
+      Commands are pipelined anyway, the batch collects their
+      results in its results list (an exception instance for a
+      failed command) and raises the first error on leaving.
+
+      ...
+      async with pi.batch() as b:
+         b.set_PWM_dutycycle(17, 128)
+         b.set_servo_pulsewidth(12, 1500)
+      print(b.results) # [0, 0]
+      ...
+      """
+      return _batch(self)
+
+   def exec_batch(self):
+      """
+      Returns a batch whose commands the daemon runs as one request,
+      see pigpio.pi.exec_batch.
+
+      The commands are queued, leaving the block sends them and
+      waits for all the results.
+
+      ...
+      async with pi.exec_batch() as b:
+         b.set_PWM_dutycycle(17, 128)
+         b.set_servo_pulsewidth(12, 1500)
+      print(b.results) # [0, 0]
+      ...
+      """
+      return _exec_batch(self)
+
+   async def drain(self):
+      """
+      Waits until the write buffer has been flushed to the socket.
+      """
+      await self._writer.drain()
+
+   async def _notifications(self):
+      if self._notify_open is None:
+         self._notify = _notify(self)
+         self._notify_open = asyncio.ensure_future(
+            self._notify.open(self._host, self._port, self._unix_path))
+      await self._notify_open
+      return self._notify
+
+   async def callback(self, user_gpio, edge=RISING_EDGE, func=None):
+      """
+      Calls a user supplied function (a callback) whenever the
+      specified GPIO edge is detected.
+
+      user_gpio:= 0-31.
+           edge:= EITHER_EDGE, RISING_EDGE (default), or FALLING_EDGE.
+           func:= user supplied callback function.
+
+      As pigpio.pi.callback but the function is called on the event
+      loop.  If it is a coroutine function it is run as a task.
+      The returned callback is cancelled with await cb.cancel().
+
+      ...
+      async def cbf(gpio, level, tick):
+         await queue.put((gpio, level, tick))
+
+      cb1 = await pi.callback(22, pigpio.EITHER_EDGE, cbf)
+      cb2 = await pi.callback(4)  # default tally callback
+      ...
+      await cb1.cancel()
+      ...
+      """
+      notify = await self._notifications()
+      cb = _callback(notify, user_gpio, edge, func)
+      await notify.append(cb.callb)
+      return cb
+
+   async def event_callback(self, event, func=None):
+      """
+      Calls a user supplied function (a callback) whenever the
+      specified event is signalled.
+
+      event:= 0-31.
+       func:= user supplied callback function.
+
+      As pigpio.pi.event_callback but the function is called on
+      the event loop.
+      """
+      notify = await self._notifications()
+      cb = _event(notify, event, func)
+      await notify.append_event(cb.callb)
+      return cb
+
+   def edges(self, user_gpio, edge=EITHER_EDGE, maxsize=0):
+      """
+      Returns an async iterator of (gpio, level, tick) for the GPIO.
+
+      user_gpio:= 0-31.
+           edge:= EITHER_EDGE (default), RISING_EDGE, or FALLING_EDGE.
+        maxsize:= queue length, 0 for unbounded.  When full, edges
+                  are counted in dropped instead of queued.
+
+      ...
+      async with pi.edges(23) as edges:
+         async for gpio, level, tick in edges:
+            if level == 1:
+               break
+      ...
+      """
+      return _edges(self, user_gpio, edge, maxsize)
+
+   async def wait_for_edge(self, user_gpio, edge=RISING_EDGE, wait_timeout=60.0):
+      """
+      Waits for an edge event on a GPIO.
+
+         user_gpio:= 0-31.
+              edge:= EITHER_EDGE, RISING_EDGE (default), or
+                      FALLING_EDGE.
+      wait_timeout:= >=0.0 (default 60.0).
+
+      Returns True if the edge is detected, otherwise False.  Unlike
+      pigpio.pi.wait_for_edge it does not poll.
+
+      ...
+      if await pi.wait_for_edge(23):
+         print("Rising edge detected")
+      ...
+      """
+      future = asyncio.get_running_loop().create_future()
+      def func(gpio, level, tick):
+         if not future.done():
+            future.set_result(True)
+      cb = await self.callback(user_gpio, edge, func)
+      try:
+         return await asyncio.wait_for(future, wait_timeout)
+      except asyncio.TimeoutError:
+         return False
+      finally:
+         await cb.cancel()
+
+   async def wait_for_event(self, event, wait_timeout=60.0):
+      """
+      Waits for an event.
+
+             event:= 0-31.
+      wait_timeout:= >=0.0 (default 60.0).
+
+      Returns True if the event is detected, otherwise False.
+      """
+      future = asyncio.get_running_loop().create_future()
+      def func(event, tick):
+         if not future.done():
+            future.set_result(True)
+      cb = await self.event_callback(event, func)
+      try:
+         return await asyncio.wait_for(future, wait_timeout)
+      except asyncio.TimeoutError:
+         return False
+      finally:
+         await cb.cancel()
+
+   async def edge_waiter(self, user_gpio, edge=RISING_EDGE):
+      """
+      Returns a waiter for edges on a GPIO, see
+      pigpio.pi.edge_waiter.
+
+      await waiter.wait(timeout) returns (level, tick) for the
+      latest edge since the previous wait, or None on timeout.
+
+      ...
+      w = await pi.edge_waiter(23, pigpio.EITHER_EDGE)
+      await pi.write(24, 1)
+      edge = await w.wait(0.1)
+      await w.cancel()
+      ...
+      """
+      return await _edge_waiter(self, user_gpio, edge).start()
+
+   async def event_waiter(self, event):
+      """
+      Returns a waiter for an event, see pigpio.pi.event_waiter.
+
+      await waiter.wait(timeout) returns the tick of the latest
+      event since the previous wait, or None on timeout.
+      """
+      return await _event_waiter(self, event).start()
+
+   def notify_stats(self):
+      """
+      Returns notification counters as a tuple (received, lost,
+      overflowed, queued, max_queued), see pigpio.pi.notify_stats.
+
+      Callbacks run in the event loop as reports are read, so only
+      received and lost are counted.
+      """
+      n = self._notify
+      if n is None:
+         return (0, 0, 0, 0, 0)
+      return (n.received, n.lost, 0, 0, 0)
+
+   async def stop(self):
+      """Release pigpio resources.
+
+      ...
+      await pi.stop()
+      ...
+      """
+      self.connected = False
+      if self._notify is not None:
+         await self._notify.close()
+         self._notify = None
+         self._notify_open = None
+      if self._writer is not None:
+         self._writer.close()
+         self._writer = None
+      if self._task is not None:
+         self._task.cancel()
+         self._task = None
+
+async def connect(host = os.getenv("PIGPIO_ADDR", 'localhost'),
+                  port = os.getenv("PIGPIO_PORT", 8888),
+                  unix_path = None):
+   """
+   Connects to the pigpio daemon and returns a pigpio_asyncio.pi.
+
+   host:= the host name of the Pi on which the pigpio daemon is
+          running.  The default is localhost unless overridden by
+          the PIGPIO_ADDR environment variable.
+
+   port:= the port number on which the pigpio daemon is listening.
+          The default is 8888 unless overridden by the PIGPIO_PORT
+          environment variable.
+
+   unix_path:= the daemon's Unix domain socket (pigpiod -u), if set
+          host and port are not used.
+
+   ...
+   pi = await pigpio_asyncio.connect('soft', 8888)
+   pi = await pigpio_asyncio.connect(unix_path='/var/run/pigpio.sock')
+   ...
+   """
+   return await pi().connect(host, port, unix_path)
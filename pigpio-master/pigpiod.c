@@ -59,6 +59,7 @@ static int      foreground             = PI_DEFAULT_FOREGROUND;
 static unsigned DMAprimaryChannel      = PI_DEFAULT_DMA_NOT_SET;
 static unsigned DMAsecondaryChannel    = PI_DEFAULT_DMA_NOT_SET;
 static unsigned socketPort             = PI_DEFAULT_SOCKET_PORT;
+static char *    socketPath             = "";
 static unsigned memAllocMode           = PI_DEFAULT_MEM_ALLOC_MODE;
 static uint64_t updateMask             = -1;
 
@@ -107,12 +108,15 @@ void usage()
       "   -p value,   socket port, 1024-32000,           default 8888\n" \
       "   -s value,   sample rate, 1, 2, 4, 5, 8, or 10, default 5\n" \
       "   -t value,   clock peripheral, 0=PWM 1=PCM,     default PCM\n" \
+      "   -u path,    also listen on Unix socket path,   default none\n" \
       "   -v, -V,     display pigpio version and exit\n" \
       "   -x mask,    GPIO which may be updated,         default board GPIO\n" \
       "EXAMPLE\n" \
       "sudo pigpiod -s 2 -b 200 -f\n" \
       "  Set a sample rate of 2 microseconds with a 200 millisecond\n" \
       "  buffer.  Disable the fifo interface.\n" \
+      "sudo pigpiod -u /var/run/pigpio.sock\n" \
+      "  Accept local clients on a Unix socket as well as port 8888.\n" \
    "\n", PIGPIO_VERSION);
 }
 
@@ -163,7 +167,7 @@ static void initOpts(int argc, char *argv[])
    uint32_t addr;
    int64_t mask;
 
-   while ((opt = getopt(argc, argv, "a:b:c:d:e:fgkln:mp:s:t:x:vV")) != -1)
+   while ((opt = getopt(argc, argv, "a:b:c:d:e:fgkln:mp:s:t:u:x:vV")) != -1)
    {
       switch (opt)
       {
@@ -263,6 +267,12 @@ static void initOpts(int argc, char *argv[])
             else fatal("invalid -t option (%d)", i);
             break;
 
+         case 'u':
+            if (strlen(optarg) < PI_MAX_SOCKET_PATH)
+               socketPath = optarg;
+            else fatal("invalid -u option (%s)", optarg);
+            break;
+
          case 'v':
          case 'V':
             printf("%d\n", PIGPIO_VERSION);
@@ -358,6 +368,8 @@ int main(int argc, char **argv)
 
    gpioCfgSocketPort(socketPort);
 
+   gpioCfgSocketPath(socketPath);
+
    gpioCfgMemAlloc(memAllocMode);
 
    if (updateMaskSet) gpioCfgPermissions(updateMask);
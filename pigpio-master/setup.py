@@ -13,7 +13,7 @@ setup(name='pigpio',
       long_description='Raspberry Pi Python module to access the pigpio daemon',
       download_url='http://abyz.me.uk/rpi/pigpio/pigpio.zip',
       license='unlicense.org',
-      py_modules=['pigpio'],
+      py_modules=['pigpio', 'pigpio_asyncio'],
       keywords=['raspberrypi', 'gpio',],
       classifiers=[
          "Programming Language :: Python :: 2",
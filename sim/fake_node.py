@@ -0,0 +1,134 @@
+# 戦車ノード (main.py) の代役 (観戦ハブ hub.py の試験用)
+# main.py と同じ /stream (合成カメラ), /ws (バイナリテレメトリ), /status を出す。
+# 状態は制御プロセスの代わりに時間の関数で作る (共有メモリ・ハードウェア不要)。
+# /metrics でノード側の接続数と CPU 時間を返すので、
+# ハブの観客を増やしてもノードの負荷が変わらないことを確かめられる。
+#
+#   python -m sim.fake_node --port 8081
+#   python hub.py --standin 3            # ハブのプロセス内に3台立てる
+
+import argparse
+import asyncio
+import math
+import time
+
+from aiohttp import web
+
+from core.state import FIELDS, Snapshot
+from core.streaming import stream_mjpeg
+from core.telemetry import TelemetryEncoder
+from drivers.camera import Camera
+from drivers.capture import SyntheticSource, jpeg_frames
+
+PUSH_INTERVAL = 0.05    # main.py と同じ20Hz
+
+
+class FakeNode:
+    def __init__(self, name="standin", fps=10, seed=None):
+        self.name = name
+        self.camera = Camera(source=SyntheticSource(jpeg_frames(), fps=fps, seed=seed))
+        self.phase = (seed or 0) * 1.7      # ノードごとに動きをずらす
+        self.ws_clients = 0
+        self.started = time.monotonic()
+        self._blank = Snapshot._make([0] * len(FIELDS))
+        self.runner = None
+
+    def snapshot(self):
+        """制御プロセスが書く共有状態の代わり"""
+        now = time.monotonic()
+        t = now - self.started + self.phase
+        return self._blank._replace(
+            updated=now,
+            speed=abs(math.sin(t * 0.5)),
+            pan=60.0 * math.sin(t * 0.3),
+            tilt=10.0 + 15.0 * math.sin(t * 0.7),
+            machinegun=int(t) % 5 == 0,
+            link_up=True,
+            fire_seq=int(t / 5),
+            mg_seq=int(t / 5),
+            tick_count=int((now - self.started) * 20),
+        )
+
+    async def stream_handler(self, request):
+        return await stream_mjpeg(request, self.camera)
+
+    async def status_handler(self, request):
+        snap = self.snapshot()
+        return web.json_response({"fired": False, "machinegun": bool(snap.machinegun),
+                                  "speed": snap.speed, "age_ms": 0.0})
+
+    async def metrics_handler(self, request):
+        return web.json_response({
+            "name": self.name,
+            "streams": self.camera.viewers,
+            "ws": self.ws_clients,
+            "frames": self.camera.frame_count,
+            "cpu_s": round(time.process_time(), 3),
+        })
+
+    async def ws_handler(self, request):
+        ws = web.WebSocketResponse(heartbeat=10)
+        await ws.prepare(request)
+        self.ws_clients += 1
+        push = asyncio.create_task(self._push_state(ws))
+        try:
+            async for msg in ws:
+                pass
+        finally:
+            push.cancel()
+            self.ws_clients -= 1
+        return ws
+
+    async def _push_state(self, ws):
+        encoder = TelemetryEncoder()
+        last = None
+        while not ws.closed:
+            snap = self.snapshot()
+            key = (round(snap.speed, 3), round(snap.pan, 1), round(snap.tilt, 1),
+                   snap.machinegun, snap.fire_seq, snap.mg_seq)
+            if key != last:
+                await ws.send_bytes(encoder.encode(snap))
+                last = key
+            await asyncio.sleep(PUSH_INTERVAL)
+
+    async def start(self, host="127.0.0.1", port=0):
+        """待ち受けを始めて、実際のポートを返す"""
+        await self.camera.start()
+        app = web.Application()
+        app.router.add_get('/stream', self.stream_handler)
+        app.router.add_get('/status', self.status_handler)
+        app.router.add_get('/metrics', self.metrics_handler)
+        app.router.add_get('/ws', self.ws_handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        return site._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        await self.camera.stop()
+        if self.runner:
+            await self.runner.cleanup()
+
+
+async def _main(args):
+    node = FakeNode(args.name, fps=args.fps, seed=args.seed)
+    port = await node.start(args.host, args.port)
+    print(f"fake node '{args.name}' listening on {args.host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await node.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="tank node stand-in for the fleet hub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--name", default="standin")
+    parser.add_argument("--fps", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
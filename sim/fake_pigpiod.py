@@ -0,0 +1,1066 @@
+# pigpiod の代役 (実機なしのテスト・ベンチマーク用)
+# pigpio.py (_pigpio_command / _pigpio_command_ext) と同じソケットプロトコルを話す
+# asyncio サーバ。GPIO レベル・PWM/サーボ状態・ウェーブ・通知を
+# 仮想ティッククロックの上でシミュレートする。
+#
+# プロトコル (pigpio.c pthSocketThreadHandler と同じ, リトルエンディアン)
+#   要求  16バイト: cmd u32, p1 u32, p2 u32, p3 u32 (p3 > 0 なら p3 バイトの拡張データが続く)
+#   応答  16バイト: cmd, p1, p2 をそのまま返し, 最後の4バイトが結果 (i32)
+#         EXT_RESPONSE のコマンドは結果 > 0 のとき、その長さのデータが続く
+#   NOIB 以降、そのソケットは通知ストリームになる (12バイト: seq u16, flags u16, tick u32, level u32)
+#
+# 実機との違い
+#   - PWM/サーボはデューティ・パルス幅を記録するだけで、波形のエッジは発生させない
+#     (デューティ 0 / 最大のときだけレベルを変える)
+#   - スクリプトは命令の一部 (ld/lda/sta/add/sub/cmp/jmp/jz/jnz/mils/w/pwm/servo/halt) だけ実行する
+#   - BATCH (pi.exec_batch) はまとめて1回の latency で、中のコマンドは順に実行する
+#   - パイプ通知 (NO) は fifo_prefix を与えたときだけ (/dev/pigpioN の代わりに fifo_prefix + N)。
+#     実機は FIFO が一杯なら捨てるが、こちらは空くまで溜めて書く
+#
+# 入力の注入
+#   - 同じプロセスから: daemon.set_input(gpio, level), daemon.pulse_train(...)
+#   - ソケット経由 (pi.custom_1): CF1 p1=gpio p2=level [拡張 '<II' 回数, 周期µs]
+#
+#   python -m sim.fake_pigpiod                       # 127.0.0.1:8888
+#   python -m sim.fake_pigpiod --port 18888 --latency-us 300
+#   python -m sim.fake_pigpiod --unix-path /tmp/pigpio.sock    # pigpiod -u と同じく Unix ソケットでも受ける
+#   PIGPIO_PORT=18888 python test_full.py            # gpiozero/pigpio.py からそのまま使える
+
+import argparse
+import asyncio
+import os
+import struct
+import threading
+import time
+from collections import defaultdict
+
+# --- pigpio.h のコマンド番号 (使う分だけ) ---
+PI_CMD_MODES = 0
+PI_CMD_MODEG = 1
+PI_CMD_PUD = 2
+PI_CMD_READ = 3
+PI_CMD_WRITE = 4
+PI_CMD_PWM = 5
+PI_CMD_PRS = 6
+PI_CMD_PFS = 7
+PI_CMD_SERVO = 8
+PI_CMD_WDOG = 9
+PI_CMD_BR1 = 10
+PI_CMD_BR2 = 11
+PI_CMD_BC1 = 12
+PI_CMD_BC2 = 13
+PI_CMD_BS1 = 14
+PI_CMD_BS2 = 15
+PI_CMD_TICK = 16
+PI_CMD_HWVER = 17
+PI_CMD_NO = 18
+PI_CMD_NB = 19
+PI_CMD_NP = 20
+PI_CMD_NC = 21
+PI_CMD_PRG = 22
+PI_CMD_PFG = 23
+PI_CMD_PRRG = 24
+PI_CMD_PIGPV = 26
+PI_CMD_WVCLR = 27
+PI_CMD_WVAG = 28
+PI_CMD_WVBSY = 32
+PI_CMD_WVHLT = 33
+PI_CMD_WVSM = 34
+PI_CMD_WVSP = 35
+PI_CMD_WVSC = 36
+PI_CMD_TRIG = 37
+PI_CMD_PROC = 38
+PI_CMD_PROCD = 39
+PI_CMD_PROCR = 40
+PI_CMD_PROCS = 41
+PI_CMD_PROCP = 45
+PI_CMD_WVCRE = 49
+PI_CMD_WVDEL = 50
+PI_CMD_WVTX = 51
+PI_CMD_WVTXR = 52
+PI_CMD_WVNEW = 53
+PI_CMD_GDC = 83
+PI_CMD_GPW = 84
+PI_CMD_HC = 85
+PI_CMD_HP = 86
+PI_CMD_CF1 = 87
+PI_CMD_FG = 97
+PI_CMD_FN = 98
+PI_CMD_NOIB = 99
+PI_CMD_WVTXM = 100
+PI_CMD_WVTAT = 101
+PI_CMD_EVM = 115
+PI_CMD_EVT = 116
+PI_CMD_PROCU = 117
+PI_CMD_BATCH = 119
+
+# 結果が正ならその長さのデータが応答の後に続くコマンド (pigpio.c と同じ)
+EXT_RESPONSE = {PI_CMD_PROCP, PI_CMD_BATCH}
+
+# BATCH に入れられないコマンド (拡張データを送る・返すもの, pigpio.c の myBatchable のうちここにある分)
+NOT_BATCHABLE = {PI_CMD_WVAG, PI_CMD_TRIG, PI_CMD_PROC, PI_CMD_PROCR, PI_CMD_PROCU,
+                 PI_CMD_HP, PI_CMD_CF1, PI_CMD_FN, PI_CMD_NOIB, PI_CMD_BATCH} | EXT_RESPONSE
+
+# --- エラーコード ---
+PI_BAD_USER_GPIO = -2
+PI_BAD_GPIO = -3
+PI_BAD_MODE = -4
+PI_BAD_LEVEL = -5
+PI_BAD_PUD = -6
+PI_BAD_PULSEWIDTH = -7
+PI_BAD_DUTYCYCLE = -8
+PI_BAD_WDOG_TIMEOUT = -15
+PI_BAD_DUTYRANGE = -21
+PI_NO_HANDLE = -24
+PI_BAD_HANDLE = -25
+PI_NOT_PERMITTED = -41
+PI_BAD_PULSELEN = -46
+PI_BAD_SCRIPT = -47
+PI_BAD_SCRIPT_ID = -48
+PI_BAD_WAVE_ID = -66
+PI_NO_WAVEFORM_ID = -70
+PI_UNKNOWN_COMMAND = -88
+PI_NOT_PWM_GPIO = -92
+PI_NOT_SERVO_GPIO = -93
+PI_NOT_HPWM_GPIO = -95
+PI_BAD_HPWM_DUTY = -97
+PI_BAD_FILTER = -125
+PI_BAD_EVENT_ID = -143
+PI_BAD_BATCH = -147
+
+PI_OUTPUT = 1
+PI_PUD_DOWN, PI_PUD_UP = 1, 2
+PI_SCRIPT_HALTED, PI_SCRIPT_RUNNING, PI_SCRIPT_FAILED = 1, 2, 4
+NO_TX_WAVE = 9999
+
+NTFY_FLAGS_EVENT = 1 << 7
+NTFY_FLAGS_ALIVE = 1 << 6
+NTFY_FLAGS_WDOG = 1 << 5
+
+PIGPIO_VERSION = 79
+PI_ZERO_W = 0x9000c1
+MAX_USER_GPIO = 31
+MAX_GPIO = 53
+MAX_HANDLES = 32
+MAX_WAVES = 250
+KEEPALIVE_US = 60000000
+HPWM_GPIOS = (12, 13, 18, 19)
+
+# サンプルレート 5µs のときの PWM 周波数 (pigpio のデフォルト)
+PWM_FREQS = (8000, 4000, 2000, 1600, 1000, 800, 500, 400, 320, 250,
+             200, 160, 100, 80, 50, 40, 20, 10)
+
+CMD = struct.Struct("<IIII")
+RESPONSE = struct.Struct("<IIIi")
+REPORT = struct.Struct("<HHII")
+PULSE = struct.Struct("<III")
+
+
+class VirtualClock:
+    """pigpio の tick (µs, 32bit で一周) を作る
+
+    rate: 1.0 = 実時間, 10.0 = 10倍速, 0 = 手動 (advance() でだけ進む)
+    """
+
+    def __init__(self, rate=1.0, start_us=0):
+        self.rate = rate
+        self._base_us = float(start_us)
+        self._base_t = time.monotonic()
+
+    def now_us(self):
+        """一周しない µs (内部計算用)"""
+        if self.rate == 0:
+            return self._base_us
+        return self._base_us + (time.monotonic() - self._base_t) * 1e6 * self.rate
+
+    def tick(self):
+        return int(self.now_us()) & 0xFFFFFFFF
+
+    def advance(self, us):
+        self._base_us += us
+
+    def real_delay(self, us):
+        """仮想時間 us が実時間で何秒か (手動クロックでは待たない)"""
+        return us / 1e6 / self.rate if self.rate else 0.0
+
+
+class Gpio:
+    __slots__ = ("mode", "pud", "pwm_duty", "pwm_range", "pwm_freq",
+                 "servo", "hpwm", "wdog_ms", "wdog_timer", "glitch", "noise")
+
+    def __init__(self):
+        self.mode = 0
+        self.pud = 0
+        self.pwm_duty = None        # None = PWM 停止中
+        self.pwm_range = 255
+        self.pwm_freq = 800
+        self.servo = 0              # パルス幅 µs (0 = 停止)
+        self.hpwm = None            # (周波数, デューティ 0-1e6)
+        self.wdog_ms = 0
+        self.wdog_timer = None
+        self.glitch = 0
+        self.noise = (0, 0)
+
+
+class Notify:
+    """NOIB (ソケット) か NO (FIFO) で開かれた通知ハンドル"""
+    __slots__ = ("handle", "writer", "bits", "event_bits", "active", "seq",
+                 "pending", "last_us", "sent")
+
+    def __init__(self, handle, writer):
+        self.handle = handle
+        self.writer = writer
+        self.bits = 0
+        self.event_bits = 0
+        self.active = False
+        self.seq = 0
+        self.pending = bytearray()
+        self.last_us = 0.0
+        self.sent = 0
+
+
+class FifoWriter:
+    """パイプ通知の書き手 (StreamWriter と同じ write/close だけ持つ)"""
+    CHUNK = 4092        # PIPE_BUF 以下のレポートの倍数 (1回の write が分割されない)
+
+    def __init__(self, path, loop):
+        self.path = path
+        self.loop = loop
+        if os.path.exists(path):
+            os.unlink(path)
+        os.mkfifo(path, 0o664)
+        # 実機 (gpioNotifyOpenWithSize) と同じく自分でも読み手として開いておく
+        self.fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+        self.backlog = bytearray()
+        self.offset = 0
+        self.waiting = False
+
+    def write(self, data):
+        self.backlog += data
+        if not self.waiting:
+            self._drain()
+
+    def _drain(self):
+        view = memoryview(self.backlog)
+        try:
+            while self.offset < len(view):
+                self.offset += os.write(self.fd, view[self.offset:self.offset + self.CHUNK])
+        except BlockingIOError:
+            if not self.waiting:
+                self.waiting = True
+                self.loop.add_writer(self.fd, self._drain)
+            return
+        finally:
+            view.release()
+        self.backlog.clear()
+        self.offset = 0
+        if self.waiting:
+            self.waiting = False
+            self.loop.remove_writer(self.fd)
+
+    def close(self):
+        if self.fd is None:
+            return
+        if self.waiting:
+            self.loop.remove_writer(self.fd)
+        os.close(self.fd)
+        os.unlink(self.path)
+        self.fd = None
+
+
+class CommandStats:
+    """コマンドごとの回数と処理時間 (サーバ内部の時間のみ, ネットワークは含まない)"""
+
+    def __init__(self):
+        self.count = defaultdict(int)
+        self.total = defaultdict(float)
+        self.worst = defaultdict(float)
+
+    def add(self, cmd, seconds):
+        self.count[cmd] += 1
+        self.total[cmd] += seconds
+        if seconds > self.worst[cmd]:
+            self.worst[cmd] = seconds
+
+    def table(self):
+        names = {v: k[7:] for k, v in globals().items() if k.startswith("PI_CMD_")}
+        return {
+            names.get(cmd, str(cmd)): {
+                "count": n,
+                "mean_us": round(self.total[cmd] / n * 1e6, 2),
+                "max_us": round(self.worst[cmd] * 1e6, 2),
+            }
+            for cmd, n in sorted(self.count.items())
+        }
+
+
+class FakePigpiod:
+    def __init__(self, clock=None, latency_us=0, hwver=PI_ZERO_W, fifo_prefix=None):
+        self.clock = clock or VirtualClock()
+        self.fifo_prefix = fifo_prefix     # NO で作る FIFO の名前 (None なら NO は PI_NO_HANDLE)
+        self.latency = latency_us / 1e6     # 1コマンドごとに足す遅延 (実機の往復時間の模擬)
+        self.hwver = hwver
+        self.gpios = [Gpio() for _ in range(MAX_GPIO + 1)]
+        self.levels = [0, 0]                # バンク1 (0-31), バンク2 (32-53)
+        self.inputs = {}                    # 外部から与えた入力レベル
+        self.notify = {}
+        self.stats = CommandStats()
+        self.on_command = None              # 計測用フック: on_command(cmd, p1, p2, 受信時刻 perf_counter)
+        self.clients = 0
+        self._connections = {}              # 接続ごとの処理タスク -> writer (close で閉じて終わるのを待つ)
+        self._closed = None
+        self.server = None
+        self.unix_server = None
+        self.unix_path = None
+        self.loop = None
+        self._flush_scheduled = False
+
+        self.wave_pulses = []               # 作成中のウェーブ
+        self.waves = {}                     # wave_id -> [(on, off, delay), ...]
+        self.wave_task = None
+        self.wave_tx = NO_TX_WAVE
+        self.scripts = {}                   # script_id -> Script
+
+        self.handlers = {
+            PI_CMD_MODES: self._modes, PI_CMD_MODEG: self._modeg,
+            PI_CMD_PUD: self._pud, PI_CMD_READ: self._read,
+            PI_CMD_WRITE: self._write, PI_CMD_PWM: self._pwm,
+            PI_CMD_PRS: self._prs, PI_CMD_PFS: self._pfs,
+            PI_CMD_SERVO: self._servo, PI_CMD_WDOG: self._wdog,
+            PI_CMD_BR1: lambda p1, p2, ext: self.levels[0],
+            PI_CMD_BR2: lambda p1, p2, ext: self.levels[1],
+            PI_CMD_BC1: lambda p1, p2, ext: self._write_bits(0, p1, 0),
+            PI_CMD_BC2: lambda p1, p2, ext: self._write_bits(1, p1, 0),
+            PI_CMD_BS1: lambda p1, p2, ext: self._write_bits(0, p1, 1),
+            PI_CMD_BS2: lambda p1, p2, ext: self._write_bits(1, p1, 1),
+            PI_CMD_TICK: lambda p1, p2, ext: self.clock.tick(),
+            PI_CMD_HWVER: lambda p1, p2, ext: self.hwver,
+            PI_CMD_PIGPV: lambda p1, p2, ext: PIGPIO_VERSION,
+            PI_CMD_NO: self._no,
+            PI_CMD_NB: self._nb, PI_CMD_NP: self._np,
+            PI_CMD_EVM: self._evm, PI_CMD_EVT: self._evt,
+            PI_CMD_PRG: self._prg, PI_CMD_PFG: self._pfg, PI_CMD_PRRG: self._prrg,
+            PI_CMD_GDC: self._gdc, PI_CMD_GPW: self._gpw,
+            PI_CMD_HP: self._hp, PI_CMD_HC: self._hc,
+            PI_CMD_TRIG: self._trig, PI_CMD_FG: self._fg, PI_CMD_FN: self._fn,
+            PI_CMD_CF1: self._cf1,
+            PI_CMD_WVCLR: self._wvclr, PI_CMD_WVNEW: self._wvnew,
+            PI_CMD_WVAG: self._wvag, PI_CMD_WVCRE: self._wvcre,
+            PI_CMD_WVDEL: self._wvdel, PI_CMD_WVTX: self._wvtx,
+            PI_CMD_WVTXR: self._wvtxr, PI_CMD_WVTXM: self._wvtxm,
+            PI_CMD_WVBSY: lambda p1, p2, ext: int(self.wave_task is not None),
+            PI_CMD_WVHLT: self._wvhlt,
+            PI_CMD_WVTAT: lambda p1, p2, ext: self.wave_tx,
+            PI_CMD_WVSM: self._wvsm, PI_CMD_WVSP: self._wvsp, PI_CMD_WVSC: self._wvsp,
+            PI_CMD_PROC: self._proc, PI_CMD_PROCD: self._procd,
+            PI_CMD_PROCR: self._procr, PI_CMD_PROCS: self._procs,
+            PI_CMD_PROCP: self._procp, PI_CMD_PROCU: self._procu,
+            PI_CMD_BATCH: self._batch,
+        }
+
+    # --- サーバ ---
+    async def start(self, host="127.0.0.1", port=8888, unix_path=None):
+        self.loop = asyncio.get_running_loop()
+        self._closed = asyncio.Event()
+        self.server = await asyncio.start_server(self._client, host, port)
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            self.unix_server = await asyncio.start_unix_server(self._client, unix_path)
+            self.unix_path = unix_path
+        self._keepalive = asyncio.create_task(self._keepalive_loop())
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self._keepalive.cancel()
+        self._wave_stop()
+        self.server.close()
+        if self.unix_server:
+            self.unix_server.close()
+        for n in list(self.notify.values()):
+            n.writer.close()
+        # つながったままのクライアントを閉じ、処理タスクが抜けるのを待つ (取り消すとループの終了時に騒ぐ)
+        for writer in list(self._connections.values()):
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self.server.wait_closed()
+        if self.unix_server:
+            await self.unix_server.wait_closed()
+            os.unlink(self.unix_path)
+        self._closed.set()
+
+    def stop(self):
+        """run_in_thread で起動したものを別のスレッドから閉じる (ループのスレッドも終わる)"""
+        asyncio.run_coroutine_threadsafe(self.close(), self.loop).result()
+
+    async def _client(self, reader, writer):
+        self.clients += 1
+        self._connections[asyncio.current_task()] = writer
+        own = []        # この接続で開いた通知ハンドル
+        handlers = self.handlers
+        try:
+            while True:
+                cmd, p1, p2, p3 = CMD.unpack(await reader.readexactly(16))
+                ext = await reader.readexactly(p3) if p3 else b""
+                t0 = time.perf_counter()
+                if self.on_command:
+                    self.on_command(cmd, p1, p2, t0)
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                    t0 = time.perf_counter()
+                if cmd == PI_CMD_NOIB:
+                    res = self._noib(writer)
+                    if res >= 0:
+                        own.append(res)
+                elif cmd == PI_CMD_NC:
+                    res = self._nc(p1)
+                else:
+                    handler = handlers.get(cmd)
+                    res = handler(p1, p2, ext) if handler else PI_UNKNOWN_COMMAND
+                data = b""
+                if type(res) is tuple:
+                    res, data = res
+                writer.write(RESPONSE.pack(cmd, p1, p2, res))
+                if data and cmd in EXT_RESPONSE:
+                    writer.write(data)
+                self.stats.add(cmd, time.perf_counter() - t0)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients -= 1
+            self._connections.pop(asyncio.current_task(), None)
+            for handle in own:
+                # NC で閉じた番号は別の接続が使い直していることがある
+                n = self.notify.get(handle)
+                if n is not None and n.writer is writer:
+                    del self.notify[handle]
+            writer.close()
+
+    def _batch(self, p1, p2, ext):
+        # (cmd, p1, p2) の並びを続けて実行し、結果を並べて返す (pigpio.c myDoBatch)
+        if not ext or len(ext) % 12:
+            return PI_BAD_BATCH
+        results = bytearray()
+        for cmd, q1, q2 in struct.iter_unpack("<III", ext):
+            if self.on_command:
+                self.on_command(cmd, q1, q2, time.perf_counter())
+            if cmd in NOT_BATCHABLE:
+                res = PI_BAD_BATCH
+            elif cmd == PI_CMD_NC:
+                res = self._nc(q1)
+            else:
+                handler = self.handlers.get(cmd)
+                res = handler(q1, q2, b"") if handler else PI_UNKNOWN_COMMAND
+            results += struct.pack("<I", res & 0xFFFFFFFF)
+        return len(results), bytes(results)
+
+    # --- レベル変化と通知 ---
+    def set_input(self, gpio, level, tick=None):
+        """外部からの入力 (ボタン・センサなど) をシミュレート"""
+        self.inputs[gpio] = level
+        if self.gpios[gpio].mode != PI_OUTPUT:
+            self._set_level(gpio, level, tick)
+
+    async def pulse_train(self, gpio, count, period_us, level=1):
+        """gpio を period_us ごとに count 回反転させる (tick は周期どおり、送出はまとめて)"""
+        tick = self.clock.now_us()
+        for i in range(count):
+            tick += period_us
+            self.set_input(gpio, level, int(tick) & 0xFFFFFFFF)
+            level ^= 1
+            if i % 256 == 255:
+                await asyncio.sleep(self.clock.real_delay(period_us * 256))
+        if self.clock.rate == 0:
+            self.clock.advance(period_us * count)
+
+    def _set_level(self, gpio, level, tick=None):
+        bank, bit = gpio >> 5, 1 << (gpio & 31)
+        old = self.levels[bank]
+        new = old | bit if level else old & ~bit
+        if new == old:
+            return
+        self.levels[bank] = new
+        if bank == 0:
+            self._report_change(bit, tick)
+            if self.gpios[gpio].wdog_ms:
+                self._arm_watchdog(gpio)
+
+    def _report_change(self, changed, tick=None):
+        if tick is None:
+            tick = self.clock.tick()
+        for n in self.notify.values():
+            if n.active and n.bits & changed:
+                self._report(n, 0, tick)
+
+    def _report(self, n, flags, tick):
+        n.pending += REPORT.pack(n.seq, flags, tick, self.levels[0])
+        n.seq = (n.seq + 1) & 0xFFFF
+        if not self._flush_scheduled:
+            # 同じループ周回で出たレポートは1回の write にまとめる (実機の 1ms バッチ相当)
+            self._flush_scheduled = True
+            self.loop.call_soon(self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        now = self.clock.now_us()
+        for n in self.notify.values():
+            if n.pending:
+                n.writer.write(bytes(n.pending))
+                n.sent += len(n.pending) // REPORT.size
+                n.pending.clear()
+                n.last_us = now
+
+    def inject_reports(self, data):
+        """組み立て済みのレポート列 (12バイト × n) をそのまま通知ストリームに書く
+
+        1件ずつ _report を通すとこちらが先に詰まるので、クライアント側のデコード速度を
+        測るとき用 (bench/bench_notify.py)。ループのスレッドから呼ぶこと。
+        """
+        for n in self.notify.values():
+            if n.active:
+                n.writer.write(data)
+                n.sent += len(data) // REPORT.size
+
+    def _arm_watchdog(self, gpio):
+        g = self.gpios[gpio]
+        if g.wdog_timer:
+            g.wdog_timer.cancel()
+            g.wdog_timer = None
+        if g.wdog_ms and self.clock.rate:
+            g.wdog_timer = self.loop.call_later(
+                self.clock.real_delay(g.wdog_ms * 1000), self._watchdog_fired, gpio)
+
+    def _watchdog_fired(self, gpio):
+        tick = self.clock.tick()
+        for n in self.notify.values():
+            if n.active and n.bits & (1 << gpio):
+                self._report(n, NTFY_FLAGS_WDOG | gpio, tick)
+        self.gpios[gpio].wdog_timer = None
+        self._arm_watchdog(gpio)     # 変化がない限り繰り返し発火する
+
+    async def _keepalive_loop(self):
+        while True:
+            await asyncio.sleep(1.0)
+            now = self.clock.now_us()
+            for n in self.notify.values():
+                if n.active and now - n.last_us > KEEPALIVE_US:
+                    self._report(n, NTFY_FLAGS_ALIVE, int(now) & 0xFFFFFFFF)
+
+    # --- 基本 GPIO ---
+    def _modes(self, gpio, mode, ext):
+        if gpio > MAX_GPIO:
+            return PI_BAD_GPIO
+        if mode > 7:
+            return PI_BAD_MODE
+        g = self.gpios[gpio]
+        if mode != PI_OUTPUT:
+            g.pwm_duty, g.servo = None, 0
+        g.mode = mode
+        if mode != PI_OUTPUT and gpio in self.inputs:
+            self._set_level(gpio, self.inputs[gpio])
+        return 0
+
+    def _modeg(self, gpio, p2, ext):
+        return self.gpios[gpio].mode if gpio <= MAX_GPIO else PI_BAD_GPIO
+
+    def _pud(self, gpio, pud, ext):
+        if gpio > MAX_GPIO:
+            return PI_BAD_GPIO
+        if pud > 2:
+            return PI_BAD_PUD
+        self.gpios[gpio].pud = pud
+        if pud and gpio not in self.inputs and self.gpios[gpio].mode != PI_OUTPUT:
+            self._set_level(gpio, 1 if pud == PI_PUD_UP else 0)
+        return 0
+
+    def _read(self, gpio, p2, ext):
+        if gpio > MAX_GPIO:
+            return PI_BAD_GPIO
+        return (self.levels[gpio >> 5] >> (gpio & 31)) & 1
+
+    def _write(self, gpio, level, ext):
+        if gpio > MAX_GPIO:
+            return PI_BAD_GPIO
+        if level > 1:
+            return PI_BAD_LEVEL
+        g = self.gpios[gpio]
+        g.pwm_duty, g.servo, g.mode = None, 0, PI_OUTPUT
+        self._set_level(gpio, level)
+        return 0
+
+    def _write_bits(self, bank, bits, level):
+        for b in range(32):
+            gpio = bank * 32 + b
+            if bits >> b & 1 and gpio <= MAX_GPIO and self.gpios[gpio].mode == PI_OUTPUT:
+                self._set_level(gpio, level)
+        return 0
+
+    # --- PWM / サーボ ---
+    def _pwm(self, gpio, duty, ext):
+        if gpio > MAX_USER_GPIO:
+            return PI_BAD_USER_GPIO
+        g = self.gpios[gpio]
+        if duty > g.pwm_range:
+            return PI_BAD_DUTYCYCLE
+        g.pwm_duty, g.servo, g.mode = duty, 0, PI_OUTPUT
+        if duty == 0:
+            self._set_level(gpio, 0)
+        elif duty == g.pwm_range:
+            self._set_level(gpio, 1)
+        return 0
+
+    def _prs(self, gpio, rng, ext):
+        if gpio > MAX_USER_GPIO:
+            return PI_BAD_USER_GPIO
+        if not 25 <= rng <= 40000:
+            return PI_BAD_DUTYRANGE
+        g = self.gpios[gpio]
+        if g.pwm_duty is not None:
+            g.pwm_duty = g.pwm_duty * rng // g.pwm_range
+        g.pwm_range = rng
+        return self._prrg(gpio, 0, ext)
+
+    def _pfs(self, gpio, freq, ext):
+        if gpio > MAX_USER_GPIO:
+            return PI_BAD_USER_GPIO
+        g = self.gpios[gpio]
+        g.pwm_freq = min(PWM_FREQS, key=lambda f: abs(f - freq))
+        return g.pwm_freq
+
+    def _prg(self, gpio, p2, ext):
+        return self.gpios[gpio].pwm_range if gpio <= MAX_USER_GPIO else PI_BAD_USER_GPIO
+
+    def _prrg(self, gpio, p2, ext):
+        if gpio > MAX_USER_GPIO:
+            return PI_BAD_USER_GPIO
+        return 200000 // self.gpios[gpio].pwm_freq
+
+    def _pfg(self, gpio, p2, ext):
+        return self.gpios[gpio].pwm_freq if gpio <= MAX_USER_GPIO else PI_BAD_USER_GPIO
+
+    def _gdc(self, gpio, p2, ext):
+        if gpio > MAX_USER_GPIO:
+            return PI_BAD_USER_GPIO
+        g = self.gpios[gpio]
+        if g.hpwm:
+            return g.hpwm[1]
+        return PI_NOT_PWM_GPIO if g.pwm_duty is None else g.pwm_duty
+
+    def _servo(self, gpio, width, ext):
+        if gpio > MAX_USER_GPIO:
+            return PI_BAD_USER_GPIO
+        if width and not 500 <= width <= 2500:
+            return PI_BAD_PULSEWIDTH
+        g = self.gpios[gpio]
+        g.servo, g.pwm_duty, g.mode = width, None, PI_OUTPUT
+        if not width:
+            self._set_level(gpio, 0)
+        return 0
+
+    def _gpw(self, gpio, p2, ext):
+        if gpio > MAX_USER_GPIO:
+            return PI_BAD_USER_GPIO
+        return self.gpios[gpio].servo or PI_NOT_SERVO_GPIO
+
+    def _hp(self, gpio, freq, ext):
+        duty, = struct.unpack_from("<I", ext) if len(ext) >= 4 else (0,)
+        if gpio not in HPWM_GPIOS:
+            return PI_NOT_HPWM_GPIO
+        if duty > 1000000:
+            return PI_BAD_HPWM_DUTY
+        g = self.gpios[gpio]
+        g.hpwm = (freq, duty) if freq else None
+        g.pwm_duty, g.servo = None, 0
+        return 0
+
+    def _hc(self, gpio, freq, ext):
+        return 0 if gpio in (4, 5, 6, 20, 21, 32, 34, 42, 43, 44) else PI_NOT_PERMITTED
+
+    def _wdog(self, gpio, timeout, ext):
+        if gpio > MAX_USER_GPIO:
+            return PI_BAD_USER_GPIO
+        if timeout > 60000:
+            return PI_BAD_WDOG_TIMEOUT
+        self.gpios[gpio].wdog_ms = timeout
+        self._arm_watchdog(gpio)
+        return 0
+
+    def _trig(self, gpio, length, ext):
+        level, = struct.unpack_from("<I", ext) if len(ext) >= 4 else (1,)
+        if gpio > MAX_USER_GPIO:
+            return PI_BAD_USER_GPIO
+        if not 1 <= length <= 100:
+            return PI_BAD_PULSELEN
+        if level > 1:
+            return PI_BAD_LEVEL
+        now = self.clock.now_us()
+        self._set_level(gpio, level, int(now) & 0xFFFFFFFF)
+        self._set_level(gpio, level ^ 1, int(now + length) & 0xFFFFFFFF)
+        return 0
+
+    def _fg(self, gpio, steady, ext):
+        if gpio > MAX_USER_GPIO:
+            return PI_BAD_USER_GPIO
+        if steady > 300000:
+            return PI_BAD_FILTER
+        self.gpios[gpio].glitch = steady
+        return 0
+
+    def _fn(self, gpio, steady, ext):
+        active, = struct.unpack_from("<I", ext) if len(ext) >= 4 else (0,)
+        if gpio > MAX_USER_GPIO:
+            return PI_BAD_USER_GPIO
+        if steady > 300000 or active > 1000000:
+            return PI_BAD_FILTER
+        self.gpios[gpio].noise = (steady, active)
+        return 0
+
+    def _cf1(self, gpio, level, ext):
+        """入力注入: custom_1(gpio, level [, struct.pack('<II', 回数, 周期µs)])"""
+        if gpio > MAX_USER_GPIO:
+            return PI_BAD_USER_GPIO
+        if len(ext) >= 8:
+            count, period = struct.unpack_from("<II", ext)
+            asyncio.ensure_future(self.pulse_train(gpio, count, period, level & 1))
+        else:
+            self.set_input(gpio, level & 1)
+        return 0
+
+    # --- 通知 ---
+    def _noib(self, writer):
+        free = [h for h in range(MAX_HANDLES) if h not in self.notify]
+        if not free:
+            return PI_NO_HANDLE
+        n = Notify(free[0], writer)
+        n.last_us = self.clock.now_us()
+        self.notify[n.handle] = n
+        return n.handle
+
+    def _no(self, p1, p2, ext):
+        if self.fifo_prefix is None:
+            return PI_NO_HANDLE
+        free = [h for h in range(MAX_HANDLES) if h not in self.notify]
+        if not free:
+            return PI_NO_HANDLE
+        n = Notify(free[0], FifoWriter(f"{self.fifo_prefix}{free[0]}", self.loop))
+        n.last_us = self.clock.now_us()
+        self.notify[n.handle] = n
+        return n.handle
+
+    def _nb(self, handle, bits, ext):
+        n = self.notify.get(handle)
+        if n is None:
+            return PI_BAD_HANDLE
+        n.bits, n.active = bits, True
+        return 0
+
+    def _np(self, handle, p2, ext):
+        n = self.notify.get(handle)
+        if n is None:
+            return PI_BAD_HANDLE
+        n.active = False
+        return 0
+
+    def _nc(self, handle):
+        # 実機と同じく通知を止めるだけで、ソケットは閉じない (FIFO は閉じて消す)
+        n = self.notify.pop(handle, None)
+        if n is None:
+            return PI_BAD_HANDLE
+        if isinstance(n.writer, FifoWriter):
+            n.writer.close()
+        return 0
+
+    def _evm(self, handle, bits, ext):
+        n = self.notify.get(handle)
+        if n is None:
+            return PI_BAD_HANDLE
+        n.event_bits, n.active = bits, True
+        return 0
+
+    def _evt(self, event, p2, ext):
+        if event > 31:
+            return PI_BAD_EVENT_ID
+        tick = self.clock.tick()
+        for n in self.notify.values():
+            if n.active and n.event_bits & (1 << event):
+                self._report(n, NTFY_FLAGS_EVENT | event, tick)
+        return 0
+
+    # --- ウェーブ ---
+    def _wvclr(self, p1, p2, ext):
+        self._wave_stop()
+        self.wave_pulses = []
+        self.waves.clear()
+        return 0
+
+    def _wvnew(self, p1, p2, ext):
+        self.wave_pulses = []
+        return 0
+
+    def _wvag(self, p1, p2, ext):
+        self.wave_pulses.extend(PULSE.iter_unpack(ext[:len(ext) // 12 * 12]))
+        return len(self.wave_pulses)
+
+    def _wvcre(self, p1, p2, ext):
+        free = [w for w in range(MAX_WAVES) if w not in self.waves]
+        if not free:
+            return PI_NO_WAVEFORM_ID
+        self.waves[free[0]] = self.wave_pulses
+        self.wave_pulses = []
+        return free[0]
+
+    def _wvdel(self, wave_id, p2, ext):
+        return 0 if self.waves.pop(wave_id, None) is not None else PI_BAD_WAVE_ID
+
+    def _wvtx(self, wave_id, p2, ext):
+        return self._wvtxm(wave_id, 0, ext)
+
+    def _wvtxr(self, wave_id, p2, ext):
+        return self._wvtxm(wave_id, 1, ext)
+
+    def _wvtxm(self, wave_id, mode, ext):
+        pulses = self.waves.get(wave_id)
+        if pulses is None:
+            return PI_BAD_WAVE_ID
+        self._wave_stop()
+        self.wave_tx = wave_id
+        self.wave_task = asyncio.ensure_future(self._wave_run(pulses, repeat=mode & 1))
+        return len(pulses) * 2 + 1      # 実機では DMA コントロールブロック数
+
+    def _wvhlt(self, p1, p2, ext):
+        self._wave_stop()
+        return 0
+
+    def _wvsm(self, sub, p2, ext):
+        pulses = self.waves.get(self.wave_tx, self.wave_pulses)
+        return sum(p[2] for p in pulses) if sub == 0 else 1800000000
+
+    def _wvsp(self, sub, p2, ext):
+        return len(self.wave_pulses) if sub == 0 else 12000
+
+    def _wave_stop(self):
+        if self.wave_task:
+            self.wave_task.cancel()
+            self.wave_task = None
+        self.wave_tx = NO_TX_WAVE
+
+    async def _wave_run(self, pulses, repeat):
+        # tick はパルスの予定時刻で打つ。待つのは 1ms 以上先になったときだけ
+        start = self.clock.now_us()
+        t = start
+        try:
+            while True:
+                for on, off, delay in pulses:
+                    for bank_bits, level in ((on, 1), (off, 0)):
+                        b = bank_bits
+                        while b:
+                            low = b & -b
+                            self._set_level(low.bit_length() - 1, level, int(t) & 0xFFFFFFFF)
+                            b ^= low
+                    t += delay
+                    ahead = t - self.clock.now_us()
+                    if ahead > 1000:
+                        await asyncio.sleep(self.clock.real_delay(ahead))
+                if not repeat or not pulses:
+                    break
+                await asyncio.sleep(0)
+        finally:
+            if self.wave_task is asyncio.current_task():
+                self.wave_task = None
+                self.wave_tx = NO_TX_WAVE
+
+    # --- スクリプト (よく使う命令だけを解釈して実行する) ---
+    def _proc(self, p1, p2, ext):
+        try:
+            program = compile_script(ext.decode("ascii", "replace"))
+        except ValueError:
+            return PI_BAD_SCRIPT
+        sid = max(self.scripts, default=-1) + 1
+        self.scripts[sid] = Script(program)
+        return sid
+
+    def _procd(self, sid, p2, ext):
+        script = self.scripts.pop(sid, None)
+        if script is None:
+            return PI_BAD_SCRIPT_ID
+        script.stop()
+        return 0
+
+    def _procr(self, sid, p2, ext):
+        script = self.scripts.get(sid)
+        if script is None:
+            return PI_BAD_SCRIPT_ID
+        self._procu(sid, p2, ext)
+        script.stop()
+        script.status = PI_SCRIPT_RUNNING
+        script.task = asyncio.ensure_future(self._script_run(script))
+        return 0
+
+    def _procs(self, sid, p2, ext):
+        script = self.scripts.get(sid)
+        if script is None:
+            return PI_BAD_SCRIPT_ID
+        script.stop()
+        return 0
+
+    def _procu(self, sid, p2, ext):
+        script = self.scripts.get(sid)
+        if script is None:
+            return PI_BAD_SCRIPT_ID
+        for i, (v,) in enumerate(struct.iter_unpack("<i", ext[:40])):
+            script.params[i] = v
+        return 0
+
+    def _procp(self, sid, p2, ext):
+        script = self.scripts.get(sid)
+        if script is None:
+            return PI_BAD_SCRIPT_ID
+        data = struct.pack("<11i", script.status, *script.params)
+        return len(data), data
+
+    async def _script_run(self, script):
+        regs = {"p": script.params, "v": script.vars}
+        acc = flag = 0
+        pc = steps = 0
+        program = script.program
+
+        def get(x):
+            return regs[x[0]][x[1]] if type(x) is tuple else x
+
+        try:
+            while pc < len(program):
+                op, args = program[pc]
+                pc += 1
+                if op == "ld":
+                    regs[args[0][0]][args[0][1]] = get(args[1])
+                elif op == "lda":
+                    acc = get(args[0])
+                elif op == "sta":
+                    regs[args[0][0]][args[0][1]] = acc
+                elif op in ("add", "sub"):
+                    acc = acc + get(args[0]) if op == "add" else acc - get(args[0])
+                    flag = acc
+                elif op == "cmp":
+                    flag = acc - get(args[0])
+                elif op == "jmp" or (op == "jz" and not flag) or (op == "jnz" and flag):
+                    pc = args[0]
+                elif op == "mils":
+                    await asyncio.sleep(self.clock.real_delay(get(args[0]) * 1000))
+                elif op == "w":
+                    self._write(get(args[0]), get(args[1]), b"")
+                elif op == "pwm":
+                    self._pwm(get(args[0]), get(args[1]), b"")
+                elif op == "servo":
+                    self._servo(get(args[0]), get(args[1]), b"")
+                elif op == "halt":
+                    break
+                steps += 1
+                if steps % 1000 == 0:
+                    await asyncio.sleep(0)     # 待ちのないループでもサーバーを止めない
+            script.status = PI_SCRIPT_HALTED
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            script.status = PI_SCRIPT_FAILED
+
+
+# 命令 -> 引数の数 (pigpio のスクリプト言語のうち実装しているもの)
+SCRIPT_OPS = {"tag": 1, "ld": 2, "lda": 1, "sta": 1, "add": 1, "sub": 1, "cmp": 1,
+              "jmp": 1, "jz": 1, "jnz": 1, "mils": 1, "w": 2, "pwm": 2, "servo": 2, "halt": 0}
+
+
+def compile_script(text):
+    """スクリプトを [(命令, 引数), ...] に変換 (tag はジャンプ先の位置に解決)"""
+    tokens = text.lower().split()
+    program, tags = [], {}
+    i = 0
+    while i < len(tokens):
+        op = tokens[i]
+        n = SCRIPT_OPS.get(op)
+        if n is None or i + 1 + n > len(tokens):
+            raise ValueError(f"bad script command: {op}")
+        args = [_operand(t) for t in tokens[i + 1:i + 1 + n]]
+        if op == "tag":
+            tags[args[0]] = len(program)
+        else:
+            program.append((op, args))
+        i += 1 + n
+    for op, args in program:
+        if op in ("jmp", "jz", "jnz"):
+            if args[0] not in tags:
+                raise ValueError(f"unresolved tag {args[0]}")
+            args[0] = tags[args[0]]
+    return program
+
+
+def _operand(token):
+    if token[0] in "pv" and token[1:].isdigit():
+        return token[0], int(token[1:])
+    return int(token)
+
+
+class Script:
+    __slots__ = ("program", "status", "params", "vars", "task")
+
+    def __init__(self, program):
+        self.program = program
+        self.status = PI_SCRIPT_HALTED
+        self.params = [0] * 10
+        self.vars = [0] * 150
+        self.task = None
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        self.status = PI_SCRIPT_HALTED
+
+
+def run_in_thread(port=0, unix_path=None, **kwargs):
+    """別スレッドのイベントループで起動する (同じプロセスの同期コードから使う)
+
+    返り値: (daemon, port)。 daemon.loop.call_soon_threadsafe で操作すること。止めるときは daemon.stop()。
+    unix_path を与えると TCP に加えてその Unix ソケットでも受ける。
+    """
+    daemon = FakePigpiod(**kwargs)
+    started = threading.Event()
+    result = {}
+
+    def main():
+        async def serve():
+            result["port"] = await daemon.start(port=port, unix_path=unix_path)
+            started.set()
+            await daemon._closed.wait()
+        asyncio.run(serve())
+
+    threading.Thread(target=main, name="fake-pigpiod", daemon=True).start()
+    started.wait()
+    return daemon, result["port"]
+
+
+async def _main(args):
+    daemon = FakePigpiod(VirtualClock(rate=args.rate), latency_us=args.latency_us,
+                         fifo_prefix=args.fifo_prefix)
+    port = await daemon.start(args.host, args.port, args.unix_path)
+    print(f"fake pigpiod listening on {args.host}:{port}" + (f" and {args.unix_path}" if args.unix_path else ""))
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await daemon.close()
+        for name, row in daemon.stats.table().items():
+            print(f"  {name:6} {row['count']:8}  mean {row['mean_us']:8.2f} µs  max {row['max_us']:8.2f} µs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pigpiod stand-in for tests and benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--rate", type=float, default=1.0, help="virtual tick clock speed")
+    parser.add_argument("--latency-us", type=float, default=0, help="extra delay per command")
+    parser.add_argument("--unix-path", default=None, help="also listen on this Unix domain socket")
+    parser.add_argument("--fifo-prefix", default=None,
+                        help="enable pipe notifications (NO) with FIFOs named PREFIX<handle>")
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
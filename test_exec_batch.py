@@ -0,0 +1,85 @@
+# pi.exec_batch (pigpio-master/pigpio.py) の要求のまとめ方と、pigpiod の代役での往復のテスト (実機不要)
+#   PYTHONPATH=pigpio-master python -m pytest -q test_exec_batch.py
+
+import struct
+
+import pytest
+
+pigpio = pytest.importorskip("pigpio")
+
+from sim.fake_pigpiod import run_in_thread
+
+REQUEST = struct.Struct("IIII")
+
+
+def _plain(cmd, p1=0, p2=0):
+    return REQUEST.pack(cmd, p1, p2, 0)
+
+
+def _with_ext(cmd, ext):
+    return REQUEST.pack(cmd, 0, 0, len(ext)) + ext
+
+
+def _triples(request):
+    cmd, p1, p2, p3 = REQUEST.unpack_from(request)
+    assert cmd == pigpio._PI_CMD_BATCH and p3 == len(request) - REQUEST.size
+    return list(struct.iter_unpack("III", request[REQUEST.size:]))
+
+
+def test_runs_of_plain_commands_become_one_batch():
+    requests = [_plain(5, 17, 128), _plain(5, 18, 0), _plain(8, 12, 1500)]
+    plan = pigpio._exec_batch_requests(requests)
+    assert len(plan) == 1
+    request, count = plan[0]
+    assert count == 3
+    assert _triples(request) == [(5, 17, 128), (5, 18, 0), (8, 12, 1500)]
+
+
+def test_commands_with_extension_split_the_runs():
+    update = _with_ext(117, struct.pack("i", 7))
+    requests = [_plain(5, 17, 1), _plain(5, 18, 2), update, _plain(5, 17, 3), update]
+    plan = pigpio._exec_batch_requests(requests)
+    assert [count for _, count in plan] == [2, 0, 0, 0]
+    assert plan[1][0] == update and plan[3][0] == update
+    assert plan[2][0] == requests[3]        # 1つだけならそのまま送る
+
+
+def test_long_runs_are_split():
+    requests = [_plain(5, 17, i % 256) for i in range(pigpio._EXEC_BATCH_MAX + 10)]
+    plan = pigpio._exec_batch_requests(requests)
+    assert [count for _, count in plan] == [pigpio._EXEC_BATCH_MAX, 10]
+    assert all(len(r) - REQUEST.size < 65536 for r, _ in plan)
+
+
+def test_empty():
+    assert pigpio._exec_batch_requests([]) == []
+
+
+@pytest.fixture
+def pi():
+    daemon, port = run_in_thread()
+    pi = pigpio.pi("127.0.0.1", port)
+    yield pi
+    pi.stop()
+    daemon.stop()
+
+
+def test_exec_batch_against_fake_daemon(pi):
+    sid = pi.store_script(b"tag 0 mils 10 jmp 0")
+    with pi.exec_batch() as b:
+        b.set_PWM_dutycycle(17, 10)
+        b.set_PWM_dutycycle(18, 20)
+        b.update_script(sid, [5])
+        b.set_PWM_dutycycle(17, 30)
+        b.get_PWM_dutycycle(17)
+    assert b.results == [0, 0, 0, 0, 30]
+
+
+def test_exec_batch_errors(pi):
+    with pytest.raises(pigpio.error):
+        with pi.exec_batch() as b:
+            b.set_PWM_dutycycle(40, 10)
+            b.set_PWM_dutycycle(17, 10)
+    assert b.results == [pigpio.PI_BAD_USER_GPIO, 0]
+    with pytest.raises(pigpio.error):
+        pi.exec_batch().i2c_read_device(0, 3)
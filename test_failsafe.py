@@ -0,0 +1,106 @@
+# リンク断のフェイルセーフ (core/failsafe.py) のテスト (実機不要, pigpiod は sim.fake_pigpiod)
+#   PYTHONPATH=pigpio-master python -m pytest -q test_failsafe.py
+
+import pytest
+
+from core.failsafe import LinkMonitor, PigpioWatchdog, WATCHDOG_TAG
+from drivers.controller import PS4Controller
+
+PI_SCRIPT_RUNNING = 2
+
+
+def _controller(last_report=100.0, **state):
+    controller = PS4Controller()
+    controller.last_report = last_report
+    controller.state.update(state)
+    return controller
+
+
+def test_not_tripped_before_first_report():
+    monitor = LinkMonitor(_controller(last_report=0.0), deadline=0.08)
+    assert not monitor.check(now=1000.0)
+    assert monitor.trips == 0
+
+
+def test_trip_neutralises_inputs_once():
+    controller = _controller(throttle=1.0, turn=-0.5, turret_pan=0.3, l2=1.0, fire=True)
+    monitor = LinkMonitor(controller, deadline=0.08)
+    assert not monitor.check(now=100.05)
+    assert monitor.check(now=100.09)
+    assert monitor.check(now=100.5)
+    assert monitor.trips == 1
+    assert monitor.detect_last == pytest.approx(90.0)
+    assert controller.state == {'throttle': 0.0, 'turn': 0.0, 'turret_pan': 0.0, 'turret_tilt': 0.0,
+                                'l2': 0.0, 'fire': False}
+    assert monitor.fields()["failsafe_active"]
+
+
+def test_rearms_only_on_neutral_stick():
+    controller = _controller()
+    monitor = LinkMonitor(controller, deadline=0.08)
+    assert monitor.check(now=101.0)
+    # レポートが戻っても、スティックが倒れたままなら止めたまま
+    controller.last_report = 101.0
+    controller.state['throttle'] = 0.8
+    assert monitor.check(now=101.01)
+    controller.state['throttle'] = 0.0
+    assert not monitor.check(now=101.02)
+    assert not monitor.tripped and monitor.trips == 1
+    # もう一度切れたら2回目として数える
+    assert monitor.check(now=102.0)
+    assert monitor.trips == 2
+
+
+@pytest.fixture
+def pi():
+    pigpio = pytest.importorskip("pigpio")
+    from sim.fake_pigpiod import run_in_thread
+    daemon, port = run_in_thread()
+    pi = pigpio.pi("127.0.0.1", port)
+    yield pi
+    pi.stop()
+    daemon.stop()
+
+
+def _tagged(pi):
+    return [sid for sid in range(32) if pi.script_status(sid)[1][9:] == (WATCHDOG_TAG,)]
+
+
+def test_watchdog_runs_tagged_and_removes_stale(pi):
+    other = pi.store_script(b"tag 0 mils 10 jmp 0")
+    first = PigpioWatchdog(pi, [17, 27])
+    status, params = pi.script_status(first.sid)
+    assert status == PI_SCRIPT_RUNNING and params[9] == WATCHDOG_TAG
+    first.heartbeat()
+    assert pi.script_status(first.sid)[1][0] == 1
+    # 前のプロセスが close しないまま落ちた: 次の見張りが古いものを消す
+    second = PigpioWatchdog(pi, [17, 27])
+    assert second.removed == 1
+    assert _tagged(pi) == [second.sid]
+    assert pi.script_status(other)[0] >= 0
+    second.close()
+    assert _tagged(pi) == []
+
+
+class _StuckPi:
+    """スクリプトが初期化中のまま進まない pigpiod"""
+
+    def __init__(self):
+        self.deleted = []
+
+    def script_status(self, sid):
+        return 0, ()
+
+    def store_script(self, script):
+        return 3
+
+    def delete_script(self, sid):
+        self.deleted.append(sid)
+
+
+def test_watchdog_gives_up_on_stuck_script(monkeypatch):
+    monkeypatch.setattr("core.failsafe.SCRIPT_INIT_TIMEOUT", 0.05)
+    stuck = _StuckPi()
+    with pytest.raises(RuntimeError):
+        PigpioWatchdog(stuck, [17])
+    assert stuck.deleted == [3]
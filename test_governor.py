@@ -0,0 +1,93 @@
+# 熱・電圧低下のガバナー (core/governor.py) のテスト (実機不要)
+#   python -m pytest -q test_governor.py
+
+import asyncio
+import json
+import logging
+
+import pytest
+
+from core.governor import (
+    SOFT_TEMP_LIMIT, THROTTLED, UNDERVOLT, FileSensor, Governor, Reading, target_level,
+)
+
+
+def _reading(temp_c=50.0, throttled=0, cpu=0.1, tick_p99=None):
+    return Reading(temp_c, throttled, cpu, tick_p99)
+
+
+class _Camera:
+    width, height, fps = 640, 480, 10
+
+    def __init__(self):
+        self.calls = []
+
+    def reconfigure(self, width, height, fps):
+        self.calls.append((width, height, fps))
+
+
+@pytest.fixture(autouse=True)
+def _root_log_level():
+    # Governor.apply はルートロガーのレベルを変える
+    level = logging.getLogger().level
+    yield
+    logging.getLogger().setLevel(level)
+
+
+@pytest.mark.parametrize("reading, level", [
+    (_reading(), 0),
+    (Reading(None, None, None, None), 0),
+    (_reading(temp_c=70.0), 1),
+    (_reading(temp_c=78.0), 2),
+    (_reading(temp_c=85.0), 3),
+    (_reading(throttled=SOFT_TEMP_LIMIT), 1),
+    (_reading(throttled=UNDERVOLT), 2),
+    (_reading(throttled=UNDERVOLT << 16), 0),    # 起動後に一度起きただけ
+    (_reading(cpu=0.96), 2),
+    (_reading(tick_p99=12.0), 1),
+    (_reading(temp_c=83.0, throttled=THROTTLED, cpu=0.9), 3),
+])
+def test_target_level(reading, level):
+    assert target_level(reading)[0] == level
+
+
+def test_target_level_reasons():
+    assert target_level(_reading()) == (0, "nominal")
+    level, reason = target_level(_reading(temp_c=71.0, throttled=UNDERVOLT))
+    assert level == 2 and "temp 71.0C" in reason and "undervolt" in reason
+
+
+def test_step_raises_at_once_and_recovers_one_level_per_cooldown():
+    camera = _Camera()
+    governor = Governor(object(), camera=camera, cooldown=15.0)
+    assert governor.step(_reading(temp_c=85.0), now=0.0)
+    assert governor.level == 3 and camera.calls[-1] == (320, 240, 2)
+    assert governor.push_interval == 0.5
+
+    cool = _reading()
+    assert not governor.step(cool, now=1.0)        # ここから落ち着いた時間を数える
+    assert not governor.step(cool, now=15.0)
+    assert governor.step(cool, now=16.0)
+    assert governor.level == 2 and governor.reason.startswith("recovered")
+    assert not governor.step(cool, now=30.0)
+    assert governor.step(cool, now=31.0)
+    assert governor.level == 1
+
+
+def test_step_cooldown_restarts_when_target_returns():
+    governor = Governor(object(), cooldown=15.0)
+    governor.step(_reading(temp_c=78.0), now=0.0)
+    governor.step(_reading(), now=1.0)
+    governor.step(_reading(temp_c=78.0), now=10.0)  # また熱くなった: 数え直し
+    assert not governor.step(_reading(), now=12.0)
+    assert not governor.step(_reading(), now=20.0)
+    assert governor.step(_reading(), now=27.0)
+    assert governor.level == 1 and governor.transitions == 2
+
+
+def test_file_sensor(tmp_path):
+    path = tmp_path / "sensor.json"
+    path.write_text(json.dumps({"temp_c": 81.5, "throttled": "0x4", "cpu": 0.5}))
+    reading = asyncio.run(FileSensor(str(path)).read())
+    assert reading == Reading(81.5, THROTTLED, 0.5, None)
+    assert asyncio.run(FileSensor(str(tmp_path / "missing.json")).read()) == Reading(None, None, None, None)
@@ -0,0 +1,119 @@
+# 入力トレースの記録と再生 (drivers/input_trace.py) のテスト (実機不要)
+#   python -m pytest -q test_input_trace.py
+
+import asyncio
+
+import pytest
+
+from drivers.controller import EV_ABS, EV_KEY, EV_SYN
+from drivers.input_trace import RECORD, ReplayController, TraceWriter, read_trace, synthesize
+
+
+class _Event:
+    """evdev.InputEvent の代わり"""
+
+    def __init__(self, us, etype, code, value):
+        self.sec, self.usec = divmod(us, 1000000)
+        self.type, self.code, self.value = etype, code, value
+
+
+def _write(path, events):
+    writer = TraceWriter(str(path))
+    for event in events:
+        writer.write(event)
+    writer.close()
+    return str(path)
+
+
+EVENTS = [
+    _Event(5000000, EV_ABS, 1, 0),          # 前進いっぱい
+    _Event(5000000, EV_SYN, 0, 0),
+    _Event(5004000, EV_KEY, 305, 1),        # 発砲
+    _Event(5004000, EV_SYN, 0, 0),
+    _Event(5250000, EV_ABS, 1, 128),
+    _Event(5250000, EV_SYN, 0, 0),
+]
+
+
+def test_round_trip(tmp_path):
+    events = read_trace(_write(tmp_path / "t.trace", EVENTS))
+    assert [(e.type, e.code, e.value) for e in events] == [(e.type, e.code, e.value) for e in EVENTS]
+    assert [e.t for e in events] == [0.0, 0.0, 0.004, 0.004, 0.25, 0.25]
+
+
+def test_truncated_record_is_ignored(tmp_path):
+    path = _write(tmp_path / "t.trace", EVENTS)
+    with open(path, "ab") as f:
+        f.write(b"\x01" * (RECORD.size - 1))   # 記録中に落ちた
+    assert len(read_trace(path)) == len(EVENTS)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not.trace"
+    path.write_bytes(b"JUNK" + bytes(12))
+    with pytest.raises(ValueError):
+        read_trace(str(path))
+
+
+def test_synthesize(tmp_path):
+    path = str(tmp_path / "s.trace")
+    count = synthesize(path, seconds=1.0, report_hz=50)
+    events = read_trace(path)
+    assert len(events) == count
+    assert sum(1 for e in events if e.type == EV_SYN) == 50
+    assert events[-1].t == pytest.approx(0.98)
+
+
+def test_replay_drives_controller_state(tmp_path):
+    controller = ReplayController(_write(tmp_path / "t.trace", EVENTS), speed=0)
+    seen, fired = [], []
+
+    def on_event(event):
+        seen.append(event)
+        if event.type == EV_KEY:
+            fired.append(controller.state['fire'])
+    controller.on_event = on_event
+    asyncio.run(controller.listen())
+    assert controller.finished.is_set() and not controller.connected
+    assert len(seen) == len(EVENTS) == controller.event_count
+    assert fired == [True]
+    assert controller.state['throttle'] == 0.0
+    assert controller.last_report > 0
+
+
+def test_replay_keeps_recorded_timing(tmp_path):
+    controller = ReplayController(_write(tmp_path / "t.trace", EVENTS), speed=5.0)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await controller.listen()
+        return loop.time() - start
+    assert 0.04 <= asyncio.run(main()) < 1.0      # 0.25 秒を 5 倍速で
+
+
+def test_looping_replay_yields(tmp_path):
+    controller = ReplayController(_write(tmp_path / "t.trace", EVENTS[:2]), speed=0, loop=True)
+    ticks = []
+
+    async def other():
+        while len(ticks) < 3:
+            ticks.append(controller.event_count)
+            await asyncio.sleep(0)
+
+    async def main():
+        replay = asyncio.ensure_future(controller.listen())
+        await asyncio.wait_for(other(), 1.0)
+        replay.cancel()
+    asyncio.run(main())
+    assert len(ticks) == 3
+
+
+def test_looping_replay_rejects_empty_trace(tmp_path):
+    path = _write(tmp_path / "empty.trace", [])
+    assert read_trace(path) == []
+    with pytest.raises(ValueError):
+        ReplayController(path, loop=True)
+    controller = ReplayController(path)
+    asyncio.run(controller.listen())
+    assert controller.finished.is_set()
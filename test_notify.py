@@ -0,0 +1,212 @@
+# pigpio.py の通知 (エッジ報告) の受信のテスト (実機不要, pigpiod は sim.fake_pigpiod)
+#   PYTHONPATH=pigpio-master python -m pytest -q test_notify.py
+
+import threading
+import time
+
+import pytest
+
+pigpio = pytest.importorskip("pigpio")
+
+from sim.fake_pigpiod import REPORT, run_in_thread
+
+GPIO = 4
+TIMEOUT = 5.0
+
+
+@pytest.fixture
+def daemon():
+    daemon, port = run_in_thread()
+    daemon.port = port
+    yield daemon
+    daemon.stop()
+
+
+@pytest.fixture
+def pi(daemon):
+    pi = pigpio.pi("127.0.0.1", daemon.port)
+    yield pi
+    pi.stop()
+
+
+def _reports(seqs, gpio=GPIO, first_tick=1000, flags=0):
+    """seqs の番号で gpio を反転させるレポート列"""
+    data = bytearray()
+    level = 0
+    for i, seq in enumerate(seqs):
+        level ^= 1 << gpio
+        data += REPORT.pack(seq & 0xFFFF, flags, (first_tick + i * 10) & 0xFFFFFFFF, level)
+    return bytes(data)
+
+
+def _inject(daemon, data):
+    daemon.loop.call_soon_threadsafe(daemon.inject_reports, data)
+
+
+def _until(done, timeout=TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while not done():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.001)
+
+
+def _drained(pi, count):
+    def done():
+        received, lost, overflowed, queued, _ = pi.notify_stats()
+        return received >= count and not queued
+    return done
+
+
+def test_in_order_reports_reach_callbacks(daemon, pi):
+    edges = []
+    cb = pi.callback(GPIO, pigpio.EITHER_EDGE, lambda g, l, t: edges.append((g, l, t)))
+    _inject(daemon, _reports(range(6)))
+    _until(lambda: len(edges) == 6)
+    assert edges[:3] == [(GPIO, 1, 1000), (GPIO, 0, 1010), (GPIO, 1, 1020)]
+    assert pi.notify_stats()[:3] == (6, 0, 0)
+    cb.cancel()
+
+
+def test_seq_gaps_count_as_lost(daemon, pi):
+    cb = pi.callback(GPIO, pigpio.EITHER_EDGE)
+    _inject(daemon, _reports([0, 1, 2, 6, 7, 9]))
+    _until(_drained(pi, 6))
+    received, lost, overflowed, _, _ = pi.notify_stats()
+    assert (received, lost, overflowed) == (6, 4, 0)
+    assert cb.tally() == 6
+    cb.cancel()
+
+
+def test_seq_wrap_is_not_a_loss(daemon, pi):
+    cb = pi.callback(GPIO, pigpio.EITHER_EDGE)
+    count = 0x10000 + 3
+    pi.set_notify_queue_size(count)
+    _inject(daemon, _reports(range(count)))
+    _until(_drained(pi, count))
+    assert pi.notify_stats()[1] == 0
+    assert cb.tally() == count
+    cb.cancel()
+
+
+def test_full_queue_counts_overflow(daemon, pi):
+    pi.set_notify_queue_size(4)
+    gate = []
+
+    def slow(gpio, level, tick):
+        while not gate:
+            time.sleep(0.001)
+
+    cb = pi.callback(GPIO, pigpio.EITHER_EDGE, slow)
+    _inject(daemon, _reports(range(2)))
+    _until(lambda: pi.notify_stats()[0] == 2)
+    _inject(daemon, _reports(range(2, 12)))     # 最初のコールバックが終わらないうちに
+    _until(lambda: pi.notify_stats()[0] == 12)
+    gate.append(True)
+    _until(lambda: not pi.notify_stats()[3])
+    received, lost, overflowed, _, max_queued = pi.notify_stats()
+    assert lost == 0 and overflowed > 0 and max_queued <= 4
+    cb.cancel()
+
+
+def _toggles(gpios, first_tick=1000, step=10):
+    """gpios を順番に反転させるレポート列 (番号は 0 から)"""
+    data = bytearray()
+    level = 0
+    for i, gpio in enumerate(gpios):
+        level ^= 1 << gpio
+        data += REPORT.pack(i & 0xFFFF, 0, (first_tick + i * step) & 0xFFFFFFFF, level)
+    return bytes(data)
+
+
+class _Collect:
+    def __init__(self):
+        self.ticks, self.levels = [], []
+
+    def __call__(self, ticks, levels):
+        self.ticks += list(ticks)
+        self.levels += list(levels)
+
+
+@pytest.mark.parametrize("gpios", [32, -1, [4, 40]])
+def test_bulk_callback_rejects_bad_gpio(pi, gpios):
+    with pytest.raises(pigpio.error):
+        pi.bulk_callback(gpios, _Collect())
+    assert not pi._notify.bulk and not pi._notify.monitor
+
+
+def test_bulk_callback_delivers_only_its_gpios(daemon, pi):
+    got = _Collect()
+    cb = pi.bulk_callback([GPIO], got)
+    _inject(daemon, _toggles([GPIO, 5, GPIO, 5, GPIO]))
+    _until(lambda: len(got.ticks) == 3)
+    assert cb.edges() == 3
+    assert got.ticks == [1000, 1020, 1040]
+    assert [level >> GPIO & 1 for level in got.levels] == [1, 0, 1]
+    assert got.levels[1] == 1 << 5      # 全ピンのレベル
+    cb.cancel()
+    assert not pi._notify.bulk
+
+
+def test_bulk_callback_wide_ticks(daemon, pi):
+    got = _Collect()
+    cb = pi.bulk_callback(GPIO, got, wide_ticks=True)
+    _inject(daemon, _toggles([GPIO] * 4, first_tick=0xFFFFFFF0, step=8))
+    _until(lambda: len(got.ticks) == 4)
+    assert got.ticks == [0xFFFFFFF0, 0xFFFFFFF8, 0x100000000, 0x100000008]
+    cb.cancel()
+
+
+def test_bulk_callback_numpy(daemon, pi):
+    np = pytest.importorskip("numpy")
+    got = []
+    cb = pi.bulk_callback(GPIO, lambda ticks, levels: got.append((ticks, levels)), use_numpy=True)
+    _inject(daemon, _toggles([GPIO, 5, GPIO]))
+    _until(lambda: sum(len(t) for t, _ in got) == 2)
+    ticks = np.concatenate([t for t, _ in got])
+    assert ticks.dtype == np.uint32 and list(ticks) == [1000, 1020]
+    cb.cancel()
+
+
+def _set_input(daemon, level, gpio=GPIO):
+    daemon.loop.call_soon_threadsafe(daemon.set_input, gpio, level)
+
+
+def test_edge_waiter_keeps_edges_between_waits(daemon, pi):
+    waiter = pi.edge_waiter(GPIO, pigpio.EITHER_EDGE)
+    _set_input(daemon, 1)   # wait より先に来たエッジも取りこぼさない
+    edge = waiter.wait(TIMEOUT)
+    assert edge is not None and edge[0] == 1
+    assert waiter.wait(0.02) is None
+    _set_input(daemon, 0)
+    level, tick = waiter.wait(TIMEOUT)
+    assert level == 0 and tick > edge[1]
+    waiter.cancel()
+    assert not pi._notify.callbacks and not pi._notify.monitor
+
+
+def test_wait_for_edge_wakes_on_edge(daemon, pi):
+    timer = threading.Timer(0.05, _set_input, (daemon, 1))
+    timer.start()
+    start = time.monotonic()
+    assert pi.wait_for_edge(GPIO, pigpio.RISING_EDGE, TIMEOUT)
+    assert time.monotonic() - start < TIMEOUT / 2
+    timer.join()
+    assert not pi._notify.callbacks
+
+
+def test_wait_for_edge_times_out_and_cancels(pi):
+    start = time.monotonic()
+    assert not pi.wait_for_edge(GPIO, pigpio.RISING_EDGE, 0.05)
+    assert 0.04 <= time.monotonic() - start < 1.0
+    assert not pi._notify.callbacks and not pi._notify.monitor
+
+
+def test_event_waiter(pi):
+    waiter = pi.event_waiter(7)
+    assert waiter.wait(0.02) is None
+    pi.event_trigger(7)
+    assert isinstance(waiter.wait(TIMEOUT), int)
+    waiter.cancel()
+    assert not pi._notify.events
+    assert not pi.wait_for_event(7, 0.02)
@@ -0,0 +1,82 @@
+# 実行時レイヤ (core/runtime.py) のテスト (実機不要)
+#   python -m pytest -q test_runtime.py
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core.runtime import Executor, LoopMonitor
+
+
+@pytest.fixture
+def executor():
+    executor = Executor("test", workers=1)
+    yield executor
+    executor.shutdown()
+
+
+def test_submit_latest_keeps_only_newest_per_key(executor):
+    gate = threading.Event()
+    written = []
+    executor.submit_latest("block", gate.wait)      # スレッドをふさいでおく
+    for angle in (10, 20, 30):
+        executor.submit_latest("servo", written.append, angle)
+    executor.submit_latest("motor", written.append, "stop")
+    gate.set()
+    executor.shutdown(wait=True)
+    assert written == [30, "stop"]
+    assert executor.coalesced == 2
+    assert executor.submitted == executor.completed == 3
+    assert executor.depth == 0
+
+
+def test_submit_latest_after_run_starts_queues_again(executor):
+    started, gate = threading.Event(), threading.Event()
+    written = []
+
+    def slow(value):
+        started.set()
+        gate.wait()
+        written.append(value)
+
+    executor.submit_latest("servo", slow, 1)
+    started.wait(1.0)
+    executor.submit_latest("servo", written.append, 2)  # 実行中の分は置き換えられない
+    gate.set()
+    executor.shutdown(wait=True)
+    assert written == [1, 2] and executor.coalesced == 0
+
+
+def test_submit_latest_counts_errors(executor):
+    def fail():
+        raise OSError("pigpiod gone")
+    executor.submit_latest("servo", fail)
+    executor.shutdown(wait=True)
+    assert executor.errors == 1 and executor.completed == 1
+
+
+def test_run_returns_result_and_raises(executor):
+    async def main():
+        assert await executor.run(sum, (1, 2, 3)) == 6
+        with pytest.raises(ZeroDivisionError):
+            await executor.run(divmod, 1, 0)
+    asyncio.run(main())
+    assert executor.errors == 1
+    assert executor.fields()["completed"] == 2
+
+
+def test_loop_monitor_records_stall():
+    async def main():
+        monitor = LoopMonitor(threshold_ms=20.0, name="test loop").install()
+        try:
+            await asyncio.sleep(0)
+            time.sleep(0.03)        # ループを止める
+            await asyncio.sleep(0)
+        finally:
+            monitor.uninstall()
+        return monitor
+    monitor = asyncio.run(main())
+    assert monitor.stalls >= 1 and monitor.worst >= 20.0
+    assert "main" in monitor.worst_callback
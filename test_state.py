@@ -0,0 +1,89 @@
+# 共有状態ブロック (core/state.py) の seqlock のテスト (実機不要)
+#   python -m pytest -q test_state.py
+
+import os
+import time
+
+from core.state import InputBlock, StateBlock, _SEQ, _SEQ_OFF
+
+
+def _blocks(cls=StateBlock):
+    name = f"panzer_test_{os.getpid()}_{cls.__name__}"
+    writer = cls(name)
+    return writer, cls.attach(name)
+
+
+def _begin_write(writer):
+    """書き手が奇数の seq を書いたところで止まった状態にする (update の途中で落ちた)"""
+    _SEQ.pack_into(writer._buf, _SEQ_OFF, (writer._seq + 1) & 0xFFFFFFFF)
+
+
+def test_snapshot_reads_latest_update():
+    writer, reader = _blocks()
+    try:
+        assert reader.snapshot().speed == 0.0
+        writer.update(speed=0.5, pan=12.0, fire_seq=3)
+        snap = reader.snapshot()
+        assert (snap.speed, snap.pan, snap.fire_seq) == (0.5, 12.0, 3)
+        assert snap.updated > 0
+        assert reader.stale_reads == 0
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_snapshot_gives_up_on_odd_seq():
+    writer, reader = _blocks()
+    try:
+        writer.update(speed=0.25)
+        reader.snapshot()
+        _begin_write(writer)
+        writer._buf[-4:] = b"\xff\xff\xff\xff"     # 書きかけのペイロード
+        start = time.monotonic()
+        snap = reader.snapshot(timeout=0.02)
+        assert time.monotonic() - start < 1.0
+        assert snap.speed == 0.25                   # 最後に取れたもの
+        assert reader.stale_reads == 1
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_snapshot_before_any_good_read_is_zero():
+    writer, reader = _blocks()
+    try:
+        _begin_write(writer)
+        snap = reader.snapshot(timeout=0.01)
+        assert snap.updated == 0 and snap.speed == 0.0
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_try_snapshot_does_not_wait():
+    writer, reader = _blocks(InputBlock)
+    try:
+        writer.update(frames=7, lx=0.5)
+        assert reader.try_snapshot().frames == 7
+        _begin_write(writer)
+        snap = reader.try_snapshot()
+        assert snap.frames == 7
+        assert reader.stale_reads == 1
+        writer.update(frames=8)                     # 次の update で偶数に戻る
+        assert reader.try_snapshot().frames == 8
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_attach_rejects_other_layout():
+    writer = StateBlock(f"panzer_test_{os.getpid()}_layout")
+    try:
+        try:
+            InputBlock.attach(writer.name)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("attached to a block with another layout")
+    finally:
+        writer.close()
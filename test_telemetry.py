@@ -0,0 +1,68 @@
+# バイナリテレメトリ (core/telemetry.py) の往復のテスト (実機不要)
+#   python -m pytest -q test_telemetry.py
+
+import struct
+
+import pytest
+
+from core.state import Snapshot
+from core.telemetry import (
+    ACK_STALE, FLAG_LINK_UP, FLAG_MACHINEGUN, INPUT_ACK, INPUT_MSG, MSG_INPUT, MSG_INPUT_ACK,
+    MSG_STATE, SIZE, VERSION, TelemetryEncoder, decode, decode_input, encode_input_ack,
+)
+
+
+def _snapshot(**fields):
+    values = dict.fromkeys(Snapshot._fields, 0)
+    values.update(fields)
+    return Snapshot(**values)
+
+
+def test_state_round_trip():
+    encoder = TelemetryEncoder()
+    snap = _snapshot(speed=0.5, pan=-30.0, tilt=12.5, machinegun=1, link_up=1,
+                     fire_seq=4, mg_seq=9, input_age=16.0, link_drops=2, tick_p99=1.25)
+    data = bytes(encoder.encode(snap))
+    assert len(data) == SIZE == 40
+    msg = decode(data)
+    assert (msg.version, msg.type, msg.msg_seq) == (VERSION, MSG_STATE, 1)
+    assert msg.flags == FLAG_MACHINEGUN | FLAG_LINK_UP
+    assert (msg.speed, msg.pan, msg.tilt) == (0.5, -30.0, 12.5)
+    assert (msg.fire_seq, msg.mg_seq, msg.link_drops) == (4, 9, 2)
+    assert (msg.input_age, msg.tick_p99) == (16.0, 1.25)
+    assert decode(bytes(encoder.encode(snap))).msg_seq == 2
+
+
+def test_state_clamps_link_drops():
+    data = bytes(TelemetryEncoder().encode(_snapshot(link_drops=70000)))
+    assert decode(data).link_drops == 0xFFFF
+
+
+def test_state_rejects_other_version():
+    data = bytearray(TelemetryEncoder().encode(_snapshot()))
+    data[0] = VERSION + 1
+    with pytest.raises(ValueError):
+        decode(bytes(data))
+    with pytest.raises(ValueError):
+        decode(b"")
+
+
+def _input(version=VERSION, seq=5):
+    return INPUT_MSG.pack(version, MSG_INPUT, 0x1234, seq, 1234.5,
+                          32767, -32767, 0, 100, 255, 0, 0b10, 123, 0)
+
+
+def test_input_round_trip_and_ack():
+    frame = decode_input(_input())
+    assert (frame.session, frame.seq, frame.sent_ms) == (0x1234, 5, 1234.5)
+    assert (frame.lx, frame.ly, frame.l2, frame.buttons, frame.rtt) == (32767, -32767, 255, 0b10, 123)
+    version, kind, flags, seq, sent_ms = INPUT_ACK.unpack(encode_input_ack(frame, stale=True))
+    assert (version, kind, flags, seq, sent_ms) == (VERSION, MSG_INPUT_ACK, ACK_STALE, 5, 1234.5)
+    assert INPUT_ACK.unpack(encode_input_ack(frame))[2] == 0
+
+
+def test_input_ignores_other_messages_and_rejects_other_version():
+    assert decode_input(b"\x01\x01") is None
+    assert decode_input(struct.pack("<BB", VERSION, MSG_STATE) + bytes(38)) is None
+    with pytest.raises(ValueError):
+        decode_input(_input(version=VERSION + 1))
@@ -0,0 +1,85 @@
+# ブラウザのゲームパッド入力 (drivers/web_gamepad.py) のテスト (実機不要)
+#   python -m pytest -q test_web_gamepad.py
+
+import os
+
+import pytest
+
+from core.state import InputBlock
+from core.telemetry import ACK_STALE, INPUT_ACK, INPUT_MSG, MSG_INPUT, VERSION
+from drivers.web_gamepad import TAKEOVER, GamepadReceiver, WebGamepadController
+
+ONE_WAY_MS = 5.0
+
+
+def _frame(session, seq, now, late_ms=0.0, ly=0, buttons=0):
+    sent_ms = now * 1000.0 - ONE_WAY_MS - late_ms
+    return INPUT_MSG.pack(VERSION, MSG_INPUT, session, seq, sent_ms, 0, ly, 0, 0, 0, 0, buttons, 0, 0)
+
+
+def _stale(ack):
+    return INPUT_ACK.unpack(ack)[2] & ACK_STALE != 0
+
+
+@pytest.fixture
+def block():
+    block = InputBlock(f"panzer_test_{os.getpid()}_gamepad")
+    yield block
+    block.close()
+
+
+def test_accepts_in_order_and_drops_repeats(block):
+    receiver = GamepadReceiver(block)
+    assert not _stale(receiver.receive(_frame(1, 10, 100.0, ly=-32767), now=100.0))
+    assert _stale(receiver.receive(_frame(1, 10, 100.01), now=100.01))
+    assert _stale(receiver.receive(_frame(1, 9, 100.02), now=100.02))
+    assert (receiver.accepted, receiver.out_of_order) == (1, 2)
+    snap = block.snapshot()
+    assert (snap.frames, snap.frame_seq, snap.ly) == (1, 10, -1.0)
+
+
+def test_seq_wraps(block):
+    receiver = GamepadReceiver(block)
+    now = 100.0
+    for seq in (0xFFFFFFFE, 0xFFFFFFFF, 0, 1):
+        assert not _stale(receiver.receive(_frame(1, seq, now), now=now))
+        now += 0.016
+    assert receiver.accepted == 4 and receiver.out_of_order == 0
+    assert _stale(receiver.receive(_frame(1, 0xFFFFFFFF, now), now=now))
+
+
+def test_late_frames_are_dropped(block):
+    receiver = GamepadReceiver(block, stale_ms=100.0)
+    receiver.receive(_frame(1, 1, 100.0), now=100.0)
+    assert _stale(receiver.receive(_frame(1, 2, 100.2, late_ms=150.0), now=100.2))
+    assert receiver.stale == 1
+    assert not _stale(receiver.receive(_frame(1, 3, 100.21), now=100.21))
+
+
+def test_session_takeover_waits_for_silence(block):
+    receiver = GamepadReceiver(block)
+    receiver.receive(_frame(1, 1, 100.0), now=100.0)
+    # 別タブは今のセッションが TAKEOVER 秒黙るまで奪えない
+    assert _stale(receiver.receive(_frame(2, 1, 100.1), now=100.1))
+    assert receiver.rejected == 1 and receiver.session == 1
+    now = 100.0 + TAKEOVER + 0.01
+    assert not _stale(receiver.receive(_frame(2, 500, now), now=now))
+    assert receiver.session == 2 and receiver.takeovers == 2
+    assert block.snapshot().session == 2
+
+
+def test_controller_applies_frames(block):
+    receiver = GamepadReceiver(block)
+    controller = WebGamepadController(block.name)
+    controller.block = InputBlock.attach(block.name)
+    try:
+        receiver.receive(_frame(1, 1, 100.0, ly=-32767, buttons=0b10), now=100.0)
+        snap = controller.block.snapshot()
+        controller._poll(snap.updated)
+        assert controller.connected
+        assert controller.state['throttle'] == 1.0
+        assert controller.state['fire']
+        controller._poll(snap.updated + 1.0)
+        assert not controller.connected and controller.disconnects == 1
+    finally:
+        controller.close()
@@ -0,0 +1,125 @@
+// WebAudio サウンドエンジン
+// - 効果音は起動時に一度だけ AudioBuffer にデコードしておく
+// - 発砲などのワンショットはボイスプールから鳴らす (重ね撃ち可)
+// - エンジン音のピッチ/音量は AudioParam のオートメーションで滑らかに追従
+//   (ポーリング周期ではなくオーディオスレッド側で補間される)
+
+const ENGINE_SMOOTHING = 0.06;  // エンジン音の追従時定数 (秒)
+const MG_FADE = 0.015;          // 機銃ループの立ち上がり/停止 (秒, クリック防止)
+const MAX_VOICES = 6;           // 同時に鳴らせるワンショット数
+
+class SoundEngine {
+    constructor(urls) {
+        this.urls = urls;
+        this.ctx = null;
+        this.buffers = {};
+        this.voices = [];
+        this.volume = 0.5;
+    }
+
+    // ユーザー操作 (クリック) の中で呼ぶこと (自動再生ブロック対策)
+    async start() {
+        const AC = window.AudioContext || window.webkitAudioContext;
+        this.ctx = new AC({ latencyHint: 'interactive' });
+        await this.ctx.resume();
+
+        // すべての音を並列に取得・デコード (以後デコードは発生しない)
+        await Promise.all(Object.entries(this.urls).map(async ([name, url]) => {
+            const res = await fetch(url);
+            const data = await res.arrayBuffer();
+            this.buffers[name] = await this.ctx.decodeAudioData(data);
+        }));
+
+        const ctx = this.ctx;
+        this.master = ctx.createGain();
+        this.master.gain.value = this.volume;
+        this.master.connect(ctx.destination);
+
+        // ワンショット用ボイス (GainNode) をあらかじめ用意
+        for (let i = 0; i < MAX_VOICES; i++) {
+            const gain = ctx.createGain();
+            gain.connect(this.master);
+            this.voices.push({ gain, source: null, started: 0 });
+        }
+
+        // エンジン音 (アイドル / 走行) は常時ループさせて音量で切り替える
+        this.idle = this._loop('idle', 1.0);
+        this.drive = this._loop('drive', 0.0);
+        this.mg = null;
+        this.setSpeed(0);
+    }
+
+    _loop(name, gain) {
+        const ctx = this.ctx;
+        const g = ctx.createGain();
+        g.gain.value = gain;
+        g.connect(this.master);
+        const src = ctx.createBufferSource();
+        src.buffer = this.buffers[name];
+        src.loop = true;
+        src.connect(g);
+        src.start();
+        return { source: src, gain: g };
+    }
+
+    setVolume(v) {
+        this.volume = v;
+        if (!this.ctx) return;
+        this.master.gain.setTargetAtTime(v, this.ctx.currentTime, 0.02);
+    }
+
+    // エンジン音のクロスフェードとピッチ変化
+    setSpeed(spd) {
+        if (!this.ctx) return;
+        const t = this.ctx.currentTime;
+        const idleVol = Math.max(0, 1.0 - (spd * 1.5));
+        const driveVol = Math.min(1.0, spd * 1.2);
+
+        this._ramp(this.idle.gain.gain, idleVol, t);
+        this._ramp(this.drive.gain.gain, driveVol, t);
+        this._ramp(this.idle.source.playbackRate, 1.0 + (spd * 0.2), t);
+        this._ramp(this.drive.source.playbackRate, 0.8 + (spd * 0.8), t);
+    }
+
+    _ramp(param, value, t) {
+        param.cancelScheduledValues(t);
+        param.setTargetAtTime(value, t, ENGINE_SMOOTHING);
+    }
+
+    // ワンショット: 空きボイス (なければ一番古いもの) で即時再生
+    // start(0) は次のレンダリング量子 (128サンプル) から鳴り始める
+    play(name) {
+        if (!this.ctx || !this.buffers[name]) return;
+        const now = this.ctx.currentTime;
+        let voice = this.voices.find(v => !v.source);
+        if (!voice) {
+            voice = this.voices.reduce((a, b) => (a.started <= b.started ? a : b));
+            voice.source.stop();
+        }
+        const src = this.ctx.createBufferSource();
+        src.buffer = this.buffers[name];
+        src.connect(voice.gain);
+        src.onended = () => { if (voice.source === src) voice.source = null; };
+        voice.gain.gain.cancelScheduledValues(now);
+        voice.gain.gain.setValueAtTime(1.0, now);
+        voice.source = src;
+        voice.started = now;
+        src.start(0);
+    }
+
+    // 機銃: ループ再生のオン/オフ
+    setMachinegun(on) {
+        if (!this.ctx) return;
+        const t = this.ctx.currentTime;
+        if (on && !this.mg) {
+            this.mg = this._loop('mg', 0.0);
+            this.mg.gain.gain.setTargetAtTime(1.0, t, MG_FADE);
+        } else if (!on && this.mg) {
+            const mg = this.mg;
+            this.mg = null;
+            mg.gain.gain.cancelScheduledValues(t);
+            mg.gain.gain.setTargetAtTime(0.0, t, MG_FADE);
+            mg.source.stop(t + MG_FADE * 5);
+        }
+    }
+}
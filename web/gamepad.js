@@ -0,0 +1,107 @@
+// ブラウザのゲームパッド (Gamepad API) → バイナリ入力フレーム (WebSocket, 60Hz)
+// レイアウトは core/telemetry.py の INPUT_MSG / INPUT_ACK と同じ (リトルエンディアン)
+// サーバーは --input web で起動すること (drivers/web_gamepad.py)
+
+const MSG_INPUT = 2;
+const MSG_INPUT_ACK = 3;
+const INPUT_SIZE = 32;
+const INPUT_ACK_SIZE = 16;
+const ACK_STALE = 1 << 0;
+
+const INPUT_INTERVAL = 1000 / 60 - 1;   // 60Hz (描画が速い画面でも送りすぎない, ms)
+const MAX_BUFFERED = INPUT_SIZE * 2;    // 送信が詰まっているときは溜めずに間引く (バイト)
+
+class GamepadLink {
+    constructor() {
+        this.ws = null;
+        this.session = (Math.random() * 0x10000) | 0;  // タブごと
+        this.seq = 0;
+        this.rtt = 0;           // 直近の往復 (ms)
+        this.sent = 0;
+        this.acked = 0;
+        this.stale = 0;         // サーバーが古いとして捨てた数
+        this.skipped = 0;       // 送信が詰まっていて送らなかった数
+        this.lastSent = 0;
+        this.pad = null;
+        // 送信バッファは使い回す
+        this.buf = new ArrayBuffer(INPUT_SIZE);
+        this.dv = new DataView(this.buf);
+        this.running = false;
+        this.tick = this.tick.bind(this);
+    }
+
+    attach(ws) {
+        this.ws = ws;
+    }
+
+    start() {
+        if (this.running) return;
+        this.running = true;
+        requestAnimationFrame(this.tick);
+    }
+
+    // 標準配置のパッドを優先して1台選ぶ
+    findPad() {
+        const pads = navigator.getGamepads ? navigator.getGamepads() : [];
+        let found = null;
+        for (const p of pads) {
+            if (!p || !p.connected) continue;
+            if (p.mapping === 'standard') return p;
+            found = found || p;
+        }
+        return found;
+    }
+
+    // requestAnimationFrame で回す (タブが裏に回ると止まり、サーバー側のフェイルセーフが働く)
+    tick(now) {
+        requestAnimationFrame(this.tick);
+        if (now - this.lastSent < INPUT_INTERVAL) return;
+        this.pad = this.findPad();
+        const ws = this.ws;
+        if (!this.pad || !ws || ws.readyState !== WebSocket.OPEN) return;
+        if (ws.bufferedAmount > MAX_BUFFERED) {
+            this.skipped++;
+            return;
+        }
+        this.lastSent = now;
+        ws.send(this.encode(this.pad, performance.now()));
+        this.sent++;
+    }
+
+    encode(pad, now) {
+        const dv = this.dv;
+        const axis = (i) => Math.round(Math.max(-1, Math.min(1, pad.axes[i] || 0)) * 32767);
+        const trigger = (i) => Math.round((pad.buttons[i] ? pad.buttons[i].value : 0) * 255);
+        let buttons = 0;
+        for (let i = 0; i < pad.buttons.length && i < 16; i++) {
+            if (pad.buttons[i].pressed) buttons |= 1 << i;
+        }
+        this.seq = (this.seq + 1) >>> 0;
+        dv.setUint8(0, TELEMETRY_VERSION);
+        dv.setUint8(1, MSG_INPUT);
+        dv.setUint16(2, this.session, true);
+        dv.setUint32(4, this.seq, true);
+        dv.setFloat64(8, now, true);
+        dv.setInt16(16, axis(0), true);
+        dv.setInt16(18, axis(1), true);
+        dv.setInt16(20, axis(2), true);
+        dv.setInt16(22, axis(3), true);
+        dv.setUint8(24, trigger(6));
+        dv.setUint8(25, trigger(7));
+        dv.setUint16(26, buttons, true);
+        dv.setUint16(28, Math.min(0xFFFF, Math.round(this.rtt * 10)), true);
+        dv.setUint16(30, 0, true);
+        return this.buf;
+    }
+
+    // 受信メッセージが入力の応答なら処理して true
+    onMessage(buffer) {
+        if (buffer.byteLength !== INPUT_ACK_SIZE) return false;
+        const dv = new DataView(buffer);
+        if (dv.getUint8(0) !== TELEMETRY_VERSION || dv.getUint8(1) !== MSG_INPUT_ACK) return false;
+        this.rtt = performance.now() - dv.getFloat64(8, true);
+        this.acked++;
+        if (dv.getUint16(2, true) & ACK_STALE) this.stale++;
+        return true;
+    }
+}
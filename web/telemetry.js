@@ -0,0 +1,40 @@
+// UIリンク用 バイナリテレメトリのデコーダ
+// レイアウトは core/telemetry.py と同じ (リトルエンディアン, 40バイト)
+
+const TELEMETRY_VERSION = 1;
+const TELEMETRY_SIZE = 40;
+const MSG_STATE = 1;
+
+const FLAG_MACHINEGUN = 1 << 0;
+const FLAG_LINK_UP = 1 << 1;
+
+// 受信ごとに新しいオブジェクトを作らず、同じ入れ物に書き込む
+const telemetry = {
+    msgSeq: 0, speed: 0, pan: 0, tilt: 0,
+    machinegun: false, linkUp: false,
+    fireSeq: 0, mgSeq: 0,
+    inputAge: 0, linkDrops: 0, tickP99: 0
+};
+
+// offset: 観戦ハブ (hub.py) の転送ではノード番号の2バイトが前に付く
+function decodeTelemetry(buffer, out = telemetry, offset = 0) {
+    const dv = new DataView(buffer, offset);
+    if (dv.byteLength < TELEMETRY_SIZE || dv.getUint8(0) !== TELEMETRY_VERSION) {
+        throw new Error('unsupported telemetry message');
+    }
+    if (dv.getUint8(1) !== MSG_STATE) return null;
+
+    const flags = dv.getUint16(2, true);
+    out.machinegun = (flags & FLAG_MACHINEGUN) !== 0;
+    out.linkUp = (flags & FLAG_LINK_UP) !== 0;
+    out.msgSeq = dv.getUint32(4, true);
+    out.speed = dv.getFloat32(8, true);
+    out.pan = dv.getFloat32(12, true);
+    out.tilt = dv.getFloat32(16, true);
+    out.fireSeq = dv.getUint32(20, true);
+    out.mgSeq = dv.getUint32(24, true);
+    out.inputAge = dv.getFloat32(28, true);
+    out.linkDrops = dv.getUint16(32, true);
+    out.tickP99 = dv.getFloat32(36, true);
+    return out;
+}